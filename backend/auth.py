@@ -4,16 +4,44 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from cache import TTLCache
+import asyncio
+import hashlib
 import os
+import time
 
 # Security Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: bcrypt cost factor and the worker pool that runs it
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "100"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
 
+# Already-verified JWTs, keyed by a hash of the token and expiring no later
+# than the token's own exp claim
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL_S = float(os.getenv("JWT_CACHE_TTL_S", "300"))
+_token_cache = TTLCache(maxsize=JWT_CACHE_SIZE, ttl=JWT_CACHE_TTL_S)
+
+# bcrypt releases the GIL, so a thread pool keeps hashing off the event loop
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+_hash_metrics = {
+    "queued": 0,
+    "in_flight": 0,
+    "completed": 0,
+    "rejected": 0,
+    "wait_seconds_total": 0.0,
+    "run_seconds_total": 0.0
+}
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +50,51 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def _run_in_hash_pool(func, *args):
+    """Run a hashing call on the worker pool, capping concurrency and queue depth"""
+    if _hash_metrics["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        _hash_metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly"
+        )
+    
+    queued_at = time.perf_counter()
+    _hash_metrics["queued"] += 1
+    try:
+        await _hash_slots.acquire()
+    finally:
+        _hash_metrics["queued"] -= 1
+    
+    started_at = time.perf_counter()
+    _hash_metrics["wait_seconds_total"] += started_at - queued_at
+    _hash_metrics["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_metrics["in_flight"] -= 1
+        _hash_metrics["completed"] += 1
+        _hash_metrics["run_seconds_total"] += time.perf_counter() - started_at
+        _hash_slots.release()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool without blocking the event loop"""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+def get_password_hash_metrics() -> dict:
+    """Queue depth and timing counters for the password hashing pool"""
+    return {
+        **_hash_metrics,
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "bcrypt_rounds": BCRYPT_ROUNDS
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -34,10 +107,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify JWT token from Authorization header"""
+def get_token_cache_stats() -> dict:
+    """Hit/miss counters for the verified-token cache"""
+    return _token_cache.stats()
+
+def verify_access_token(token: str) -> dict:
+    """Decode a JWT (or reuse its cached result) into the current user.
+
+    Only call this from the event loop: the token cache is not thread-safe.
+    """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         user_type: str = payload.get("user_type")
         
@@ -48,7 +133,13 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return {"user_id": user_id, "user_type": user_type}
+        current_user = {"user_id": user_id, "user_type": user_type}
+        
+        expires_in = payload.get("exp", 0) - time.time()
+        if expires_in > 0:
+            _token_cache.set(cache_key, current_user, ttl=min(expires_in, JWT_CACHE_TTL_S))
+        
+        return dict(current_user)
     
     except JWTError:
         raise HTTPException(
@@ -57,7 +148,12 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def require_school_user(current_user: dict = Depends(verify_token)):
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Verify JWT token from Authorization header"""
+    # async so FastAPI runs it on the event loop rather than the threadpool
+    return verify_access_token(credentials.credentials)
+
+async def require_school_user(current_user: dict = Depends(verify_token)):
     """Dependency to require school user authentication"""
     if current_user["user_type"] != "school":
         raise HTTPException(
@@ -66,7 +162,7 @@ def require_school_user(current_user: dict = Depends(verify_token)):
         )
     return current_user
 
-def require_admin_user(current_user: dict = Depends(verify_token)):
+async def require_admin_user(current_user: dict = Depends(verify_token)):
     """Dependency to require admin user authentication"""
     if current_user["user_type"] != "admin":
         raise HTTPException(
@@ -75,7 +171,7 @@ def require_admin_user(current_user: dict = Depends(verify_token)):
         )
     return current_user
 
-def require_evaluator_user(current_user: dict = Depends(verify_token)):
+async def require_evaluator_user(current_user: dict = Depends(verify_token)):
     """Dependency to require evaluator user authentication"""
     if current_user["user_type"] != "evaluator":
         raise HTTPException(
@@ -0,0 +1,36 @@
+"""Measure the per-request saving of the verified-JWT cache.
+
+Usage (from the backend directory):
+
+    python benchmarks/jwt_cache.py [iterations]
+"""
+from pathlib import Path
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import auth
+
+def main(iterations: int = 20000):
+    token = auth.create_access_token({"sub": "bench-school", "user_type": "school"})
+    
+    def uncached():
+        auth._token_cache.clear()
+        auth.verify_access_token(token)
+    
+    def cached():
+        auth.verify_access_token(token)
+    
+    miss = timeit.timeit(uncached, number=iterations) / iterations
+    auth.verify_access_token(token)
+    hit = timeit.timeit(cached, number=iterations) / iterations
+    
+    print(f"iterations:        {iterations}")
+    print(f"jwt.decode path:   {miss * 1e6:8.2f} us/request")
+    print(f"cache hit path:    {hit * 1e6:8.2f} us/request")
+    print(f"saving:            {(miss - hit) * 1e6:8.2f} us/request ({miss / hit:.1f}x)")
+    print(f"cache stats:       {auth.get_token_cache_stats()}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
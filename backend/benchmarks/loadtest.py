@@ -0,0 +1,345 @@
+r"""Voting-storm load test: boots the app in process, seeds data, drives a request mix.
+
+Requests go through httpx's ASGI transport, so the numbers cover the app and
+Mongo but not the network or uvicorn. Client and app share one event loop;
+keep that in mind when comparing against production latencies.
+
+Usage (from the backend directory):
+
+    # Against a local mongod (a throwaway loadtest_<pid> database is seeded and dropped)
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/loadtest.py
+
+    # Against the in-memory stand-in (needs mongomock-motor installed; it lacks
+    # $substrCP, so leave "nominations" out of the mix)
+    python benchmarks/loadtest.py --mongo memory --requests 2000 \
+        --mix vote=70,validate=15,results=10,dashboard=5
+
+    python benchmarks/loadtest.py --mix vote=80,validate=10,nominations=10 \
+        --concurrency 200 --requests 20000 --output results/before.json
+
+Each run is written as JSON (config, git commit and per-operation
+p50/p95/p99 and requests per second) so runs can be compared across commits.
+"""
+from pathlib import Path
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+# Always a throwaway database, dropped at the end unless --keep-db
+os.environ["DB_NAME"] = f"loadtest_{os.getpid()}"
+# Login is part of the mix; keep bcrypt at its production cost unless overridden
+os.environ.setdefault("BCRYPT_ROUNDS", "12")
+# Every in-process request comes from one client address, which the vote
+# velocity limiter would cut off almost immediately
+os.environ.setdefault("VOTE_RATE_LIMIT_ENABLED", "false")
+
+import httpx
+import numpy as np
+
+import database
+from database import get_collection, COLLECTIONS
+from models import (
+    SchoolUser, AdminUser, TeacherNomination, VotingToken, TeacherAwardCategory
+)
+from auth import get_password_hash
+
+DEFAULT_MIX = "vote=60,validate=15,nominations=15,results=5,login=2,dashboard=3"
+PASSWORD = "loadtest-password"
+ADMIN_EMAIL = "loadtest-admin@example.com"
+DISTRICTS = [("Bengaluru Urban", "Anekal"), ("Mysuru", "Hunsur"), ("Belagavi", "Gokak"), ("Udupi", "Karkala")]
+INSERT_CHUNK = 5000
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+async def insert_chunked(collection_key: str, docs: list):
+    collection = get_collection(COLLECTIONS[collection_key])
+    await asyncio.gather(*(
+        collection.insert_many(docs[start:start + INSERT_CHUNK], ordered=False)
+        for start in range(0, len(docs), INSERT_CHUNK)
+    ))
+
+async def seed(rng: random.Random, schools: int, nominations: int, tokens: int) -> dict:
+    """Insert schools, an admin, open nominations and unused tokens"""
+    password_hash = get_password_hash(PASSWORD)
+
+    school_docs = []
+    for index in range(schools):
+        district, taluk = rng.choice(DISTRICTS)
+        school_docs.append(SchoolUser(
+            school_name=f"Load Test School {index}",
+            authorized_person_name="Load Tester",
+            email=f"loadtest-school-{index}@example.com",
+            password_hash=password_hash,
+            phone="9000000000",
+            address="Load test address",
+            district=district,
+            taluk=taluk
+        ).dict())
+    await insert_chunked("schools", school_docs)
+
+    await insert_chunked("admins", [AdminUser(
+        name="Load Test Admin", email=ADMIN_EMAIL, password_hash=password_hash
+    ).dict()])
+
+    categories = list(TeacherAwardCategory)
+    nomination_docs = [TeacherNomination(
+        school_id=rng.choice(school_docs)["id"],
+        teacher_name=f"Teacher {index}",
+        category=rng.choice(categories),
+        award_type="shikshan-ratna",
+        experience_years=rng.randint(1, 35),
+        current_position="Teacher",
+        qualifications="B.Ed",
+        achievements="Achievements " * 40,
+        nomination_letter="Nomination letter"
+    ).dict() for index in range(nominations)]
+    await insert_chunked("teacher_nominations", nomination_docs)
+
+    expires_at = datetime.utcnow() + timedelta(days=1)
+    token_docs = [VotingToken(expires_at=expires_at, batch_label="LOADTEST").dict() for _ in range(tokens)]
+    await insert_chunked("voting_tokens", token_docs)
+
+    return {
+        "school_emails": [school["email"] for school in school_docs],
+        "nomination_ids": [nomination["id"] for nomination in nomination_docs],
+        "tokens": [token["token"] for token in token_docs]
+    }
+
+class Scenario:
+    """Shared state the operations draw from"""
+
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random, data: dict):
+        self.client = client
+        self.rng = rng
+        self.data = data
+        self.unused_tokens = list(data["tokens"])
+        self.school_headers = []
+        self.admin_headers = {}
+
+    async def login_headers(self, path: str, email: str) -> dict:
+        response = await self.client.post(path, json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def prepare(self, sessions: int):
+        emails = self.data["school_emails"][:sessions]
+        self.school_headers = [await self.login_headers("/api/auth/school/login", email) for email in emails]
+        self.admin_headers = await self.login_headers("/api/auth/admin/login", ADMIN_EMAIL)
+
+async def op_vote(scenario: Scenario):
+    token = scenario.unused_tokens.pop() if scenario.unused_tokens else "0" * 12
+    return await scenario.client.post("/api/voting/cast-vote", json={
+        "token": token, "nomination_id": scenario.rng.choice(scenario.data["nomination_ids"])
+    })
+
+async def op_validate(scenario: Scenario):
+    return await scenario.client.post("/api/voting/validate-token", json={
+        "token": scenario.rng.choice(scenario.data["tokens"])
+    })
+
+async def op_nominations(scenario: Scenario):
+    return await scenario.client.get("/api/voting/nominations")
+
+async def op_results(scenario: Scenario):
+    nomination_id = scenario.rng.choice(scenario.data["nomination_ids"])
+    return await scenario.client.get(f"/api/voting/results/{nomination_id}")
+
+async def op_login(scenario: Scenario):
+    return await scenario.client.post("/api/auth/school/login", json={
+        "email": scenario.rng.choice(scenario.data["school_emails"]), "password": PASSWORD
+    })
+
+async def op_dashboard(scenario: Scenario):
+    if scenario.rng.random() < 0.2:
+        return await scenario.client.get("/api/admin/dashboard", headers=scenario.admin_headers)
+    return await scenario.client.get("/api/school/dashboard", headers=scenario.rng.choice(scenario.school_headers))
+
+OPERATIONS = {
+    "vote": op_vote,
+    "validate": op_validate,
+    "nominations": op_nominations,
+    "results": op_results,
+    "login": op_login,
+    "dashboard": op_dashboard,
+}
+# Responses that are a correct answer for the operation, not a failure
+EXPECTED_STATUS = {"validate": {200, 400}}
+
+async def drive(scenario: Scenario, weights: dict, requests: int, concurrency: int) -> dict:
+    names = list(weights)
+    schedule = iter(scenario.rng.choices(names, weights=[weights[name] for name in names], k=requests))
+    samples = {name: [] for name in names}
+    errors = {name: {} for name in names}
+
+    async def worker():
+        for name in schedule:
+            started = time.perf_counter()
+            try:
+                response = await OPERATIONS[name](scenario)
+                status_code = response.status_code
+            except Exception as e:
+                status_code = type(e).__name__
+            samples[name].append(time.perf_counter() - started)
+            if status_code not in EXPECTED_STATUS.get(name, {200}):
+                errors[name][str(status_code)] = errors[name].get(str(status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    def summarize(latencies: list, error_counts: dict) -> dict:
+        if not latencies:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        return {
+            "count": len(latencies),
+            "errors": sum(error_counts.values()),
+            "error_statuses": error_counts,
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(max(latencies) * 1000, 2)
+        }
+
+    every_latency = [latency for latencies in samples.values() for latency in latencies]
+    every_error = {}
+    for error_counts in errors.values():
+        for status_code, count in error_counts.items():
+            every_error[status_code] = every_error.get(status_code, 0) + count
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(every_latency, every_error),
+        "operations": {name: summarize(samples[name], errors[name]) for name in names}
+    }
+
+async def start_app(memory: bool):
+    from server import app
+    from jobs import job_runner
+    from leaderboard import leaderboard
+    from vote_aggregator import vote_aggregator
+
+    if not memory:
+        await app.router.startup()
+        return app
+
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("--mongo memory needs mongomock-motor: pip install mongomock-motor")
+    database.db.client = AsyncMongoMockClient()
+    database.db.database = database.db.client[os.environ["DB_NAME"]]
+    # The stand-in has no capped collections or explain, so the slow-query
+    # recorder is left out
+    await database.ensure_indexes()
+    vote_aggregator.start()
+    await leaderboard.start()
+    await job_runner.start()
+    return app
+
+async def stop_app(app, memory: bool, keep_db: bool):
+    if memory:
+        from jobs import job_runner
+        from leaderboard import leaderboard
+        from vote_aggregator import vote_aggregator
+
+        await job_runner.stop()
+        await leaderboard.stop()
+        await vote_aggregator.stop()
+        return
+    if not keep_db:
+        await database.db.client.drop_database(os.environ["DB_NAME"])
+    await app.router.shutdown()
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_report(report: dict):
+    print(f"{'operation':<12} {'count':>7} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = [*report["results"]["operations"].items(), ("overall", report["results"]["overall"])]
+    for name, row in rows:
+        if not row["count"]:
+            continue
+        print(f"{name:<12} {row['count']:>7} {row['errors']:>7} {row['rps']:>8} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+
+async def main(args):
+    memory = args.mongo == "memory"
+    if not memory:
+        os.environ["MONGO_URL"] = args.mongo
+    weights = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+
+    app = await start_app(memory)
+    # The app configures INFO logging on import; per-request logs would
+    # dominate the run
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        vote_share = weights.get("vote", 0) / sum(weights.values())
+        data = await seed(rng, args.schools, args.nominations, int(args.requests * vote_share * 1.1) + 100)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest") as client:
+            scenario = Scenario(client, rng, data)
+            await scenario.prepare(sessions=min(20, args.schools))
+            results = await drive(scenario, weights, args.requests, args.concurrency)
+    finally:
+        await stop_app(app, memory, args.keep_db)
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "mongo": "memory" if memory else "mongod",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": weights,
+            "schools": args.schools,
+            "nominations": args.nominations,
+            "seed": args.seed,
+            "bcrypt_rounds": int(os.environ["BCRYPT_ROUNDS"])
+        },
+        "results": results
+    }
+    print_report(report)
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        print(f"saved {output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"),
+                        help='Mongo URL, or "memory" for the in-memory stand-in')
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation=weight list (default {DEFAULT_MIX})")
+    parser.add_argument("--schools", type=int, default=500)
+    parser.add_argument("--nominations", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--keep-db", action="store_true", help="keep the seeded database (mongod only)")
+    asyncio.run(main(parser.parse_args()))
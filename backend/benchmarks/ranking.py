@@ -0,0 +1,45 @@
+"""Measure the in-memory cost of ranking one nomination category.
+
+Times score_matrix + compute_final_scores + competition_ranks on synthetic
+data; Mongo load and bulk write time are not included.
+
+Usage (from the backend directory):
+
+    python benchmarks/ranking.py [nominations] [evaluators]
+"""
+from pathlib import Path
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from ranking import score_matrix, compute_final_scores, competition_ranks
+
+def main(nominations: int = 50000, evaluators: int = 40):
+    rng = random.Random(42)
+    evaluator_ids = [f"evaluator-{index}" for index in range(evaluators)]
+    # Each nomination is marked by a handful of evaluators
+    evaluator_scores = [
+        {evaluator_id: rng.randint(1, 10) for evaluator_id in rng.sample(evaluator_ids, 3)}
+        for _ in range(nominations)
+    ]
+    votes = np.array([rng.randint(0, 5000) for _ in range(nominations)], dtype=float)
+
+    start = time.perf_counter()
+    scores = score_matrix(evaluator_scores)
+    built = time.perf_counter()
+    final_scores = compute_final_scores(scores, votes)
+    ranks = competition_ranks(final_scores)
+    done = time.perf_counter()
+
+    print(f"nominations:       {nominations}")
+    print(f"evaluators:        {evaluators}")
+    print(f"score matrix:      {(built - start) * 1000:8.1f} ms")
+    print(f"scores + ranks:    {(done - built) * 1000:8.1f} ms")
+    print(f"total:             {(done - start) * 1000:8.1f} ms")
+    print(f"top score:         {final_scores.max():.2f} (rank {ranks.min()})")
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,494 @@
+"""Deterministic Karnataka-scale synthetic dataset for performance work.
+
+Generates schools spread over real district/taluk pairs, drawing
+registrations for every category at every competition level (with winners
+and advancing entries the way the progression engine writes them), teacher
+nominations with evaluator scores, and voting tokens with the votes cast
+through them. Every document is built from the models in models.py.
+
+All randomness comes from one ``random.Random(seed)``, including ids and
+timestamps, so the same seed and sizes always produce the same dataset and
+perf numbers stay comparable between runs and machines. Documents are
+generated in one pass and loaded with parallel, chunked, unordered
+insert_many calls; indexes are built after the load.
+
+Usage (from the backend directory):
+
+    # Full size: ~50k schools, 100k nominations, 5M tokens, 3M votes
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/synthetic_data.py --db perf_karnataka
+
+    # A 1% sample for a quick local run
+    python benchmarks/synthetic_data.py --db perf_small --scale 0.01 --drop
+
+Every school, admin and evaluator account uses the password printed at the end.
+"""
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Set, Tuple
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import database
+from database import get_collection, COLLECTIONS
+from models import (
+    SchoolUser, AdminUser, EvaluatorUser, DrawingParticipant, Winner, TeacherNomination,
+    VotingToken, Vote, CompetitionLevel, DrawingCategory, TeacherAwardCategory, NominationStatus
+)
+from progression import NEXT_LEVEL, bracket_label
+from token_format import voting_token_from_bytes
+from auth import get_password_hash
+
+PASSWORD = "synthetic-password"
+ADMIN_EMAIL = "synthetic-admin@example.com"
+# Fixed epoch for every generated timestamp
+BASE_TIME = datetime(2025, 1, 6, 9, 0, 0)
+REGISTRATION_DAYS = 45
+VOTING_START = BASE_TIME + timedelta(days=60)
+VOTING_DAYS = 21
+
+# Top entries per bracket that advance, as in the competition rules
+ADVANCING_PER_BRACKET = 3
+SCHOOL_COMPLETED_SHARE = 0.8
+SCORED_NOMINATION_SHARE = 0.3
+REJECTED_NOMINATION_SHARE = 0.02
+EVALUATORS = 50
+
+KARNATAKA_TALUKS = {
+    "Bagalkot": ["Badami", "Bagalkot", "Bilagi", "Guledgudda", "Hunagund", "Ilkal", "Jamkhandi", "Mudhol",
+                 "Rabkavi Banhatti"],
+    "Ballari": ["Ballari", "Hadagali", "Hagaribommanahalli", "Harapanahalli", "Hosapete", "Kampli", "Kotturu",
+                "Kudligi", "Kurugodu", "Sanduru", "Siruguppa"],
+    "Belagavi": ["Athani", "Bailhongal", "Belagavi", "Chikkodi", "Gokak", "Hukkeri", "Khanapur", "Kittur",
+                 "Mudalagi", "Nippani", "Ramdurg", "Raybag", "Savadatti"],
+    "Bengaluru Rural": ["Devanahalli", "Doddaballapur", "Hoskote", "Nelamangala"],
+    "Bengaluru Urban": ["Anekal", "Bangalore East", "Bangalore North", "Bangalore South", "Yelahanka"],
+    "Bidar": ["Aurad", "Basavakalyan", "Bhalki", "Bidar", "Chitguppa", "Hulsoor", "Humnabad", "Kamalnagar"],
+    "Chamarajanagar": ["Chamarajanagar", "Gundlupet", "Hanur", "Kollegal", "Yelandur"],
+    "Chikballapur": ["Bagepalli", "Chikballapur", "Chintamani", "Gauribidanur", "Gudibande", "Sidlaghatta"],
+    "Chikkamagaluru": ["Ajjampura", "Chikkamagaluru", "Kadur", "Koppa", "Mudigere", "Narasimharajapura",
+                       "Sringeri", "Tarikere"],
+    "Chitradurga": ["Challakere", "Chitradurga", "Hiriyur", "Holalkere", "Hosadurga", "Molakalmuru"],
+    "Dakshina Kannada": ["Bantwal", "Belthangady", "Kadaba", "Mangaluru", "Moodbidri", "Mulki", "Puttur",
+                         "Sullia", "Ullal"],
+    "Davangere": ["Channagiri", "Davangere", "Harihar", "Honnali", "Jagalur", "Nyamathi"],
+    "Dharwad": ["Alnavar", "Annigeri", "Dharwad", "Hubli", "Kalghatgi", "Kundgol", "Navalgund"],
+    "Gadag": ["Gadag", "Gajendragad", "Lakshmeshwar", "Mundargi", "Nargund", "Ron", "Shirahatti"],
+    "Hassan": ["Alur", "Arakalagudu", "Arsikere", "Belur", "Channarayapatna", "Hassan", "Holenarasipur",
+               "Sakleshpur"],
+    "Haveri": ["Byadgi", "Hanagal", "Haveri", "Hirekerur", "Rani Bennur", "Rattihalli", "Savanur", "Shiggaon"],
+    "Kalaburagi": ["Afzalpur", "Aland", "Chincholi", "Chitapur", "Jevargi", "Kalaburagi", "Kalagi",
+                   "Kamalapur", "Sedam", "Shahabad", "Yadrami"],
+    "Kodagu": ["Kushalnagar", "Madikeri", "Ponnampet", "Somwarpet", "Virajpet"],
+    "Kolar": ["Bangarapet", "KGF", "Kolar", "Malur", "Mulbagal", "Srinivaspur"],
+    "Koppal": ["Gangavathi", "Kanakagiri", "Karatagi", "Koppal", "Kukanoor", "Kushtagi", "Yelburga"],
+    "Mandya": ["Krishnarajapete", "Maddur", "Malavalli", "Mandya", "Nagamangala", "Pandavapura",
+               "Srirangapatna"],
+    "Mysuru": ["Heggadadevanakote", "Hunsur", "Krishnarajanagara", "Mysuru", "Nanjangud", "Periyapatna",
+               "Saligrama", "Sargur", "T. Narasipura"],
+    "Raichur": ["Devadurga", "Lingasugur", "Manvi", "Maski", "Raichur", "Sindhanur", "Sirwar"],
+    "Ramanagara": ["Channapatna", "Harohalli", "Kanakapura", "Magadi", "Ramanagara"],
+    "Shivamogga": ["Bhadravati", "Hosanagara", "Sagara", "Shikaripura", "Shivamogga", "Soraba", "Thirthahalli"],
+    "Tumakuru": ["Chikkanayakanahalli", "Gubbi", "Koratagere", "Kunigal", "Madhugiri", "Pavagada", "Sira",
+                 "Tiptur", "Tumakuru", "Turuvekere"],
+    "Udupi": ["Brahmavar", "Byndoor", "Hebri", "Kapu", "Karkala", "Kundapura", "Udupi"],
+    "Uttara Kannada": ["Ankola", "Bhatkal", "Dandeli", "Haliyal", "Honnavar", "Joida", "Karwar", "Kumta",
+                       "Mundgod", "Siddapur", "Sirsi", "Yellapur"],
+    "Vijayapura": ["Babaleshwar", "Basavana Bagewadi", "Chadachan", "Devara Hipparagi", "Indi", "Kolhar",
+                   "Muddebihal", "Nidagundi", "Sindagi", "Talikote", "Tikota", "Vijayapura"],
+    "Yadgir": ["Gurmitkal", "Hunasagi", "Shahapur", "Shorapur", "Vadagera", "Yadgir"],
+}
+
+AWARD_TYPES = {
+    TeacherAwardCategory.LIFETIME_EXCELLENCE: ["shikshan-ratna", "guru-vandana-puraskar", "shikshan-sadhak"],
+    TeacherAwardCategory.INSPIRATIONAL_TEACHING: ["shikshan-jyoti", "shikshan-prerana", "shikshan-bandhu"],
+    TeacherAwardCategory.ACADEMIC_EXCELLENCE: ["shikshan-samrat", "shikshan-parangat", "adarsha-shikshaka"],
+    TeacherAwardCategory.INNOVATION_GROWTH: ["shikshan-abhivardhan", "shikshan-chaitanya", "shikshan-vibhuti"],
+    TeacherAwardCategory.SOCIAL_CONTRIBUTION: ["shikshan-bhaskar", "shikshan-deepa", "shikshan-sevak"],
+}
+SUBJECTS = ["Kannada", "English", "Hindi", "Mathematics", "Science", "Social Science", "Art", "Physical Education"]
+POSITIONS = ["Assistant Teacher", "Senior Teacher", "Head Teacher", "Principal"]
+THEMES = ["My Village", "Festivals of Karnataka", "Save Water", "Future City", "Wildlife", "My School"]
+FIRST_NAMES = ["Anitha", "Basavaraj", "Chandrakala", "Deepak", "Geetha", "Harish", "Kavitha", "Manjunath",
+               "Nagaraj", "Pushpa", "Ravi", "Savitha", "Shivakumar", "Suma", "Venkatesh", "Yashoda"]
+LAST_NAMES = ["Gowda", "Hegde", "Kulkarni", "Naik", "Patil", "Rao", "Shetty", "Swamy"]
+GRADES_BY_CATEGORY = {
+    DrawingCategory.PRE_SCHOOL: ["LKG", "UKG"],
+    DrawingCategory.JUNIOR_ARTISTS: ["1", "2", "3"],
+    DrawingCategory.YOUNG_CREATORS: ["4", "5", "6"],
+    DrawingCategory.ASPIRING_INNOVATORS: ["7", "8"],
+    DrawingCategory.MASTER_VISIONARIES: ["9", "10"],
+}
+
+class Generator:
+    """Deterministic document factory; every value is drawn from one seeded RNG"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def timestamp(self, start: datetime, days: int) -> datetime:
+        # Whole milliseconds, the precision BSON stores
+        return start + timedelta(milliseconds=self.rng.randrange(days * 86_400_000))
+
+    def person(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def phone(self) -> str:
+        return f"9{self.rng.randrange(10 ** 9):09d}"
+
+    def ip_address(self) -> str:
+        return f"10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}"
+
+    def base(self, start: datetime = BASE_TIME, days: int = REGISTRATION_DAYS) -> dict:
+        created_at = self.timestamp(start, days)
+        return {"id": self.uuid(), "created_at": created_at, "updated_at": created_at}
+
+def sizes(args) -> dict:
+    scaled = {
+        "schools": args.schools,
+        "nominations": args.nominations,
+        "tokens": args.tokens,
+        "votes": args.votes
+    }
+    scaled = {name: max(1, int(count * args.scale)) for name, count in scaled.items()}
+    if scaled["votes"] > scaled["tokens"]:
+        raise SystemExit("Every vote uses its own token: --votes must not exceed --tokens")
+    return scaled
+
+def generate_schools(gen: Generator, count: int, password_hash: str) -> List[dict]:
+    taluks = [(district, taluk) for district, names in KARNATAKA_TALUKS.items() for taluk in names]
+    # Uneven weights so some taluks are much denser than others, as in reality
+    weights = [gen.rng.lognormvariate(0, 0.6) for _ in taluks]
+    locations = gen.rng.choices(taluks, weights=weights, k=count)
+
+    schools = []
+    for index, (district, taluk) in enumerate(locations):
+        schools.append(SchoolUser(
+            **gen.base(),
+            school_name=f"Government School {taluk} {index:05d}",
+            authorized_person_name=gen.person(),
+            email=f"school-{index:05d}@synthetic.example.com",
+            password_hash=password_hash,
+            phone=gen.phone(),
+            address=f"{index % 300 + 1} Main Road, {taluk}, {district}",
+            district=district,
+            taluk=taluk,
+            udise_code=f"29{index:09d}",
+            principal_name=gen.person(),
+            email_verified=gen.rng.random() < 0.9
+        ).dict())
+    return schools
+
+def _winners(gen: Generator, category: DrawingCategory, advancing: int) -> List[dict]:
+    return [Winner(
+        name=gen.person(),
+        grade=gen.rng.choice(GRADES_BY_CATEGORY[category]),
+        age=gen.rng.randint(4, 16),
+        theme=gen.rng.choice(THEMES),
+        position=position,
+        advances_to_next=position <= advancing,
+        student_id=gen.uuid()
+    ).dict() for position in range(1, 4)]
+
+def generate_participants(gen: Generator, schools: List[dict]) -> Iterator[dict]:
+    """School-level registrations for every school and category, then each higher level.
+
+    At school level every completed entry sends 1-3 winners on. Above it,
+    ADVANCING_PER_BRACKET entries per bracket and category send one winner
+    on, and next-level entries carry the bracket and participant count the
+    progression engine would write.
+    """
+    locations = {school["id"]: school for school in schools}
+    # (school_id, category) -> winners advancing from the current level
+    advancing: Dict[tuple, int] = {}
+
+    for school in schools:
+        for category in DrawingCategory:
+            completed = gen.rng.random() < SCHOOL_COMPLETED_SHARE
+            sending = gen.rng.randint(1, 3) if completed else 0
+            if sending:
+                advancing[(school["id"], category)] = sending
+            yield DrawingParticipant(
+                **gen.base(),
+                school_id=school["id"],
+                category=category,
+                level=CompetitionLevel.SCHOOL,
+                participant_count=gen.rng.randint(5, 80),
+                winners=_winners(gen, category, sending) if completed else [],
+                submission_date=gen.timestamp(BASE_TIME, REGISTRATION_DAYS),
+                is_completed=completed
+            ).dict()
+
+    level = CompetitionLevel.SCHOOL
+    while level in NEXT_LEVEL:
+        next_level = NEXT_LEVEL[level]
+        brackets: Dict[tuple, List[tuple]] = {}
+        for (school_id, category), count in advancing.items():
+            bracket = bracket_label(next_level, locations[school_id])
+            brackets.setdefault((bracket, category), []).append((school_id, count))
+
+        advancing = {}
+        start = BASE_TIME + timedelta(days=REGISTRATION_DAYS * (list(NEXT_LEVEL).index(level) + 1))
+        for (bracket, category), entries in brackets.items():
+            completed = next_level in NEXT_LEVEL
+            chosen = set(gen.rng.sample(range(len(entries)), min(ADVANCING_PER_BRACKET, len(entries))))
+            for position, (school_id, count) in enumerate(entries):
+                sending = 1 if completed and position in chosen else 0
+                if sending:
+                    advancing[(school_id, category)] = sending
+                yield DrawingParticipant(
+                    **gen.base(start, REGISTRATION_DAYS),
+                    school_id=school_id,
+                    category=category,
+                    level=next_level,
+                    participant_count=count,
+                    winners=_winners(gen, category, sending) if sending else [],
+                    submission_date=gen.timestamp(start, REGISTRATION_DAYS),
+                    is_completed=bool(sending),
+                    from_previous_level=True,
+                    advanced_from=level,
+                    bracket=bracket
+                ).dict()
+        level = next_level
+
+def generate_evaluators(gen: Generator, admin_id: str, password_hash: str) -> List[dict]:
+    categories = [category.value for category in TeacherAwardCategory]
+    return [EvaluatorUser(
+        **gen.base(),
+        name=gen.person(),
+        email=f"evaluator-{index:03d}@synthetic.example.com",
+        password_hash=password_hash,
+        expertise=gen.rng.choice(SUBJECTS),
+        # Each category is covered by a fifth of the panel
+        assigned_categories=[categories[index % len(categories)]],
+        assigned_levels=[CompetitionLevel.STATE],
+        created_by=admin_id
+    ).dict() for index in range(EVALUATORS)]
+
+def vote_targets(gen: Generator, nomination_count: int, vote_count: int) -> Tuple[List[int], Set[int]]:
+    """Nomination index for each vote, and the rejected nominations that get none.
+
+    Popularity is heavy-tailed, as with real campaigns.
+    """
+    popularity = [gen.rng.paretovariate(1.2) for _ in range(nomination_count)]
+    rejected = {index for index in range(nomination_count) if gen.rng.random() < REJECTED_NOMINATION_SHARE}
+    for index in rejected:
+        popularity[index] = 0.0
+    if not any(popularity):
+        popularity = [1.0] * nomination_count
+    return gen.rng.choices(range(nomination_count), weights=popularity, k=vote_count), rejected
+
+def generate_nominations(gen: Generator, schools: List[dict], evaluators: List[dict],
+                         votes: List[int], rejected: Set[int]) -> Iterator[dict]:
+    evaluators_by_category: Dict[str, List[str]] = {}
+    for evaluator in evaluators:
+        evaluators_by_category.setdefault(evaluator["assigned_categories"][0], []).append(evaluator["id"])
+
+    for index in range(len(votes)):
+        category = gen.rng.choice(list(TeacherAwardCategory))
+        scores = {}
+        if gen.rng.random() < SCORED_NOMINATION_SHARE:
+            panel = evaluators_by_category[category.value]
+            for evaluator_id in gen.rng.sample(panel, min(len(panel), gen.rng.randint(1, 3))):
+                scores[evaluator_id] = gen.rng.randint(1, 10)
+        yield TeacherNomination(
+            **gen.base(),
+            school_id=gen.rng.choice(schools)["id"],
+            teacher_name=gen.person(),
+            category=category,
+            award_type=gen.rng.choice(AWARD_TYPES[category]),
+            email=f"teacher-{index:06d}@synthetic.example.com",
+            phone=gen.phone(),
+            experience_years=gen.rng.randint(1, 38),
+            current_position=gen.rng.choice(POSITIONS),
+            qualifications=gen.rng.choice(["B.Ed", "M.Ed", "M.A., B.Ed", "M.Sc., B.Ed", "D.Ed"]),
+            subjects_taught=gen.rng.sample(SUBJECTS, gen.rng.randint(1, 3)),
+            achievements=" ".join(gen.rng.choices(THEMES, k=40)),
+            nomination_letter=f"Nominated for outstanding service in {category.value.replace('-', ' ')}.",
+            public_votes=votes[index],
+            evaluator_scores=scores,
+            status=NominationStatus.REJECTED if index in rejected else NominationStatus.NOMINATED,
+            nomination_fee_paid=gen.rng.random() < 0.95
+        ).dict()
+
+def generate_tokens_and_votes(gen: Generator, token_count: int, nomination_ids: List[str],
+                              targets: List[int], chunk_size: int) -> Iterator[tuple]:
+    """Yield (tokens, votes) chunks; the first len(targets) tokens are spent.
+
+    Token bodies come from an odd-multiplier permutation of the 40-bit token
+    space, so they are unique without keeping millions of them in memory to
+    check for collisions.
+    """
+    multiplier = gen.rng.getrandbits(40) | 1
+    offset = gen.rng.getrandbits(40)
+    expires_at = VOTING_START + timedelta(days=VOTING_DAYS)
+
+    for start in range(0, token_count, chunk_size):
+        tokens, votes = [], []
+        for index in range(start, min(start + chunk_size, token_count)):
+            body = (index * multiplier + offset) % (1 << 40)
+            token = VotingToken(
+                **gen.base(VOTING_START - timedelta(days=14), 7),
+                token=voting_token_from_bytes(body.to_bytes(5, "big")),
+                expires_at=expires_at,
+                batch_label=f"SYN-{index // 10000:04d}"
+            ).dict()
+            if index < len(targets):
+                voted_at = gen.timestamp(VOTING_START, VOTING_DAYS)
+                ip_address = gen.ip_address()
+                nomination_id = nomination_ids[targets[index]]
+                votes.append(Vote(
+                    id=gen.uuid(),
+                    created_at=voted_at,
+                    updated_at=voted_at,
+                    token_id=token["id"],
+                    nomination_id=nomination_id,
+                    ip_address=ip_address,
+                    user_agent="Mozilla/5.0 (Linux; Android 13) Synthetic",
+                    voted_at=voted_at
+                ).dict())
+                token.update(is_used=True, nomination_id=nomination_id, voted_at=voted_at,
+                             ip_address=ip_address, updated_at=voted_at)
+            tokens.append(token)
+        yield tokens, votes
+
+class Loader:
+    """Chunked unordered insert_many calls with a bounded number in flight"""
+
+    def __init__(self, chunk_size: int, parallelism: int):
+        self.chunk_size = chunk_size
+        self.semaphore = asyncio.Semaphore(parallelism)
+        self.pending: set = set()
+        self.inserted: Dict[str, int] = {}
+
+    async def _insert(self, collection_key: str, docs: List[dict]):
+        try:
+            await get_collection(COLLECTIONS[collection_key]).insert_many(docs, ordered=False)
+            self.inserted[collection_key] = self.inserted.get(collection_key, 0) + len(docs)
+        finally:
+            self.semaphore.release()
+
+    async def submit(self, collection_key: str, docs: List[dict]):
+        """Queue one chunk, waiting while too many are in flight"""
+        if not docs:
+            return
+        await self.semaphore.acquire()
+        task = asyncio.create_task(self._insert(collection_key, docs))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+        # Surface a failed insert promptly instead of at the end
+        for done in [task for task in self.pending if task.done()]:
+            done.result()
+
+    async def load(self, collection_key: str, docs):
+        chunk = []
+        for doc in docs:
+            chunk.append(doc)
+            if len(chunk) >= self.chunk_size:
+                await self.submit(collection_key, chunk)
+                chunk = []
+        await self.submit(collection_key, chunk)
+
+    async def wait(self):
+        await asyncio.gather(*self.pending)
+
+async def generate(args, counts: dict) -> dict:
+    gen = Generator(args.seed)
+    loader = Loader(args.chunk_size, args.parallelism)
+    # One hash for every account; bcrypt salts are random, so it is the
+    # only value not reproduced by the seed
+    password_hash = get_password_hash(PASSWORD)
+
+    started = time.perf_counter()
+    schools = generate_schools(gen, counts["schools"], password_hash)
+    await loader.load("schools", schools)
+
+    admin = AdminUser(**gen.base(), name="Synthetic Admin", email=ADMIN_EMAIL, password_hash=password_hash).dict()
+    await loader.load("admins", [admin])
+    evaluators = generate_evaluators(gen, admin["id"], password_hash)
+    await loader.load("evaluators", evaluators)
+
+    await loader.load("drawing_participants", generate_participants(gen, schools))
+
+    targets, rejected = vote_targets(gen, counts["nominations"], counts["votes"])
+    votes_per_nomination = [0] * counts["nominations"]
+    for target in targets:
+        votes_per_nomination[target] += 1
+    nomination_ids = []
+
+    def track(nominations):
+        for nomination in nominations:
+            nomination_ids.append(nomination["id"])
+            yield nomination
+
+    await loader.load("teacher_nominations", track(
+        generate_nominations(gen, schools, evaluators, votes_per_nomination, rejected)
+    ))
+
+    for tokens, votes in generate_tokens_and_votes(gen, counts["tokens"], nomination_ids, targets, args.chunk_size):
+        await loader.submit("voting_tokens", tokens)
+        await loader.submit("votes", votes)
+
+    await loader.wait()
+    return {"inserted": loader.inserted, "elapsed_s": round(time.perf_counter() - started, 1)}
+
+async def main(args):
+    counts = sizes(args)
+    database.db.client = AsyncIOMotorClient(args.mongo)
+    database.db.database = database.db.client[args.db]
+    try:
+        existing = await database.db.database.list_collection_names()
+        if existing and not args.drop:
+            raise SystemExit(f"Database {args.db} is not empty; pass --drop to replace it")
+        await database.db.client.drop_database(args.db)
+
+        print(f"Generating into {args.db} with seed {args.seed}: " +
+              ", ".join(f"{count} {name}" for name, count in counts.items()))
+        summary = await generate(args, counts)
+
+        # Building indexes once over the loaded data is much faster than
+        # maintaining them through millions of inserts
+        started = time.perf_counter()
+        await database.ensure_indexes()
+        summary["index_build_s"] = round(time.perf_counter() - started, 1)
+
+        from stats import rebuild_stats
+        await rebuild_stats()
+    finally:
+        database.db.client.close()
+
+    for collection_key, inserted in sorted(summary["inserted"].items()):
+        print(f"{collection_key:<22} {inserted:>10}")
+    print(f"loaded in {summary['elapsed_s']}s, indexes built in {summary['index_build_s']}s")
+    print(f"password for every account: {PASSWORD} (admin: {ADMIN_EMAIL})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="perf_karnataka", help="database to fill (default perf_karnataka)")
+    parser.add_argument("--drop", action="store_true", help="replace the database if it already has data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every size below, e.g. 0.01")
+    parser.add_argument("--schools", type=int, default=50_000)
+    parser.add_argument("--nominations", type=int, default=100_000)
+    parser.add_argument("--tokens", type=int, default=5_000_000)
+    parser.add_argument("--votes", type=int, default=3_000_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--parallelism", type=int, default=4, help="insert_many calls in flight")
+    args = parser.parse_args()
+    # The app's modules log at INFO on import
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main(args))
@@ -0,0 +1,98 @@
+"""Verify that every query shape used by the routes is served by an index.
+
+Usage (from the backend directory):
+
+    python check_indexes.py
+
+Connects using MONGO_URL/DB_NAME, reconciles the index registry, runs
+explain() on each shape in QUERY_SHAPES and exits non-zero if any winning
+plan contains a COLLSCAN. Unfiltered counts and full exports are full scans
+by design and are not listed.
+"""
+from dotenv import load_dotenv
+from pathlib import Path
+from datetime import datetime
+import asyncio
+import sys
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import connect_to_mongo, close_mongo_connection, get_database, plan_stages, COLLECTIONS
+
+# (collection key, description, filter[, sort]) for every lookup the routes issue
+QUERY_SHAPES = [
+    ("schools", "login / registration by email", {"email": "school@example.com"}),
+    ("schools", "profile by id", {"id": "school-id"}),
+    ("schools", "batched enrichment", {"id": {"$in": ["school-a", "school-b"]}}),
+    ("schools", "participant import by UDISE code", {"udise_code": {"$in": ["29000000001"]}}),
+    ("schools", "active school count", {"is_active": True}),
+    ("admins", "login by email", {"email": "admin@example.com"}),
+    ("admins", "profile by id", {"id": "admin-id"}),
+    ("evaluators", "creation by email", {"email": "evaluator@example.com"}),
+    ("evaluators", "profile by id", {"id": "evaluator-id"}),
+    ("evaluators", "active evaluator count", {"is_active": True}),
+    ("drawing_participants", "registration by school/category/level",
+     {"school_id": "school-id", "category": "pre-school", "level": "school"}),
+    ("drawing_participants", "school participants", {"school_id": "school-id"}),
+    ("drawing_participants", "admin keyset page", {"created_at": {"$type": "date"}}, {"created_at": 1, "id": 1}),
+    ("drawing_participants", "admin page without created_at",
+     {"created_at": {"$not": {"$type": "date"}}, "id": {"$gt": "participant-id"}}, {"id": 1}),
+    ("drawing_participants", "level progression",
+     {"level": "school", "category": "pre-school", "winners.advances_to_next": True}),
+    ("drawing_participants", "stale next-level entries",
+     {"level": "taluk", "from_previous_level": True, "advanced_from": "school", "category": "pre-school"}),
+    ("teacher_nominations", "nomination by id", {"id": "nomination-id"}),
+    ("teacher_nominations", "school nominations", {"school_id": "school-id"}),
+    ("teacher_nominations", "admin keyset page", {"created_at": {"$type": "date"}}, {"created_at": 1, "id": 1}),
+    ("teacher_nominations", "admin page without created_at",
+     {"created_at": {"$not": {"$type": "date"}}, "id": {"$gt": "nomination-id"}}, {"id": 1}),
+    ("teacher_nominations", "ranking by category",
+     {"status": {"$in": ["nominated", "shortlisted", "winner"]}, "category": "lifetime-excellence"}),
+    ("teacher_nominations", "nominations open for voting",
+     {"status": {"$in": ["nominated", "shortlisted"]}}),
+    ("voting_tokens", "token validation", {"token": "ABCD1234"}),
+    ("voting_tokens", "token claim",
+     {"token": "ABCD1234", "is_used": False, "expires_at": {"$gt": datetime.utcnow()}}),
+    ("voting_tokens", "stale pending claims",
+     {"vote_pending": True, "voted_at": {"$lt": datetime.utcnow()}}),
+    ("votes", "votes for claimed tokens", {"token_id": {"$in": ["token-a", "token-b"]}}),
+    ("votes", "votes per nomination", {"nomination_id": "nomination-id"}),
+    ("votes", "vote by token", {"token_id": "token-id"}),
+    ("vote_counter_shards", "shard sums per nomination", {"nomination_id": {"$in": ["nomination-a", "nomination-b"]}}),
+]
+
+async def check_query_shapes() -> list:
+    """Return (collection, description, stages) for every shape that scans"""
+    database = get_database()
+    failures = []
+    
+    for key, description, query_filter, *sort in QUERY_SHAPES:
+        find = {"find": COLLECTIONS[key], "filter": query_filter}
+        if sort:
+            find["sort"] = sort[0]
+        explain = await database.command({"explain": find, "verbosity": "queryPlanner"})
+        stages = plan_stages(explain)
+        status = "FAIL" if "COLLSCAN" in stages else "ok"
+        print(f"[{status}] {key}: {description} -> {' > '.join(stages)}")
+        if "COLLSCAN" in stages:
+            failures.append((key, description, stages))
+    
+    return failures
+
+async def main() -> int:
+    await connect_to_mongo()
+    try:
+        failures = await check_query_shapes()
+    finally:
+        await close_mongo_connection()
+    
+    if failures:
+        print(f"{len(failures)} query shape(s) still do a COLLSCAN")
+        return 1
+    
+    print("All query shapes are index-backed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,25 +1,96 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from metrics import MongoCommandMetrics, MongoPoolMetrics
 from typing import Optional
+import asyncio
+import logging
 import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Connection pool settings; see the pymongo MongoClient docs for each option
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_MAX_CONNECTING = int(os.getenv("MONGO_MAX_CONNECTING", "4"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Comma-separated, in order of preference, e.g. "zstd,snappy,zlib"; zstd and
+# snappy need the zstandard / python-snappy packages
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     database: Optional[AsyncIOMotorDatabase] = None
+    pool_metrics: Optional[MongoPoolMetrics] = None
+    # Set once startup has finished; /api/health reports 503 otherwise
+    ready: bool = False
 
 db = Database()
 
-async def connect_to_mongo():
+def client_options() -> dict:
+    """MongoClient keyword arguments built from the MONGO_* settings"""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "maxConnecting": MONGO_MAX_CONNECTING,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+async def ping() -> float:
+    """Round-trip a ping to the server; returns the latency in milliseconds"""
+    started = time.perf_counter()
+    await db.client.admin.command("ping")
+    return (time.perf_counter() - started) * 1000
+
+async def warm_up_pool() -> float:
+    """Open min-pool connections up front so the first requests don't pay for them.
+
+    Concurrent pings each need their own connection, so MONGO_MIN_POOL_SIZE
+    of them leave that many connections open in the pool. Returns the
+    latency of a final ping over the warm pool.
+    """
+    started = time.perf_counter()
+    await asyncio.gather(*(ping() for _ in range(max(MONGO_MIN_POOL_SIZE, 1))))
+    latency_ms = await ping()
+    logger.info(
+        f"MongoDB pool warmed up in {(time.perf_counter() - started) * 1000:.0f}ms, "
+        f"ping {latency_ms:.1f}ms"
+    )
+    return latency_ms
+
+async def connect_to_mongo(event_listeners: Optional[list] = None):
     """Create database connection"""
     mongo_url = os.environ['MONGO_URL']
     db_name = os.environ.get('DB_NAME', 'ignite_inspire_karnataka')
     
-    db.client = AsyncIOMotorClient(mongo_url)
+    # Per-collection command timings and pool usage for /metrics
+    db.pool_metrics = MongoPoolMetrics()
+    db.client = AsyncIOMotorClient(
+        mongo_url,
+        event_listeners=[MongoCommandMetrics(), db.pool_metrics, *(event_listeners or [])],
+        **client_options()
+    )
     db.database = db.client[db_name]
     
+    # Fails startup if the server is unreachable within the selection timeout
+    await warm_up_pool()
     print(f"Connected to MongoDB: {db_name}")
+    
+    await ensure_indexes()
 
 async def close_mongo_connection():
     """Close database connection"""
+    db.ready = False
     if db.client:
         db.client.close()
         print("Disconnected from MongoDB")
@@ -42,5 +113,142 @@ COLLECTIONS = {
     "drawing_participants": "drawing_participants",
     "teacher_nominations": "teacher_nominations",
     "voting_tokens": "voting_tokens",
-    "votes": "votes"
-}
\ No newline at end of file
+    "votes": "votes",
+    "stats": "stats",
+    "jobs": "jobs",
+    "slow_queries": "slow_queries",
+    "vote_counter_shards": "vote_counter_shards",
+    "vote_rate_limits": "vote_rate_limits",
+    "locks": "locks"
+}
+
+# Index registry: collection key -> list of (keys, options). Every index is
+# named so ensure_indexes can tell which ones it manages.
+INDEXES = {
+    "schools": [
+        ([("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+        ([("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+        ([("district", ASCENDING), ("taluk", ASCENDING)], {"name": "district_taluk"}),
+        ([("is_active", ASCENDING)], {"name": "is_active"}),
+        ([("udise_code", ASCENDING)], {"name": "udise_code", "sparse": True}),
+    ],
+    "admins": [
+        ([("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+        ([("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+    ],
+    "evaluators": [
+        ([("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+        ([("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+        ([("is_active", ASCENDING)], {"name": "is_active"}),
+    ],
+    "drawing_participants": [
+        ([("school_id", ASCENDING), ("category", ASCENDING), ("level", ASCENDING)],
+         {"name": "school_category_level_unique", "unique": True}),
+        ([("created_at", ASCENDING), ("id", ASCENDING)], {"name": "created_at_id"}),
+        ([("level", ASCENDING), ("category", ASCENDING), ("bracket", ASCENDING)],
+         {"name": "level_category_bracket"}),
+        ([("level", ASCENDING), ("advanced_from", ASCENDING), ("category", ASCENDING)],
+         {"name": "level_advanced_from_category"}),
+        # Pages through documents without a datetime created_at
+        ([("id", ASCENDING)], {"name": "id"}),
+    ],
+    "teacher_nominations": [
+        ([("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+        ([("school_id", ASCENDING)], {"name": "school_id"}),
+        ([("status", ASCENDING), ("category", ASCENDING)], {"name": "status_category"}),
+        ([("created_at", ASCENDING), ("id", ASCENDING)], {"name": "created_at_id"}),
+    ],
+    "jobs": [
+        ([("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+        ([("created_at", ASCENDING)], {"name": "created_at"}),
+        ([("status", ASCENDING), ("heartbeat_at", ASCENDING)], {"name": "status_heartbeat"}),
+        ([("finished_at", ASCENDING)], {"name": "finished_at"}),
+    ],
+    "voting_tokens": [
+        ([("token", ASCENDING)], {"name": "token_unique", "unique": True}),
+        ([("voted_at", ASCENDING)],
+         {"name": "pending_claims", "partialFilterExpression": {"vote_pending": True}}),
+    ],
+    "votes": [
+        ([("nomination_id", ASCENDING)], {"name": "nomination_id"}),
+        ([("token_id", ASCENDING)], {"name": "token_id_unique", "unique": True}),
+    ],
+    "vote_counter_shards": [
+        ([("nomination_id", ASCENDING)], {"name": "nomination_id"}),
+    ],
+    "vote_rate_limits": [
+        ([("expires_at", ASCENDING)], {"name": "expires_at_ttl", "expireAfterSeconds": 0}),
+    ],
+}
+
+# Marks indexes created by ensure_indexes, so manually created ones are
+# never dropped during reconciliation
+MANAGED_INDEX_PREFIX = "ii_"
+# index_information() fields that are not index options
+INDEX_INFO_FIELDS = {"key", "v", "ns", "name", "background"}
+
+def index_matches(info: dict, keys: list, options: dict) -> bool:
+    """Whether an index_information() entry has the registered keys and options"""
+    if [(field, direction) for field, direction in info["key"]] != list(keys):
+        return False
+    current = {option: value for option, value in info.items() if option not in INDEX_INFO_FIELDS}
+    wanted = {option: value for option, value in options.items() if option != "name"}
+    # Boolean options only show up in index_information() when set
+    current = {option: value for option, value in current.items() if value is not False}
+    wanted = {option: value for option, value in wanted.items() if value is not False}
+    return current == wanted
+
+async def ensure_indexes():
+    """Create registered indexes and drop managed ones no longer registered.
+
+    A managed index whose keys or options no longer match the registry is
+    dropped and created again.
+    """
+    database = get_database()
+    
+    for key, specs in INDEXES.items():
+        collection = database[COLLECTIONS[key]]
+        wanted = {}
+        for keys, options in specs:
+            options = {**options, "name": MANAGED_INDEX_PREFIX + options["name"]}
+            wanted[options["name"]] = (keys, options)
+        
+        existing = await collection.index_information()
+        
+        for name in existing:
+            if name.startswith(MANAGED_INDEX_PREFIX) and name not in wanted:
+                await collection.drop_index(name)
+                logger.info(f"Dropped stale index {key}.{name}")
+        
+        for name, (keys, options) in wanted.items():
+            if name in existing:
+                if index_matches(existing[name], keys, options):
+                    continue
+                await collection.drop_index(name)
+                logger.info(f"Dropped changed index {key}.{name}")
+            model = IndexModel(keys, **options)
+            try:
+                await collection.create_indexes([model])
+                logger.info(f"Created index {key}.{name}")
+            except OperationFailure as e:
+                # e.g. duplicate values blocking a unique index; keep starting up
+                logger.error(f"Failed to create index {key}.{name}: {str(e)}")
+
+def plan_stages(explain_result: dict) -> list:
+    """List every stage in the winning plan(s) of an explain() result"""
+    stages = []
+    
+    def walk(node, in_plan):
+        if isinstance(node, dict):
+            if in_plan and "stage" in node:
+                stages.append(node["stage"])
+            for name, value in node.items():
+                walk(value, in_plan or name == "winningPlan")
+        elif isinstance(node, list):
+            for value in node:
+                walk(value, in_plan)
+    
+    # find() puts queryPlanner at the top level; aggregate() may nest it
+    # under its $cursor stage
+    walk(explain_result, False)
+    return stages
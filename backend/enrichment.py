@@ -0,0 +1,41 @@
+from database import get_collection, COLLECTIONS
+from typing import Dict, Iterable, List
+
+# School fields attached to list responses, with fallbacks for orphaned rows
+SCHOOL_FIELD_DEFAULTS = {
+    "school_name": "Unknown School",
+    "district": "Unknown District",
+    "taluk": "Unknown Taluk"
+}
+
+async def fetch_schools(school_ids: Iterable[str]) -> Dict[str, dict]:
+    """Resolve distinct school ids to their location fields in one $in query"""
+    distinct_ids = list({school_id for school_id in school_ids if school_id})
+    if not distinct_ids:
+        return {}
+    
+    schools_collection = get_collection(COLLECTIONS["schools"])
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in SCHOOL_FIELD_DEFAULTS}}
+    cursor = schools_collection.find({"id": {"$in": distinct_ids}}, projection)
+    
+    return {school["id"]: school async for school in cursor}
+
+def school_info(schools: Dict[str, dict], school_id: str) -> dict:
+    """School fields for one row, falling back to the 'Unknown' placeholders"""
+    school = schools.get(school_id) or {}
+    return {
+        field: school.get(field, default)
+        for field, default in SCHOOL_FIELD_DEFAULTS.items()
+    }
+
+async def enrich_with_schools(documents: List[dict]) -> List[dict]:
+    """Attach school_name, district and taluk to each document"""
+    schools = await fetch_schools(doc.get("school_id") for doc in documents)
+    
+    enriched = []
+    for doc in documents:
+        info = {**doc, **school_info(schools, doc.get("school_id"))}
+        info.pop("_id", None)
+        enriched.append(info)
+    
+    return enriched
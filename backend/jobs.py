@@ -0,0 +1,277 @@
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo import DESCENDING
+from models import Job, JobStatus
+from database import get_database, get_collection, COLLECTIONS
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Union
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+# Jobs whose owning process stopped heartbeating are failed on startup
+JOB_STALE_AFTER_S = int(os.getenv("JOB_STALE_AFTER_S", "300"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+HEARTBEAT_INTERVAL_S = 30
+PROGRESS_WRITE_INTERVAL_S = 1.0
+ARTIFACT_BUCKET = "job_artifacts"
+
+JobHandler = Callable[..., Awaitable[Optional[dict]]]
+
+def _artifact_bucket() -> AsyncIOMotorGridFSBucket:
+    return AsyncIOMotorGridFSBucket(get_database(), bucket_name=ARTIFACT_BUCKET)
+
+class JobContext:
+    """Handed to a job handler for progress reporting and artifact output"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._last_progress_write = 0.0
+
+    async def progress(self, done: int, total: Optional[int] = None, force: bool = False):
+        """Record progress, written at most once per PROGRESS_WRITE_INTERVAL_S"""
+        now = time.monotonic()
+        if not force and now - self._last_progress_write < PROGRESS_WRITE_INTERVAL_S:
+            return
+        self._last_progress_write = now
+
+        update = {"progress_done": done}
+        if total is not None:
+            update["progress_total"] = total
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        await jobs_collection.update_one({"id": self.job_id}, {"$set": update})
+
+    async def save_artifact(self, filename: str, chunks: AsyncIterator[Union[bytes, str]],
+                            content_type: str = "application/octet-stream"):
+        """Stream output into GridFS and attach it to the job"""
+        grid_in = _artifact_bucket().open_upload_stream(
+            filename, metadata={"job_id": self.job_id, "content_type": content_type}
+        )
+        try:
+            async for chunk in chunks:
+                await grid_in.write(chunk.encode() if isinstance(chunk, str) else chunk)
+        except BaseException:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        await jobs_collection.update_one({"id": self.job_id}, {"$set": {
+            "artifact_id": grid_in._id,
+            "artifact_filename": filename,
+            "artifact_content_type": content_type
+        }})
+
+class JobRunner:
+    """Runs registered job kinds on a fixed number of asyncio workers.
+
+    Jobs are recorded in the ``jobs`` collection so any process can report
+    their status, but each job runs in the process that accepted it.
+    """
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, max_queued: int = JOB_MAX_QUEUED):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._owned: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, kind: str):
+        """Decorator registering ``async def handler(job: JobContext, **params)``"""
+        def decorator(handler: JobHandler) -> JobHandler:
+            self._handlers[kind] = handler
+            return handler
+        return decorator
+
+    async def submit(self, kind: str, params: Optional[dict] = None, created_by: Optional[str] = None) -> dict:
+        """Record a job and queue it for this process's workers"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job runner is not started")
+        if self._queue.qsize() >= self.max_queued:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many queued jobs, please try again shortly"
+            )
+
+        job = Job(kind=kind, params=params or {}, created_by=created_by).dict()
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        await jobs_collection.insert_one(job)
+        job.pop("_id", None)
+
+        self._owned.add(job["id"])
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        return await jobs_collection.find_one({"id": job_id}, {"_id": 0})
+
+    async def recent(self, limit: int = 50) -> List[dict]:
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        cursor = jobs_collection.find({}, {"_id": 0}).sort("created_at", DESCENDING).limit(limit)
+        return await cursor.to_list(limit)
+
+    async def open_artifact(self, job: dict) -> AsyncIterator[bytes]:
+        """Stream a finished job's artifact out of GridFS chunk by chunk"""
+        grid_out = await _artifact_bucket().open_download_stream(job["artifact_id"])
+
+        async def chunks():
+            while True:
+                chunk = await grid_out.readchunk()
+                if not chunk:
+                    break
+                yield chunk
+
+        return chunks()
+
+    async def _finish(self, job_id: str, job_status: JobStatus, **fields):
+        now = datetime.utcnow()
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        await jobs_collection.update_one({"id": job_id}, {"$set": {
+            "status": job_status.value,
+            "finished_at": now,
+            "updated_at": now,
+            **fields
+        }})
+
+    async def _run_job(self, job_id: str):
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        now = datetime.utcnow()
+        job = await jobs_collection.find_one_and_update(
+            {"id": job_id, "status": JobStatus.QUEUED.value},
+            {"$set": {"status": JobStatus.RUNNING.value, "started_at": now, "heartbeat_at": now}},
+            projection={"_id": 0, "kind": 1, "params": 1}
+        )
+        if not job:
+            # Failed by stale-job recovery while it waited in the queue
+            return
+
+        started = time.perf_counter()
+        try:
+            result = await self._handlers[job["kind"]](JobContext(job_id), **job["params"])
+            # Inside the try: a result that cannot be stored fails the job
+            # instead of leaving it running
+            await self._finish(job_id, JobStatus.SUCCEEDED, result=result)
+        except asyncio.CancelledError:
+            await self._finish(job_id, JobStatus.FAILED, error="Interrupted by shutdown")
+            raise
+        except Exception as e:
+            logger.error(f"Job {job['kind']} {job_id} failed: {str(e)}")
+            await self._finish(job_id, JobStatus.FAILED, error=str(e))
+        else:
+            logger.info(f"Job {job['kind']} {job_id} finished in {time.perf_counter() - started:.1f}s")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job runner error: {str(e)}")
+            finally:
+                self._owned.discard(job_id)
+
+    async def _heartbeat(self):
+        """Keep this process's queued and running jobs from looking stale"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL_S)
+            if not self._owned:
+                continue
+            try:
+                jobs_collection = get_collection(COLLECTIONS["jobs"])
+                await jobs_collection.update_many(
+                    {"id": {"$in": list(self._owned)}},
+                    {"$set": {"heartbeat_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.error(f"Job heartbeat error: {str(e)}")
+
+    async def recover(self) -> int:
+        """Fail jobs left queued or running by a process that went away"""
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        now = datetime.utcnow()
+        result = await jobs_collection.update_many(
+            {
+                "status": {"$in": [JobStatus.QUEUED.value, JobStatus.RUNNING.value]},
+                "heartbeat_at": {"$lt": now - timedelta(seconds=JOB_STALE_AFTER_S)}
+            },
+            {"$set": {
+                "status": JobStatus.FAILED.value,
+                "error": "Interrupted: the worker running this job stopped",
+                "finished_at": now,
+                "updated_at": now
+            }}
+        )
+        if result.modified_count:
+            logger.warning(f"Marked {result.modified_count} stale jobs as failed")
+        return result.modified_count
+
+    async def prune(self) -> int:
+        """Delete finished jobs (and their artifacts) past the retention period"""
+        jobs_collection = get_collection(COLLECTIONS["jobs"])
+        cutoff = datetime.utcnow() - timedelta(days=JOB_RETENTION_DAYS)
+        expired = await jobs_collection.find(
+            {"finished_at": {"$lt": cutoff}}, {"_id": 0, "id": 1, "artifact_id": 1}
+        ).to_list(None)
+        if not expired:
+            return 0
+
+        artifact_ids = [job["artifact_id"] for job in expired if job.get("artifact_id")]
+        if artifact_ids:
+            bucket = _artifact_bucket()
+            for artifact_id in artifact_ids:
+                try:
+                    await bucket.delete(artifact_id)
+                except Exception as e:
+                    logger.error(f"Job artifact delete error: {str(e)}")
+
+        await jobs_collection.delete_many({"id": {"$in": [job["id"] for job in expired]}})
+        return len(expired)
+
+    async def start(self):
+        """Recover stale jobs, prune old ones and start the workers"""
+        if self._tasks:
+            return
+        try:
+            await self.recover()
+            await self.prune()
+        except Exception as e:
+            logger.error(f"Job maintenance error: {str(e)}")
+
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        """Cancel running jobs and fail the ones still queued"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._owned:
+            now = datetime.utcnow()
+            jobs_collection = get_collection(COLLECTIONS["jobs"])
+            await jobs_collection.update_many(
+                {"id": {"$in": list(self._owned)}, "status": JobStatus.QUEUED.value},
+                {"$set": {
+                    "status": JobStatus.FAILED.value,
+                    "error": "Interrupted by shutdown",
+                    "finished_at": now,
+                    "updated_at": now
+                }}
+            )
+            self._owned.clear()
+        self._queue = None
+
+job_runner = JobRunner()
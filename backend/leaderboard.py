@@ -0,0 +1,142 @@
+from database import get_collection, COLLECTIONS
+from vote_aggregator import vote_aggregator
+from sharded_counters import vote_counter
+from typing import Dict, Optional, Set
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_INTERVAL_MS = int(os.getenv("LEADERBOARD_BROADCAST_INTERVAL_MS", "1000"))
+RESEED_INTERVAL_S = int(os.getenv("LEADERBOARD_RESEED_INTERVAL_S", "30"))
+SUBSCRIBER_QUEUE_SIZE = 10
+VOTABLE_STATUSES = ["nominated", "shortlisted"]
+
+class LeaderboardTally:
+    """Per-process, category-keyed vote tally for live leaderboard pushes.
+
+    Votes cast in this process are applied immediately; votes from other
+    workers arrive through a periodic reseed from Mongo. Changes are
+    coalesced and broadcast to subscribers at most once per interval; a
+    null count means the nomination left the leaderboard.
+    """
+
+    def __init__(self, broadcast_interval_ms: int = BROADCAST_INTERVAL_MS):
+        self.broadcast_interval = broadcast_interval_ms / 1000
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._category_of: Dict[str, str] = {}
+        self._dirty: Dict[str, Set[str]] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def _set(self, category: str, nomination_id: str, votes: int):
+        category_counts = self._counts.setdefault(category, {})
+        if category_counts.get(nomination_id) != votes:
+            category_counts[nomination_id] = votes
+            self._dirty.setdefault(category, set()).add(nomination_id)
+        self._category_of[nomination_id] = category
+
+    def _remove(self, category: str, nomination_id: str):
+        del self._counts[category][nomination_id]
+        if not self._counts[category]:
+            del self._counts[category]
+        self._dirty.setdefault(category, set()).add(nomination_id)
+
+    async def seed(self):
+        """Load current counts from Mongo, marking anything that changed.
+
+        Nominations no longer open for voting, or moved to another
+        category, are dropped from where they were.
+        """
+        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+        # One pass over every shard beats a cached lookup per nomination here
+        shard_sums = await vote_counter.all_shard_sums()
+        cursor = nominations_collection.find(
+            {"status": {"$in": VOTABLE_STATUSES}},
+            {"_id": 0, "id": 1, "category": 1, "public_votes": 1}
+        )
+        seeded: Dict[str, str] = {}
+        async for nomination in cursor:
+            # Votes cast here but not yet flushed are not in Mongo yet
+            votes = (nomination.get("public_votes", 0) + shard_sums.get(nomination["id"], 0)
+                     + vote_aggregator.pending(nomination["id"]))
+            self._set(nomination["category"], nomination["id"], votes)
+            seeded[nomination["id"]] = nomination["category"]
+
+        for category, counts in list(self._counts.items()):
+            for nomination_id in [nomination_id for nomination_id in counts if seeded.get(nomination_id) != category]:
+                self._remove(category, nomination_id)
+        self._category_of = seeded
+
+    def record_vote(self, nomination_id: str, category: str, delta: int = 1):
+        """Apply a vote cast in this process"""
+        category = self._category_of.get(nomination_id, category)
+        current = self._counts.get(category, {}).get(nomination_id, 0)
+        self._set(category, nomination_id, current + delta)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Full tally for newly connected watchers"""
+        return {category: dict(counts) for category, counts in self._counts.items()}
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _broadcast(self):
+        if not self._dirty:
+            return
+
+        diff = {
+            category: {nomination_id: self._counts.get(category, {}).get(nomination_id) for nomination_id in nomination_ids}
+            for category, nomination_ids in self._dirty.items()
+        }
+        self._dirty = {}
+
+        # Serialize once per tick, not once per watcher
+        payload = json.dumps(diff)
+        for queue in self._subscribers:
+            if queue.full():
+                # Slow consumer: drop its oldest update rather than block
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def _run(self):
+        ticks_per_reseed = max(1, int(RESEED_INTERVAL_S / self.broadcast_interval))
+        tick = 0
+        while True:
+            await asyncio.sleep(self.broadcast_interval)
+            tick += 1
+            try:
+                if tick % ticks_per_reseed == 0:
+                    await self.seed()
+                self._broadcast()
+            except Exception as e:
+                logger.error(f"Leaderboard broadcast error: {str(e)}")
+
+    async def start(self):
+        """Seed from Mongo and start the broadcast loop"""
+        await self.seed()
+        self._dirty = {}
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+leaderboard = LeaderboardTally()
+
+def format_sse(event: str, data: str) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {data}\n\n"
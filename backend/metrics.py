@@ -0,0 +1,228 @@
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+)
+from pymongo import monitoring
+from pymongo.common import MAX_POOL_SIZE
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+from cache import TTLCache
+from typing import Dict, Optional, Tuple
+import os
+import threading
+import time
+
+# With several worker processes, point PROMETHEUS_MULTIPROC_DIR at a shared,
+# empty directory so /metrics aggregates every worker
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=HTTP_LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method", "route"],
+    multiprocess_mode="livesum"
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection",
+    ["collection", "command"],
+    buckets=MONGO_LATENCY_BUCKETS
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that returned an error",
+    ["collection", "command"]
+)
+
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections",
+    "Open connections in the driver's pool, per server",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongodb_pool_checked_out",
+    "Pool connections currently checked out by operations, per server",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "Connection checkouts that failed, e.g. on wait-queue timeout",
+    ["address", "reason"]
+)
+VOTE_RATE_LIMITED = Counter(
+    "vote_rate_limited_total",
+    "Votes rejected by the per-IP / per-subnet velocity limiter",
+    ["scope"]
+)
+
+UNMATCHED_ROUTE = "unmatched"
+# Raw paths seen recently, so hot URLs skip the scan over every route
+ROUTE_CACHE_SIZE = 10000
+ROUTE_CACHE_TTL_S = 3600
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request under its route template, not its raw path"""
+
+    def __init__(self, app: ASGIApp, routes: list):
+        self.app = app
+        self.routes = routes
+        self._templates = TTLCache(maxsize=ROUTE_CACHE_SIZE, ttl=ROUTE_CACHE_TTL_S)
+
+    def _route_template(self, scope: Scope) -> str:
+        key = (scope["method"], scope["path"])
+        template = self._templates.get(key)
+        if template is None:
+            template = self._match_route(scope)
+            self._templates.set(key, template)
+        return template
+
+    def _match_route(self, scope: Scope) -> str:
+        partial = None
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or UNMATCHED_ROUTE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(time.perf_counter() - started)
+            in_progress.dec()
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command the driver sends, per collection and command name"""
+
+    def __init__(self):
+        # Runs on driver threads; single dict operations are GIL-safe
+        self._pending: Dict[Tuple, Tuple[str, str]] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else ""
+        self._pending[(event.connection_id, event.request_id)] = (collection, event.command_name)
+
+    def succeeded(self, event):
+        labels = self._pending.pop((event.connection_id, event.request_id), None)
+        if labels:
+            MONGO_COMMAND_DURATION.labels(*labels).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        labels = self._pending.pop((event.connection_id, event.request_id), None)
+        if labels:
+            MONGO_COMMAND_DURATION.labels(*labels).observe(event.duration_micros / 1e6)
+            MONGO_COMMAND_FAILURES.labels(*labels).inc()
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Tracks open and checked-out connections per server for /metrics and /api/health"""
+
+    def __init__(self):
+        self.max_pool_size: Dict[str, Optional[int]] = {}
+        self.open: Dict[str, int] = {}
+        self.checked_out: Dict[str, int] = {}
+        # Updated on driver threads, read from copies taken under the lock
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def _add(self, counts: Dict[str, int], gauge: Gauge, address: str, delta: int):
+        with self._lock:
+            counts[address] = counts.get(address, 0) + delta
+        gauge.labels(address).inc(delta)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-server pool usage; utilization is checked out / max pool size"""
+        with self._lock:
+            max_pool_size, open_counts, checked_out = (
+                dict(self.max_pool_size), dict(self.open), dict(self.checked_out)
+            )
+        return {
+            address: {
+                "open": open_counts.get(address, 0),
+                "checked_out": checked_out.get(address, 0),
+                "max_pool_size": max_size,
+                "utilization": round(checked_out.get(address, 0) / max_size, 3) if max_size else None
+            }
+            for address, max_size in max_pool_size.items()
+        }
+
+    def pool_created(self, event):
+        # Only options that differ from the driver's defaults are reported
+        with self._lock:
+            self.max_pool_size[self._address(event)] = event.options.get("maxPoolSize", MAX_POOL_SIZE)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.max_pool_size.pop(self._address(event), None)
+
+    def connection_created(self, event):
+        self._add(self.open, MONGO_POOL_CONNECTIONS, self._address(event), 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(self.open, MONGO_POOL_CONNECTIONS, self._address(event), -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.labels(self._address(event), str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        self._add(self.checked_out, MONGO_POOL_CHECKED_OUT, self._address(event), 1)
+
+    def connection_checked_in(self, event):
+        self._add(self.checked_out, MONGO_POOL_CHECKED_OUT, self._address(event), -1)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition payload and content type for the /metrics endpoint"""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, model_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+from token_format import generate_voting_token
 import uuid
 
 # Enums for better type safety
@@ -36,6 +37,12 @@ class NominationStatus(str, Enum):
     WINNER = "winner"
     REJECTED = "rejected"
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 # Base Models
 class BaseDocument(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -99,6 +106,7 @@ class DrawingParticipant(BaseDocument):
     # Level progression tracking
     from_previous_level: bool = False
     advanced_from: Optional[CompetitionLevel] = None
+    bracket: Optional[str] = None  # Taluk / district grouping set by the progression engine
 
 # Teacher Award Models
 class TeacherNomination(BaseDocument):
@@ -125,6 +133,7 @@ class TeacherNomination(BaseDocument):
     evaluator_scores: Dict[str, int] = Field(default_factory=dict)  # evaluator_id: score
     status: NominationStatus = NominationStatus.NOMINATED
     final_score: Optional[float] = None
+    rank: Optional[int] = None  # Within category, set by the ranking engine
     
     # Nomination fees
     nomination_fee_paid: bool = False
@@ -132,12 +141,13 @@ class TeacherNomination(BaseDocument):
 
 # Voting System Models
 class VotingToken(BaseDocument):
-    token: str = Field(default_factory=lambda: str(uuid.uuid4())[:8].upper())
+    token: str = Field(default_factory=generate_voting_token)
     is_used: bool = False
     nomination_id: Optional[str] = None
     voted_at: Optional[datetime] = None
     ip_address: Optional[str] = None
     expires_at: datetime
+    batch_label: Optional[str] = None  # Print/distribution batch
     
 class Vote(BaseDocument):
     token_id: str
@@ -146,6 +156,27 @@ class Vote(BaseDocument):
     user_agent: Optional[str] = None
     voted_at: datetime = Field(default_factory=datetime.utcnow)
 
+# Background Job Models
+class Job(BaseDocument):
+    kind: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+    status: JobStatus = JobStatus.QUEUED
+    created_by: Optional[str] = None
+    
+    # Progress & outcome
+    progress_done: int = 0
+    progress_total: Optional[int] = None
+    heartbeat_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    
+    # Downloadable output stored in GridFS
+    artifact_id: Optional[Any] = None
+    artifact_filename: Optional[str] = None
+    artifact_content_type: Optional[str] = None
+
 # Request/Response Models
 class SchoolRegistrationRequest(BaseModel):
     school_name: str
@@ -175,6 +206,21 @@ class ParticipantRegistrationRequest(BaseModel):
     participants: Dict[DrawingCategory, int]  # category: count
     level: CompetitionLevel = CompetitionLevel.SCHOOL
 
+class ParticipantImportRow(BaseModel):
+    # School reference: any one of id, UDISE code or registered email
+    school_id: Optional[str] = None
+    udise_code: Optional[str] = None
+    email: Optional[str] = None
+    category: DrawingCategory
+    level: CompetitionLevel = CompetitionLevel.SCHOOL
+    participant_count: int = Field(ge=0)
+    
+    @model_validator(mode="after")
+    def check_school_reference(self):
+        if not (self.school_id or self.udise_code or self.email):
+            raise ValueError("one of school_id, udise_code or email is required")
+        return self
+
 class WinnerSubmissionRequest(BaseModel):
     category: DrawingCategory
     level: CompetitionLevel
@@ -0,0 +1,116 @@
+from fastapi import HTTPException, Request, status
+from pymongo import ASCENDING
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+import base64
+import json
+import orjson
+
+# Keyset order for admin list endpoints; backed by a (created_at, id) index
+KEYSET_SORT = [("created_at", ASCENDING), ("id", ASCENDING)]
+# Documents without a datetime created_at (legacy or hand-edited) follow
+# all the dated ones, in id order
+UNDATED_SORT = [("id", ASCENDING)]
+DATED = {"created_at": {"$type": "date"}}
+UNDATED = {"created_at": {"$not": {"$type": "date"}}}
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def encode_cursor(doc: dict) -> str:
+    """Opaque cursor pointing just past the given document"""
+    created_at = doc.get("created_at")
+    if not isinstance(created_at, datetime):
+        created_at = None
+    payload = json.dumps({"c": created_at.isoformat() if created_at else None, "i": doc["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """Decode a cursor produced by encode_cursor; created_at is None for undated documents"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = None if payload["c"] is None else datetime.fromisoformat(payload["c"])
+        if not isinstance(payload["i"], str):
+            raise TypeError("cursor id must be a string")
+        return created_at, payload["i"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def _and(*clauses: dict) -> dict:
+    clauses = [clause for clause in clauses if clause]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def keyset_query(query: dict, cursor: Optional[str]) -> List[Tuple[dict, list]]:
+    """(query, sort) pairs that together cover the documents after the cursor, in order"""
+    if not cursor:
+        return [(_and(query, DATED), KEYSET_SORT), (_and(query, UNDATED), UNDATED_SORT)]
+    
+    created_at, doc_id = decode_cursor(cursor)
+    if created_at is None:
+        return [(_and(query, UNDATED, {"id": {"$gt": doc_id}}), UNDATED_SORT)]
+    
+    after = {"$or": [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "id": {"$gt": doc_id}}
+    ]}
+    return [(_and(query, DATED, after), KEYSET_SORT), (_and(query, UNDATED), UNDATED_SORT)]
+
+async def fetch_page(collection, query: dict, limit: int, cursor: Optional[str] = None, projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one keyset page and the cursor for the next one (None at the end)"""
+    docs = []
+    for phase_query, sort in keyset_query(query, cursor):
+        remaining = limit + 1 - len(docs)
+        docs += await collection.find(
+            phase_query, projection
+        ).sort(sort).limit(remaining).to_list(remaining)
+        if len(docs) > limit:
+            break
+    
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    
+    return docs, None
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for a streamed NDJSON response"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def stream_ndjson(
+    collection,
+    query: dict,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+    transform: Optional[Callable[[List[dict]], Awaitable[List[dict]]]] = None
+) -> AsyncIterator[bytes]:
+    """Stream documents in keyset order as NDJSON lines, one batch at a time"""
+    # Build the query up front so a bad cursor fails before streaming starts
+    phases = keyset_query(query, cursor)
+    
+    async def lines():
+        batch = []
+        for phase_query, sort in phases:
+            docs = collection.find(phase_query, projection).sort(sort).batch_size(STREAM_BATCH_SIZE)
+            async for doc in docs:
+                batch.append(doc)
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    yield await _encode_batch(batch, transform)
+                    batch = []
+        
+        if batch:
+            yield await _encode_batch(batch, transform)
+    
+    return lines()
+
+async def _encode_batch(batch: List[dict], transform) -> bytes:
+    if transform is not None:
+        batch = await transform(batch)
+    lines = []
+    for doc in batch:
+        doc.pop("_id", None)
+        lines.append(orjson.dumps(doc, default=str))
+    return b"\n".join(lines) + b"\n"
@@ -0,0 +1,257 @@
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from starlette.concurrency import run_in_threadpool
+from models import DrawingParticipant, ParticipantImportRow
+from database import get_collection, COLLECTIONS
+from stats import record_registrations
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import codecs
+import csv
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+async def upsert_participant_counts(
+    entries: List[Tuple[str, str, str, int]],
+    fields: Optional[Dict[Tuple[str, str, str], dict]] = None,
+    report_failures: bool = False
+) -> List[dict]:
+    """Upsert (school_id, category, level, count) registrations in one bulk_write.
+
+    ``fields`` optionally maps a (school_id, category, level) key to extra
+    fields to set on that entry. Returns one ``{"school_id", "category",
+    "level", "count", "action"}`` result per distinct key, with action
+    "registered" or "updated". When a key repeats, the last entry wins.
+    Entries that fail to write raise BulkWriteError, or with
+    ``report_failures`` come back with action "failed" and an "error".
+    """
+    fields = fields or {}
+    latest: Dict[Tuple[str, str, str], int] = {}
+    for school_id, category, level, count in entries:
+        latest[(school_id, category, level)] = count
+
+    if not latest:
+        return []
+
+    participants_collection = get_collection(COLLECTIONS["drawing_participants"])
+    keys = list(latest)
+
+    # Current counts, so the stats counters get exact deltas
+    previous = {}
+    cursor = participants_collection.find(
+        {"$or": [
+            {"school_id": school_id, "category": category, "level": level}
+            for school_id, category, level in keys
+        ]},
+        {"_id": 0, "school_id": 1, "category": 1, "level": 1, "participant_count": 1}
+    )
+    async for doc in cursor:
+        previous[(doc["school_id"], doc["category"], doc["level"])] = doc.get("participant_count", 0)
+
+    now = datetime.utcnow()
+    operations = []
+    for school_id, category, level in keys:
+        extra = fields.get((school_id, category, level), {})
+        new_doc = DrawingParticipant(
+            school_id=school_id,
+            category=category,
+            level=level,
+            participant_count=latest[(school_id, category, level)],
+            **extra
+        ).dict()
+        set_fields = {
+            "participant_count": new_doc.pop("participant_count"),
+            "updated_at": now,
+            **{field: new_doc.pop(field) for field in extra}
+        }
+        new_doc.pop("updated_at")
+        for field in ("school_id", "category", "level"):
+            new_doc.pop(field)
+        operations.append(UpdateOne(
+            {"school_id": school_id, "category": category, "level": level},
+            {"$set": set_fields, "$setOnInsert": new_doc},
+            upsert=True
+        ))
+
+    failed: Dict[int, str] = {}
+    try:
+        result = await participants_collection.bulk_write(operations, ordered=False)
+        inserted = set(result.upserted_ids)
+    except BulkWriteError as e:
+        # Unordered, so every operation without a write error was applied
+        if not report_failures:
+            raise
+        inserted = {upsert["index"] for upsert in e.details.get("upserted", [])}
+        failed = {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+
+    results = []
+    stat_changes = []
+    for index, (school_id, category, level) in enumerate(keys):
+        count = latest[(school_id, category, level)]
+        if index in failed:
+            results.append({
+                "school_id": school_id,
+                "category": category,
+                "level": level,
+                "count": count,
+                "action": "failed",
+                "error": failed[index]
+            })
+            continue
+        created = index in inserted
+        results.append({
+            "school_id": school_id,
+            "category": category,
+            "level": level,
+            "count": count,
+            "action": "registered" if created else "updated"
+        })
+        stat_changes.append({
+            "school_id": school_id,
+            "level": level,
+            "category": category,
+            "delta": count - previous.get((school_id, category, level), 0),
+            "created": created
+        })
+
+    await record_registrations(stat_changes)
+    return results
+
+def read_csv_rows(file) -> Iterator[dict]:
+    """Stream rows of an uploaded CSV file as dicts"""
+    reader = csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+    for row in reader:
+        yield {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+
+def read_xlsx_rows(file) -> Iterator[dict]:
+    """Stream rows of an uploaded XLSX file (first sheet) as dicts"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip().lower() if cell is not None else "" for cell in next(rows, [])]
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            yield {
+                key: "" if value is None else str(value).strip()
+                for key, value in zip(header, values) if key
+            }
+    finally:
+        workbook.close()
+
+async def _resolve_school_ids(rows: List[ParticipantImportRow]) -> Dict[Tuple[str, str], str]:
+    """Map (field, value) school references to school ids with $in queries"""
+    schools_collection = get_collection(COLLECTIONS["schools"])
+    resolved = {}
+
+    for field in ("id", "udise_code", "email"):
+        values = list({getattr(row, "school_id" if field == "id" else field) for row in rows} - {None})
+        if not values:
+            continue
+        cursor = schools_collection.find({field: {"$in": values}}, {"_id": 0, "id": 1, field: 1})
+        async for school in cursor:
+            resolved[(field, school[field])] = school["id"]
+
+    return resolved
+
+async def _import_batch(batch: List[Tuple[int, dict]], report: dict):
+    valid = []
+    for row_number, raw in batch:
+        try:
+            # Blank cells fall back to the model defaults
+            values = {key: value for key, value in raw.items() if value != ""}
+            row = ParticipantImportRow(**values)
+        except ValidationError as e:
+            _add_error(report, row_number, "; ".join(_format_error(error) for error in e.errors()))
+            continue
+        # Like the school registration form, a zero count registers nothing
+        if row.participant_count == 0:
+            report["skipped"] += 1
+            continue
+        valid.append((row_number, row))
+
+    resolved = await _resolve_school_ids([row for _, row in valid])
+
+    entries = []
+    # Repeated keys are written once, from their last row
+    key_rows = {}
+    for row_number, row in valid:
+        school_id = (
+            resolved.get(("id", row.school_id))
+            or resolved.get(("udise_code", row.udise_code))
+            or resolved.get(("email", row.email))
+        )
+        if not school_id:
+            _add_error(report, row_number, "School not found")
+            continue
+        entries.append((school_id, row.category.value, row.level.value, row.participant_count))
+        key_rows[(school_id, row.category.value, row.level.value)] = row_number
+
+    for result in await upsert_participant_counts(entries, report_failures=True):
+        if result["action"] == "failed":
+            row_number = key_rows[(result["school_id"], result["category"], result["level"])]
+            _add_error(report, row_number, f"Could not be saved: {result['error']}")
+        else:
+            report[result["action"]] += 1
+
+def _format_error(error: dict) -> str:
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+def _add_error(report: dict, row_number: int, message: str):
+    report["error_count"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": row_number, "error": message})
+
+def _read_batch(rows: Iterator[dict], last_row: int) -> Tuple[List[Tuple[int, dict]], bool]:
+    """The next batch of numbered rows, and whether reading stopped on bad encoding"""
+    batch = []
+    try:
+        for raw in itertools.islice(rows, IMPORT_BATCH_SIZE):
+            last_row += 1
+            batch.append((last_row, raw))
+    except UnicodeDecodeError:
+        return batch, True
+    return batch, False
+
+async def import_participant_rows(rows: Iterable[dict]) -> dict:
+    """Validate and upsert streamed registration rows in fixed-size batches.
+
+    Rows are read, and so parsed, in the threadpool one batch at a time.
+    """
+    report = {"processed": 0, "registered": 0, "updated": 0, "skipped": 0, "error_count": 0, "errors": []}
+    rows = iter(rows)
+
+    # Row 1 is the header
+    last_row = 1
+    while True:
+        batch, undecodable = await run_in_threadpool(_read_batch, rows, last_row)
+        if batch:
+            last_row = batch[-1][0]
+            report["processed"] += len(batch)
+            await _import_batch(batch, report)
+        if undecodable:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    f"Row {last_row + 1} is not valid UTF-8 text; rows before it were imported. "
+                    f"Save the file as CSV UTF-8 and upload it again"
+                )
+            )
+        if not batch:
+            break
+
+    logger.info(
+        f"Imported participants: {report['registered']} registered, "
+        f"{report['updated']} updated, {report['skipped']} skipped, {report['error_count']} errors"
+    )
+    return report
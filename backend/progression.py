@@ -0,0 +1,178 @@
+from models import CompetitionLevel, DrawingCategory
+from database import get_collection, COLLECTIONS
+from enrichment import SCHOOL_FIELD_DEFAULTS
+from participants import upsert_participant_counts
+from stats import record_registrations
+from typing import List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+NEXT_LEVEL = {
+    CompetitionLevel.SCHOOL: CompetitionLevel.TALUK,
+    CompetitionLevel.TALUK: CompetitionLevel.DISTRICT,
+    CompetitionLevel.DISTRICT: CompetitionLevel.STATE
+}
+
+# School location fields that form a bracket at each level
+BRACKET_FIELDS = {
+    CompetitionLevel.TALUK: ["district", "taluk"],
+    CompetitionLevel.DISTRICT: ["district"],
+    CompetitionLevel.STATE: []
+}
+STATE_BRACKET = "state"
+UPSERT_BATCH_SIZE = 1000
+
+def bracket_label(level: CompetitionLevel, location: dict) -> str:
+    """Bracket name for a next-level entry, e.g. "Mysuru / Hunsur" at taluk level"""
+    fields = BRACKET_FIELDS[level]
+    if not fields:
+        return STATE_BRACKET
+    return " / ".join(location[field] for field in fields)
+
+async def _remove_stale_entries(level: CompetitionLevel, next_level: CompetitionLevel,
+                                category: Optional[DrawingCategory], promoted: Set[tuple]) -> int:
+    """Delete next-level entries promoted from ``level`` that this run did not promote.
+
+    Entries that already have winners or are marked completed are kept: their
+    results were recorded at the next level and must not be lost.
+    """
+    participants_collection = get_collection(COLLECTIONS["drawing_participants"])
+    query = {"level": next_level.value, "from_previous_level": True, "advanced_from": level.value}
+    if category:
+        query["category"] = category.value
+
+    stale, changes, kept = [], [], 0
+    cursor = participants_collection.find(
+        query, {"_id": 1, "school_id": 1, "category": 1, "participant_count": 1, "winners": 1, "is_completed": 1}
+    )
+    async for doc in cursor:
+        if (doc["school_id"], doc["category"], next_level.value) in promoted:
+            continue
+        if doc.get("winners") or doc.get("is_completed"):
+            kept += 1
+            continue
+        stale.append(doc["_id"])
+        changes.append({
+            "school_id": doc["school_id"],
+            "level": next_level.value,
+            "category": doc["category"],
+            "delta": -doc.get("participant_count", 0),
+            "created": False,
+            "removed": True
+        })
+
+    for start in range(0, len(stale), UPSERT_BATCH_SIZE):
+        await participants_collection.delete_many({"_id": {"$in": stale[start:start + UPSERT_BATCH_SIZE]}})
+    await record_registrations(changes)
+    if kept:
+        logger.warning(
+            f"Kept {kept} {next_level.value} entries no longer advancing from {level.value} "
+            f"because they already have results"
+        )
+    return len(stale)
+
+def _progression_pipeline(level: CompetitionLevel, next_level: CompetitionLevel,
+                          category: Optional[DrawingCategory]) -> List[dict]:
+    match = {"level": level.value, "winners.advances_to_next": True}
+    if category:
+        match["category"] = category.value
+
+    location = {
+        field: {"$ifNull": [f"$school.{field}", SCHOOL_FIELD_DEFAULTS[field]]}
+        for field in BRACKET_FIELDS[next_level]
+    }
+    return [
+        {"$match": match},
+        {"$project": {
+            "_id": 0,
+            "school_id": 1,
+            "category": 1,
+            "advancing": {"$size": {"$filter": {
+                "input": "$winners", "as": "winner", "cond": "$$winner.advances_to_next"
+            }}}
+        }},
+        {"$lookup": {
+            "from": COLLECTIONS["schools"],
+            "localField": "school_id",
+            "foreignField": "id",
+            "as": "school"
+        }},
+        # Entries whose school no longer exists cannot be placed in a bracket
+        {"$unwind": "$school"},
+        {"$group": {
+            "_id": {"category": "$category", **location},
+            "entries": {"$push": {"school_id": "$school_id", "advancing": "$advancing"}},
+            "participants": {"$sum": "$advancing"}
+        }}
+    ]
+
+async def advance_level(level: CompetitionLevel, category: Optional[DrawingCategory] = None) -> dict:
+    """Promote every advancing winner at ``level`` to the next level in bulk.
+
+    Advancing winners are grouped into taluk / district / state brackets by
+    the school's location, and each school gets one next-level entry keyed
+    on (school_id, category, level). Re-running is safe: entries are upserted
+    to the current advancing count rather than added again, and entries a
+    previous run promoted that no longer advance are removed.
+    """
+    if level not in NEXT_LEVEL:
+        raise ValueError(f"No level after {level.value}")
+
+    next_level = NEXT_LEVEL[level]
+    participants_collection = get_collection(COLLECTIONS["drawing_participants"])
+
+    summary = {
+        "level": level.value,
+        "next_level": next_level.value,
+        "schools": 0,
+        "participants": 0,
+        "registered": 0,
+        "updated": 0,
+        "removed": 0,
+        "brackets": []
+    }
+    entries, fields = [], {}
+    promoted = set()
+
+    async def write_batch():
+        for result in await upsert_participant_counts(entries, fields):
+            summary[result["action"]] += 1
+        entries.clear()
+        fields.clear()
+
+    async for group in participants_collection.aggregate(_progression_pipeline(level, next_level, category)):
+        category_value = group["_id"]["category"]
+        bracket = bracket_label(next_level, group["_id"])
+        summary["brackets"].append({
+            "category": category_value,
+            "bracket": bracket,
+            "schools": len(group["entries"]),
+            "participants": group["participants"]
+        })
+        summary["schools"] += len(group["entries"])
+        summary["participants"] += group["participants"]
+
+        for entry in group["entries"]:
+            key = (entry["school_id"], category_value, next_level.value)
+            promoted.add(key)
+            entries.append((*key, entry["advancing"]))
+            fields[key] = {
+                "bracket": bracket,
+                "from_previous_level": True,
+                "advanced_from": level.value
+            }
+            if len(entries) >= UPSERT_BATCH_SIZE:
+                await write_batch()
+
+    if entries:
+        await write_batch()
+
+    summary["removed"] = await _remove_stale_entries(level, next_level, category, promoted)
+
+    summary["brackets"].sort(key=lambda bracket: (bracket["category"], bracket["bracket"]))
+    logger.info(
+        f"Advanced {summary['participants']} winners from {summary['schools']} schools "
+        f"to {next_level.value} level in {len(summary['brackets'])} brackets"
+    )
+    return summary
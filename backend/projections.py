@@ -0,0 +1,32 @@
+# Per-endpoint field projections, so Mongo only sends what each response
+# actually uses and secrets never leave the database
+PROJECTIONS = {
+    # Existence checks only need to know a document is there
+    "exists": {"_id": 1},
+    
+    "auth.login": {"_id": 0, "id": 1, "password_hash": 1, "is_active": 1, "school_name": 1},
+    "auth.profile": {"_id": 0, "password_hash": 0},
+    
+    "school.participants": {"_id": 0},
+    "school.winner_submission": {"_id": 1, "winners": 1},
+    # Listings return the full nomination record, as they always have
+    "school.teacher_nominations": {"_id": 0},
+    
+    "voting.token_validation": {"_id": 0, "is_used": 1, "expires_at": 1},
+    "voting.results": {
+        "_id": 0, "teacher_name": 1, "category": 1, "award_type": 1,
+        "public_votes": 1, "status": 1
+    },
+    # achievements is trimmed to an excerpt on the server (see voting.py)
+    "voting.nominations": {
+        "_id": 0, "id": 1, "school_id": 1, "teacher_name": 1, "category": 1,
+        "award_type": 1, "experience_years": 1, "current_position": 1,
+        "public_votes": 1, "status": 1
+    },
+    
+    "admin.evaluators": {"_id": 0, "password_hash": 0},
+    "admin.all_participants": {"_id": 0},
+    "admin.all_nominations": {"_id": 0},
+    # Exports are the full record
+    "admin.export_nominations": {"_id": 0},
+}
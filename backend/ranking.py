@@ -0,0 +1,174 @@
+from pymongo import UpdateOne
+from models import NominationStatus, TeacherAwardCategory
+from database import get_collection, COLLECTIONS
+from vote_aggregator import vote_aggregator
+from response_cache import response_cache
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Blend of the two signals in final_score (0-100); weights are normalized
+EVALUATOR_WEIGHT = float(os.getenv("RANKING_EVALUATOR_WEIGHT", "0.7"))
+VOTE_WEIGHT = float(os.getenv("RANKING_VOTE_WEIGHT", "0.3"))
+SHORTLIST_SIZE = int(os.getenv("RANKING_SHORTLIST_SIZE", "10"))
+
+# Rejected nominations are neither ranked nor shortlisted; winners are
+# ranked but their status is left alone
+RANKED_STATUSES = [NominationStatus.NOMINATED.value, NominationStatus.SHORTLISTED.value, NominationStatus.WINNER.value]
+SHORTLIST_STATUSES = {NominationStatus.NOMINATED.value, NominationStatus.SHORTLISTED.value}
+
+def score_matrix(evaluator_scores: List[Dict[str, int]]) -> np.ndarray:
+    """Nominations x evaluators matrix of raw scores, NaN where not scored"""
+    columns: Dict[str, int] = {}
+    rows, cols, values = [], [], []
+    for row, scores in enumerate(evaluator_scores):
+        for evaluator_id, score in scores.items():
+            rows.append(row)
+            cols.append(columns.setdefault(evaluator_id, len(columns)))
+            values.append(score)
+
+    matrix = np.full((len(evaluator_scores), len(columns)), np.nan)
+    if values:
+        matrix[rows, cols] = values
+    return matrix
+
+def _min_max(values: np.ndarray) -> np.ndarray:
+    low, high = values.min(), values.max()
+    if high <= low:
+        return np.zeros_like(values)
+    return (values - low) / (high - low)
+
+def compute_final_scores(scores: np.ndarray, votes: np.ndarray,
+                         evaluator_weight: float = EVALUATOR_WEIGHT,
+                         vote_weight: float = VOTE_WEIGHT) -> np.ndarray:
+    """Blend per-evaluator normalized scores with vote counts into 0-100 scores.
+
+    Each evaluator's scores are z-normalized so strict and lenient markers
+    count equally; a nomination's evaluator signal is the mean of its
+    z-scores. Both signals are then scaled to 0-1 within the category.
+    """
+    count = len(votes)
+    evaluator_signal = np.zeros(count)
+
+    if scores.size:
+        scored = ~np.isnan(scores)
+        per_evaluator = scored.sum(axis=0)
+        totals = np.where(scored, scores, 0.0).sum(axis=0)
+        means = np.divide(totals, per_evaluator, out=np.zeros_like(totals), where=per_evaluator > 0)
+        deviations = np.where(scored, scores - means, 0.0)
+        variances = np.divide((deviations ** 2).sum(axis=0), per_evaluator,
+                              out=np.zeros_like(totals), where=per_evaluator > 0)
+        stds = np.sqrt(variances)
+        z = np.divide(deviations, stds, out=np.zeros_like(deviations), where=stds > 0)
+
+        per_nomination = scored.sum(axis=1)
+        has_scores = per_nomination > 0
+        if has_scores.any():
+            mean_z = np.divide(z.sum(axis=1), per_nomination, out=np.zeros(count), where=has_scores)
+            # Unscored nominations get the bottom of the evaluator scale
+            mean_z[~has_scores] = mean_z[has_scores].min()
+            evaluator_signal = _min_max(mean_z)
+
+    vote_signal = votes / votes.max() if count and votes.max() > 0 else np.zeros(count)
+
+    total_weight = evaluator_weight + vote_weight
+    if total_weight <= 0:
+        raise ValueError("Ranking weights must not both be zero")
+    return 100 * (evaluator_weight * evaluator_signal + vote_weight * vote_signal) / total_weight
+
+def competition_ranks(final_scores: np.ndarray) -> np.ndarray:
+    """1-based ranks, equal scores sharing a rank ("1224" ranking)"""
+    ascending = np.sort(final_scores)
+    return len(final_scores) - np.searchsorted(ascending, final_scores, side="right") + 1
+
+async def _load_category(category: str) -> Tuple[List[dict], np.ndarray, np.ndarray]:
+    nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+    cursor = nominations_collection.find(
+        {"status": {"$in": RANKED_STATUSES}, "category": category},
+        {"_id": 0, "id": 1, "status": 1, "public_votes": 1, "evaluator_scores": 1, "final_score": 1, "rank": 1}
+    )
+    nominations = await cursor.to_list(None)
+
+    scores = score_matrix([nomination.get("evaluator_scores") or {} for nomination in nominations])
+    # Unfolded shard counts and votes cast here but not yet flushed count too
+    current = await vote_aggregator.current_votes(nominations)
+    votes = np.fromiter(
+        (current[nomination["id"]] for nomination in nominations), dtype=float, count=len(nominations)
+    )
+    return nominations, scores, votes
+
+async def rank_category(category: TeacherAwardCategory, shortlist_size: Optional[int] = None) -> dict:
+    """Recompute final_score, rank and shortlist status for one category.
+
+    Nominations ranked within the shortlist size (ties included) become
+    shortlisted and the rest go back to nominated. Only changed nominations
+    are written, in a single bulk_write.
+    """
+    shortlist_size = SHORTLIST_SIZE if shortlist_size is None else shortlist_size
+    nominations, scores, votes = await _load_category(category.value)
+
+    summary = {
+        "category": category.value,
+        "ranked": len(nominations),
+        "evaluators": scores.shape[1],
+        "shortlisted": 0,
+        "shortlist_cutoff": None,
+        "updated": 0
+    }
+    if not nominations:
+        return summary
+
+    final_scores = np.round(compute_final_scores(scores, votes), 4)
+    ranks = competition_ranks(final_scores)
+    shortlisted = ranks <= shortlist_size
+
+    if shortlist_size > 0:
+        summary["shortlist_cutoff"] = float(final_scores[shortlisted].min())
+    summary["shortlisted"] = int(shortlisted.sum())
+
+    now = datetime.utcnow()
+    operations = []
+    for nomination, final_score, rank, in_shortlist in zip(
+        nominations, final_scores.tolist(), ranks.tolist(), shortlisted.tolist()
+    ):
+        update = {}
+        if nomination.get("final_score") != final_score:
+            update["final_score"] = final_score
+        if nomination.get("rank") != rank:
+            update["rank"] = rank
+        if nomination["status"] in SHORTLIST_STATUSES:
+            status = NominationStatus.SHORTLISTED.value if in_shortlist else NominationStatus.NOMINATED.value
+            if nomination["status"] != status:
+                update["status"] = status
+        if update:
+            update["updated_at"] = now
+            operations.append(UpdateOne({"id": nomination["id"]}, {"$set": update}))
+
+    if operations:
+        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+        await nominations_collection.bulk_write(operations, ordered=False)
+        summary["updated"] = len(operations)
+
+    return summary
+
+async def rank_nominations(category: Optional[TeacherAwardCategory] = None,
+                           shortlist_size: Optional[int] = None,
+                           progress: Optional[Callable[[int, int], Awaitable]] = None) -> List[dict]:
+    """Rank one category, or every category when none is given"""
+    categories = [category] if category else list(TeacherAwardCategory)
+    summaries = []
+    for item in categories:
+        summaries.append(await rank_category(item, shortlist_size))
+        if progress:
+            await progress(len(summaries), len(categories))
+
+    if any(summary["updated"] for summary in summaries):
+        # Public listings show status and filter on it
+        response_cache.clear()
+
+    logger.info(f"Ranked {sum(summary['ranked'] for summary in summaries)} nominations")
+    return summaries
@@ -0,0 +1,179 @@
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from database import get_collection, COLLECTIONS
+from metrics import VOTE_RATE_LIMITED
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import ipaddress
+import logging
+import math
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Limits apply to request.client.host; behind a proxy run uvicorn with
+# --proxy-headers and --forwarded-allow-ips
+VOTE_RATE_LIMIT_ENABLED = os.getenv("VOTE_RATE_LIMIT_ENABLED", "true").lower() == "true"
+VOTE_RATE_LIMIT_WINDOW_S = int(os.getenv("VOTE_RATE_LIMIT_WINDOW_S", "60"))
+VOTE_RATE_LIMIT_PER_IP = int(os.getenv("VOTE_RATE_LIMIT_PER_IP", "10"))
+# A school lab or mobile carrier NAT puts many honest voters in one subnet
+VOTE_RATE_LIMIT_PER_SUBNET = int(os.getenv("VOTE_RATE_LIMIT_PER_SUBNET", "120"))
+VOTE_RATE_LIMIT_MAX_KEYS = int(os.getenv("VOTE_RATE_LIMIT_MAX_KEYS", "100000"))
+# Also count in Mongo so the limits hold across worker processes. This
+# costs 3 extra Mongo round trips per vote that passes the local check
+# (two find_one_and_update sent concurrently, then one find).
+VOTE_RATE_LIMIT_SHARED = os.getenv("VOTE_RATE_LIMIT_SHARED", "false").lower() == "true"
+
+IPV4_SUBNET_PREFIX = 24
+IPV6_SUBNET_PREFIX = 64
+
+def subnet_of(client_ip: str) -> Optional[str]:
+    """The /24 (IPv4) or /64 (IPv6) containing an address, None if it isn't one"""
+    try:
+        address = ipaddress.ip_address(client_ip)
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    prefix = IPV4_SUBNET_PREFIX if address.version == 4 else IPV6_SUBNET_PREFIX
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+def _estimate(previous: int, current: int, elapsed_fraction: float) -> float:
+    return previous * (1 - elapsed_fraction) + current
+
+def _retry_after(previous: int, current: int, limit: int, window_s: int, elapsed_fraction: float) -> int:
+    """Seconds until one more event fits: the first time estimate + 1 <= limit"""
+    if current + 1 <= limit and previous > 0:
+        # Still in this window: previous * (1 - fraction) + current + 1 <= limit
+        fraction = 1 - (limit - current - 1) / previous
+        if fraction < 1:
+            return max(1, math.ceil((fraction - elapsed_fraction) * window_s))
+    # After the roll-over the current count becomes "previous" and decays:
+    # current * (1 - fraction) + 1 <= limit
+    fraction = 0.0
+    if current > 0:
+        fraction = min(1.0, max(0.0, 1 - (limit - 1) / current))
+    return max(1, math.ceil((1 - elapsed_fraction + fraction) * window_s))
+
+class SlidingWindowCounter:
+    """Two fixed-window buckets per key, previous weighted by its overlap; LRU-bounded"""
+
+    def __init__(self, limit: int, window_s: int, max_keys: int):
+        self.limit = limit
+        self.window_s = window_s
+        self.max_keys = max_keys
+        # key -> [window index, current window count, previous window count]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+
+    def _entry(self, key: str, window: int) -> list:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = [window, 0, 0]
+            self._entries[key] = entry
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        elif entry[0] != window:
+            previous = entry[1] if entry[0] == window - 1 else 0
+            entry[:] = [window, 0, previous]
+        self._entries.move_to_end(key)
+        return entry
+
+    def check(self, key: str, now: float) -> Optional[int]:
+        """Retry-after seconds if one more event would exceed the limit, else None"""
+        window, offset = divmod(now, self.window_s)
+        fraction = offset / self.window_s
+        _, current, previous = self._entry(key, int(window))
+        if _estimate(previous, current, fraction) + 1 > self.limit:
+            return _retry_after(previous, current, self.limit, self.window_s, fraction)
+        return None
+
+    def add(self, key: str, now: float):
+        self._entry(key, int(now // self.window_s))[1] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class VoteRateLimiter:
+    """Per-IP and per-subnet vote limits, checked before any token work"""
+
+    def __init__(self, window_s: int = VOTE_RATE_LIMIT_WINDOW_S, per_ip: int = VOTE_RATE_LIMIT_PER_IP,
+                 per_subnet: int = VOTE_RATE_LIMIT_PER_SUBNET, max_keys: int = VOTE_RATE_LIMIT_MAX_KEYS,
+                 shared: bool = VOTE_RATE_LIMIT_SHARED):
+        self.window_s = window_s
+        self.shared = shared
+        self.scopes = {
+            "ip": SlidingWindowCounter(per_ip, window_s, max_keys),
+            "subnet": SlidingWindowCounter(per_subnet, window_s, max_keys)
+        }
+
+    def _keys(self, client_ip: str) -> List[Tuple[str, str]]:
+        keys = [("ip", client_ip)]
+        subnet = subnet_of(client_ip)
+        if subnet:
+            keys.append(("subnet", subnet))
+        return keys
+
+    async def _check_shared(self, keys: List[Tuple[str, str]], now: float) -> Optional[Tuple[str, int]]:
+        """Count the attempt in Mongo per key; (scope, retry_after) if one is over"""
+        window, offset = divmod(now, self.window_s)
+        window, fraction = int(window), offset / self.window_s
+        # Kept until the window after next no longer needs it as "previous"
+        expires_at = datetime.utcfromtimestamp((window + 2) * self.window_s)
+        limits_collection = get_collection(COLLECTIONS["vote_rate_limits"])
+
+        current = await asyncio.gather(*(
+            limits_collection.find_one_and_update(
+                {"_id": f"{scope}:{key}:{window}"},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            for scope, key in keys
+        ))
+        previous_ids = [f"{scope}:{key}:{window - 1}" for scope, key in keys]
+        previous: Dict[str, int] = {}
+        async for doc in limits_collection.find({"_id": {"$in": previous_ids}}):
+            previous[doc["_id"]] = doc["count"]
+
+        for (scope, _), doc, previous_id in zip(keys, current, previous_ids):
+            limit = self.scopes[scope].limit
+            # This attempt is already part of the current count
+            if _estimate(previous.get(previous_id, 0), doc["count"], fraction) > limit:
+                return scope, _retry_after(previous.get(previous_id, 0), doc["count"], limit, self.window_s, fraction)
+        return None
+
+    async def hit(self, client_ip: str):
+        """Count a vote attempt, raising 429 when the IP or its subnet is over its limit"""
+        now = time.time()
+        keys = self._keys(client_ip)
+
+        rejected = None
+        for scope, key in keys:
+            retry_after = self.scopes[scope].check(key, now)
+            if retry_after is not None:
+                rejected = (scope, retry_after)
+                break
+
+        if rejected is None and self.shared:
+            try:
+                rejected = await self._check_shared(keys, now)
+            except Exception as e:
+                logger.error(f"Shared vote rate limit error: {str(e)}")
+
+        if rejected is not None:
+            scope, retry_after = rejected
+            VOTE_RATE_LIMITED.labels(scope).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many votes from your network, please try again later",
+                headers={"Retry-After": str(retry_after)}
+            )
+
+        # Only allowed votes count locally, so rejected clients recover
+        for scope, key in keys:
+            self.scopes[scope].add(key, now)
+
+vote_rate_limiter = VoteRateLimiter()
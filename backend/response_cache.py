@@ -0,0 +1,97 @@
+from fastapi import Request, Response
+from cache import TTLCache
+from typing import Awaitable, Callable, Dict, Tuple
+import asyncio
+import hashlib
+import orjson
+import os
+
+# Browsers and a local reverse proxy may reuse a response for this long
+PUBLIC_CACHE_MAX_AGE_S = int(os.getenv("PUBLIC_CACHE_MAX_AGE_S", "5"))
+# Upper bound on staleness from writes made by other worker processes,
+# which cannot invalidate this process's entries
+ENTRY_TTL_S = float(os.getenv("PUBLIC_CACHE_ENTRY_TTL_S", "5"))
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header (RFC 9110)"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+class ResponseCache:
+    """Serialized response bodies with content-derived ETags.
+
+    Entries are dropped by ``invalidate`` when the data behind them changes
+    in this process and otherwise expire after ENTRY_TTL_S.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = ENTRY_TTL_S):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Builds in progress, removed as soon as they finish or fail
+        self._building: Dict[str, asyncio.Future] = {}
+
+    async def _build(self, key: str, builder: Callable[[], Awaitable[dict]]) -> Tuple[bytes, str]:
+        body = orjson.dumps(await builder(), default=str)
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        entry = (body, etag)
+        self._entries.set(key, entry)
+        return entry
+
+    def _build_done(self, key: str, future: asyncio.Future):
+        if self._building.get(key) is future:
+            del self._building[key]
+        # Mark a failure as retrieved even if every waiter has gone away
+        if not future.cancelled():
+            future.exception()
+
+    async def get_or_build(self, key: str, builder: Callable[[], Awaitable[dict]]) -> Tuple[bytes, str]:
+        """Cached (body, etag) for key, building it at most once concurrently.
+
+        Concurrent callers share one build, and its exception if it fails
+        (e.g. a 404 for an unknown id); nothing is kept for failed keys.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        future = self._building.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._build(key, builder))
+            self._building[key] = future
+            future.add_done_callback(lambda done: self._build_done(key, done))
+        # A caller that disconnects must not cancel the build for the others
+        return await asyncio.shield(future)
+
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def serve(self, request: Request, key: str, builder: Callable[[], Awaitable[dict]]) -> Response:
+        """Respond from the cache, answering If-None-Match with 304"""
+        body, etag = await self.get_or_build(key, builder)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={PUBLIC_CACHE_MAX_AGE_S}"
+        }
+
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+response_cache = ResponseCache()
+
+# Cache keys for public voting reads
+NOMINATIONS_KEY = "voting:nominations"
+
+def results_key(nomination_id: str) -> str:
+    return f"voting:results:{nomination_id}"
@@ -1,48 +1,76 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from models import AdminDashboardStats, EvaluatorUser, AdminUser, UserRole
-from auth import require_admin_user, get_password_hash
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, UploadFile, File
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Optional
+from models import (
+    AdminDashboardStats, EvaluatorUser, AdminUser, UserRole,
+    CompetitionLevel, DrawingCategory, TeacherAwardCategory
+)
+from auth import (
+    require_admin_user, get_password_hash_async, get_password_hash_metrics, get_token_cache_stats
+)
 from database import get_collection, COLLECTIONS
+from vote_aggregator import vote_aggregator, rebuild_public_votes
+from enrichment import enrich_with_schools
+from cache import TTLCache
+from projections import PROJECTIONS
+from token_generation import tokens_csv, default_batch_label, BATCH_LABEL_PATTERN
+from stats import increment, get_stats, rebuild_stats, GLOBAL_KEY
+from participants import import_participant_rows, read_csv_rows, read_xlsx_rows
+from progression import advance_level, NEXT_LEVEL
+from ranking import rank_nominations
+from jobs import job_runner, JobContext
+from slow_queries import top_slow_queries
+from pagination import (
+    fetch_page, stream_ndjson, wants_ndjson, MAX_PAGE_SIZE, NDJSON_MEDIA_TYPE
+)
+import asyncio
 import logging
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 logger = logging.getLogger(__name__)
 
+DASHBOARD_CACHE_TTL = float(os.getenv("ADMIN_DASHBOARD_CACHE_TTL_S", "30"))
+_dashboard_cache = TTLCache(maxsize=1, ttl=DASHBOARD_CACHE_TTL)
+_dashboard_lock = asyncio.Lock()
+
+async def _compute_admin_dashboard() -> AdminDashboardStats:
+    """Read dashboard statistics from the maintained global counters"""
+    stats = await get_stats(GLOBAL_KEY)
+    if not stats:
+        # First use (or counters were wiped): build them from raw data
+        await rebuild_stats()
+        stats = await get_stats(GLOBAL_KEY)
+    
+    return AdminDashboardStats(
+        total_schools=stats.get("schools", 0),
+        total_participants=stats.get("participants", 0),
+        total_nominations=stats.get("nominations", 0),
+        active_evaluators=stats.get("evaluators", 0),
+        votes_cast=stats.get("votes", 0),
+        competitions_by_level={
+            level: count for level, count in stats.get("competitions_by_level", {}).items() if count
+        }
+    )
+
 @router.get("/dashboard", response_model=AdminDashboardStats)
-async def get_admin_dashboard(current_user: dict = Depends(require_admin_user)):
-    """Get admin dashboard statistics"""
+async def get_admin_dashboard(
+    refresh: bool = False,
+    current_user: dict = Depends(require_admin_user)
+):
+    """Get admin dashboard statistics (cached briefly; refresh=true recomputes)"""
     try:
-        schools_collection = get_collection(COLLECTIONS["schools"])
-        participants_collection = get_collection(COLLECTIONS["drawing_participants"])
-        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
-        evaluators_collection = get_collection(COLLECTIONS["evaluators"])
-        votes_collection = get_collection(COLLECTIONS["votes"])
-        
-        # Get counts
-        total_schools = await schools_collection.count_documents({"is_active": True})
-        total_nominations = await nominations_collection.count_documents({})
-        active_evaluators = await evaluators_collection.count_documents({"is_active": True})
-        votes_cast = await votes_collection.count_documents({})
+        stats = None if refresh else _dashboard_cache.get("stats")
+        if stats is None:
+            # Only one request recomputes; the rest wait and reuse its result
+            async with _dashboard_lock:
+                stats = None if refresh else _dashboard_cache.get("stats")
+                if stats is None:
+                    stats = await _compute_admin_dashboard()
+                    _dashboard_cache.set("stats", stats)
         
-        # Get participants count
-        participants = await participants_collection.find({}).to_list(1000)
-        total_participants = sum(p.get("participant_count", 0) for p in participants)
-        
-        # Competitions by level
-        competitions_by_level = {}
-        for participant in participants:
-            level = participant.get("level", "unknown")
-            competitions_by_level[level] = competitions_by_level.get(level, 0) + 1
-        
-        return AdminDashboardStats(
-            total_schools=total_schools,
-            total_participants=total_participants,
-            total_nominations=total_nominations,
-            active_evaluators=active_evaluators,
-            votes_cast=votes_cast,
-            competitions_by_level=competitions_by_level
-        )
+        return stats
         
     except Exception as e:
         logger.error(f"Admin dashboard error: {str(e)}")
@@ -61,7 +89,9 @@ async def create_evaluator(
         evaluators_collection = get_collection(COLLECTIONS["evaluators"])
         
         # Check if email already exists
-        existing = await evaluators_collection.find_one({"email": evaluator_data.get("email")})
+        existing = await evaluators_collection.find_one(
+            {"email": evaluator_data.get("email")}, PROJECTIONS["exists"]
+        )
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -69,7 +99,7 @@ async def create_evaluator(
             )
         
         # Hash password
-        password_hash = get_password_hash(evaluator_data.get("password"))
+        password_hash = await get_password_hash_async(evaluator_data.get("password"))
         
         # Create evaluator
         evaluator = EvaluatorUser(
@@ -85,6 +115,8 @@ async def create_evaluator(
         result = await evaluators_collection.insert_one(evaluator.dict())
         
         if result.inserted_id:
+            await increment({GLOBAL_KEY: {"evaluators": 1}})
+            
             return {
                 "message": "Evaluator created successfully",
                 "evaluator_id": evaluator.id,
@@ -111,12 +143,9 @@ async def get_evaluators(current_user: dict = Depends(require_admin_user)):
     try:
         evaluators_collection = get_collection(COLLECTIONS["evaluators"])
         
-        evaluators = await evaluators_collection.find({}).to_list(100)
-        
-        # Clean up data
-        for evaluator in evaluators:
-            evaluator.pop("_id", None)
-            evaluator.pop("password_hash", None)
+        evaluators = await evaluators_collection.find(
+            {}, PROJECTIONS["admin.evaluators"]
+        ).to_list(100)
         
         return {
             "evaluators": evaluators,
@@ -132,34 +161,46 @@ async def get_evaluators(current_user: dict = Depends(require_admin_user)):
         )
 
 @router.get("/all-participants")
-async def get_all_participants(current_user: dict = Depends(require_admin_user)):
-    """Get all participants from all schools"""
+async def get_all_participants(
+    request: Request,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(require_admin_user)
+):
+    """Get all participants from all schools.
+
+    Paged by an opaque (created_at, id) cursor; send
+    ``Accept: application/x-ndjson`` to stream everything after the cursor.
+    """
     try:
         participants_collection = get_collection(COLLECTIONS["drawing_participants"])
-        schools_collection = get_collection(COLLECTIONS["schools"])
         
-        participants = await participants_collection.find({}).to_list(1000)
+        if wants_ndjson(request):
+            return StreamingResponse(
+                stream_ndjson(
+                    participants_collection, {}, cursor,
+                    projection=PROJECTIONS["admin.all_participants"],
+                    transform=enrich_with_schools
+                ),
+                media_type=NDJSON_MEDIA_TYPE
+            )
+        
+        participants, next_cursor = await fetch_page(
+            participants_collection, {}, limit, cursor, PROJECTIONS["admin.all_participants"]
+        )
         
         # Enrich with school information
-        enriched_participants = []
-        for participant in participants:
-            school = await schools_collection.find_one({"id": participant.get("school_id")})
-            
-            participant_info = {
-                **participant,
-                "school_name": school.get("school_name") if school else "Unknown School",
-                "district": school.get("district") if school else "Unknown District",
-                "taluk": school.get("taluk") if school else "Unknown Taluk"
-            }
-            participant_info.pop("_id", None)
-            enriched_participants.append(participant_info)
+        enriched_participants = await enrich_with_schools(participants)
         
-        return {
+        return ORJSONResponse({
             "participants": enriched_participants,
             "count": len(enriched_participants),
+            "next_cursor": next_cursor,
             "status": "success"
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"All participants fetch error: {str(e)}")
         raise HTTPException(
@@ -167,35 +208,51 @@ async def get_all_participants(current_user: dict = Depends(require_admin_user))
             detail="Failed to fetch all participants"
         )
 
+async def enrich_nominations(nominations: List[dict]) -> List[dict]:
+    """School details plus public_votes including unflushed and unfolded votes"""
+    return await enrich_with_schools(await vote_aggregator.with_current_votes(nominations))
+
 @router.get("/all-nominations")
-async def get_all_nominations(current_user: dict = Depends(require_admin_user)):
-    """Get all teacher nominations from all schools"""
+async def get_all_nominations(
+    request: Request,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(require_admin_user)
+):
+    """Get all teacher nominations from all schools.
+
+    Paged by an opaque (created_at, id) cursor; send
+    ``Accept: application/x-ndjson`` to stream everything after the cursor.
+    """
     try:
         nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
-        schools_collection = get_collection(COLLECTIONS["schools"])
         
-        nominations = await nominations_collection.find({}).to_list(1000)
+        if wants_ndjson(request):
+            return StreamingResponse(
+                stream_ndjson(
+                    nominations_collection, {}, cursor,
+                    projection=PROJECTIONS["admin.all_nominations"],
+                    transform=enrich_nominations
+                ),
+                media_type=NDJSON_MEDIA_TYPE
+            )
         
-        # Enrich with school information
-        enriched_nominations = []
-        for nomination in nominations:
-            school = await schools_collection.find_one({"id": nomination.get("school_id")})
-            
-            nomination_info = {
-                **nomination,
-                "school_name": school.get("school_name") if school else "Unknown School",
-                "district": school.get("district") if school else "Unknown District",
-                "taluk": school.get("taluk") if school else "Unknown Taluk"
-            }
-            nomination_info.pop("_id", None)
-            enriched_nominations.append(nomination_info)
+        nominations, next_cursor = await fetch_page(
+            nominations_collection, {}, limit, cursor, PROJECTIONS["admin.all_nominations"]
+        )
         
-        return {
+        # Enrich with school information and live vote counts
+        enriched_nominations = await enrich_nominations(nominations)
+        
+        return ORJSONResponse({
             "nominations": enriched_nominations,
             "count": len(enriched_nominations),
+            "next_cursor": next_cursor,
             "status": "success"
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"All nominations fetch error: {str(e)}")
         raise HTTPException(
@@ -203,6 +260,272 @@ async def get_all_nominations(current_user: dict = Depends(require_admin_user)):
             detail="Failed to fetch all nominations"
         )
 
+@router.post("/participants/import")
+async def import_participants(
+    file: UploadFile = File(...),
+    current_user: dict = Depends(require_admin_user)
+):
+    """Bulk-register participant counts from a CSV or XLSX upload"""
+    try:
+        filename = (file.filename or "").lower()
+        if filename.endswith(".csv"):
+            rows = read_csv_rows(file.file)
+        elif filename.endswith(".xlsx"):
+            try:
+                import openpyxl  # noqa: F401
+            except ImportError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="XLSX import is not available; upload a CSV file"
+                )
+            rows = read_xlsx_rows(file.file)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload a .csv or .xlsx file"
+            )
+        
+        try:
+            report = await import_participant_rows(rows)
+        finally:
+            # Batches before a failure are already written
+            _dashboard_cache.clear()
+        
+        return {
+            "message": "Participant import completed",
+            **report,
+            "status": "success"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Participant import error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to import participants"
+        )
+
+# Background jobs: heavy maintenance work runs on the job runner and is
+# polled through /jobs/{job_id}
+
+EXPORTS = {
+    "participants": ("drawing_participants", "admin.all_participants", enrich_with_schools),
+    "nominations": ("teacher_nominations", "admin.export_nominations", enrich_nominations)
+}
+
+def _job_view(job: dict) -> dict:
+    """Job document as returned to clients (GridFS ids stay internal)"""
+    view = {key: value for key, value in job.items() if key not in ("_id", "artifact_id")}
+    view["artifact_url"] = f"/api/admin/jobs/{job['id']}/artifact" if job.get("artifact_id") else None
+    return view
+
+async def _submit_job(kind: str, params: dict, current_user: dict, message: str) -> dict:
+    job = await job_runner.submit(kind, params, created_by=current_user["user_id"])
+    return {
+        "message": message,
+        "job": _job_view(job),
+        "status_url": f"/api/admin/jobs/{job['id']}",
+        "status": "success"
+    }
+
+async def _count_lines(chunks, job: JobContext, header_lines: int = 0, total: Optional[int] = None):
+    """Pass text chunks through, reporting one unit of progress per line"""
+    done = -header_lines
+    async for chunk in chunks:
+        done += chunk.count("\n" if isinstance(chunk, str) else b"\n")
+        await job.progress(max(done, 0), total)
+        yield chunk
+    await job.progress(max(done, 0), total, force=True)
+
+@job_runner.register("voting_tokens")
+async def _voting_tokens_job(job: JobContext, count: int, expires_at: datetime, batch_label: str) -> dict:
+    await job.save_artifact(
+        f"{batch_label}.csv",
+        _count_lines(tokens_csv(count, expires_at, batch_label), job, header_lines=1, total=count),
+        "text/csv"
+    )
+    return {"batch_label": batch_label, "count": count, "expires_at": expires_at}
+
+@job_runner.register("level_progression")
+async def _level_progression_job(job: JobContext, level: str, category: Optional[str] = None) -> dict:
+    summary = await advance_level(CompetitionLevel(level), DrawingCategory(category) if category else None)
+    _dashboard_cache.clear()
+    return summary
+
+@job_runner.register("nomination_ranking")
+async def _nomination_ranking_job(job: JobContext, category: Optional[str] = None,
+                                  shortlist_size: Optional[int] = None) -> dict:
+    categories = await rank_nominations(
+        TeacherAwardCategory(category) if category else None, shortlist_size,
+        progress=lambda done, total: job.progress(done, total, force=True)
+    )
+    return {"categories": categories}
+
+@job_runner.register("vote_counter_rebuild")
+async def _vote_counter_rebuild_job(job: JobContext) -> dict:
+    return {"corrected": await rebuild_public_votes()}
+
+@job_runner.register("stats_rebuild")
+async def _stats_rebuild_job(job: JobContext) -> dict:
+    # Flushed votes are counted by the rebuild, not re-added afterwards
+    await vote_aggregator.flush()
+    documents = await rebuild_stats()
+    _dashboard_cache.clear()
+    return {"documents": documents}
+
+@job_runner.register("export")
+async def _export_job(job: JobContext, dataset: str) -> dict:
+    collection_key, projection_key, transform = EXPORTS[dataset]
+    collection = get_collection(COLLECTIONS[collection_key])
+    total = await collection.estimated_document_count()
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d%H%M%S}.ndjson"
+    await job.save_artifact(
+        filename,
+        _count_lines(
+            stream_ndjson(collection, {}, projection=PROJECTIONS[projection_key], transform=transform),
+            job, total=total
+        ),
+        NDJSON_MEDIA_TYPE
+    )
+    return {"dataset": dataset, "filename": filename}
+
+@router.post("/progression/{level}/advance", status_code=status.HTTP_202_ACCEPTED)
+async def advance_competition_level(
+    level: CompetitionLevel,
+    category: Optional[DrawingCategory] = None,
+    current_user: dict = Depends(require_admin_user)
+):
+    """Close a level: promote all advancing winners into next-level brackets"""
+    if level not in NEXT_LEVEL:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"There is no level after {level.value}"
+        )
+    
+    return await _submit_job(
+        "level_progression",
+        {"level": level.value, "category": category.value if category else None},
+        current_user, f"Advancing winners to {NEXT_LEVEL[level].value} level"
+    )
+
+@router.post("/nominations/rank", status_code=status.HTTP_202_ACCEPTED)
+async def rank_teacher_nominations(
+    category: Optional[TeacherAwardCategory] = None,
+    shortlist_size: Optional[int] = Query(None, ge=0),
+    current_user: dict = Depends(require_admin_user)
+):
+    """Recompute final scores, ranks and shortlists for teacher nominations"""
+    return await _submit_job(
+        "nomination_ranking",
+        {"category": category.value if category else None, "shortlist_size": shortlist_size},
+        current_user, "Nomination ranking queued"
+    )
+
+@router.post("/votes/rebuild-counters", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_vote_counters(current_user: dict = Depends(require_admin_user)):
+    """Rebuild nomination public_votes counters from the votes collection"""
+    return await _submit_job("vote_counter_rebuild", {}, current_user, "Vote counter rebuild queued")
+
+@router.post("/stats/rebuild", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_dashboard_stats(current_user: dict = Depends(require_admin_user)):
+    """Rebuild the dashboard counters from the raw collections"""
+    return await _submit_job("stats_rebuild", {}, current_user, "Statistics rebuild queued")
+
+@router.post("/voting-tokens/generate", status_code=status.HTTP_202_ACCEPTED)
+async def generate_voting_token_batch(
+    count: int = Query(..., ge=1, le=5_000_000),
+    days_valid: int = Query(90, ge=1),
+    batch_label: Optional[str] = Query(None, pattern=BATCH_LABEL_PATTERN),
+    current_user: dict = Depends(require_admin_user)
+):
+    """Generate a batch of printable voting tokens; the CSV is the job's artifact"""
+    expires_at = datetime.utcnow() + timedelta(days=days_valid)
+    batch_label = batch_label or default_batch_label()
+    
+    return await _submit_job(
+        "voting_tokens",
+        {"count": count, "expires_at": expires_at, "batch_label": batch_label},
+        current_user, f"Generating {count} voting tokens"
+    )
+
+@router.post("/exports/{dataset}", status_code=status.HTTP_202_ACCEPTED)
+async def export_dataset(dataset: str, current_user: dict = Depends(require_admin_user)):
+    """Export all participants or nominations (with school details) as NDJSON"""
+    if dataset not in EXPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export; choose one of {', '.join(EXPORTS)}"
+        )
+    
+    return await _submit_job("export", {"dataset": dataset}, current_user, f"Exporting {dataset}")
+
+@router.get("/jobs")
+async def list_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: dict = Depends(require_admin_user)
+):
+    """Most recent background jobs"""
+    jobs = await job_runner.recent(limit)
+    return {"jobs": [_job_view(job) for job in jobs], "status": "success"}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(require_admin_user)):
+    """Status, progress and result of a background job"""
+    job = await job_runner.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return {"job": _job_view(job), "status": "success"}
+
+@router.get("/jobs/{job_id}/artifact")
+async def download_job_artifact(job_id: str, current_user: dict = Depends(require_admin_user)):
+    """Download the file a finished job produced"""
+    job = await job_runner.get(job_id)
+    if not job or not job.get("artifact_id"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No artifact for this job"
+        )
+    
+    return StreamingResponse(
+        await job_runner.open_artifact(job),
+        media_type=job.get("artifact_content_type") or "application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{job["artifact_filename"]}"'}
+    )
+
+@router.get("/slow-queries/top")
+async def get_top_slow_queries(
+    limit: int = Query(20, ge=1, le=100),
+    since_minutes: Optional[int] = Query(None, ge=1),
+    current_user: dict = Depends(require_admin_user)
+):
+    """Slow query shapes ranked by total time, with their latest explain"""
+    try:
+        since = datetime.utcnow() - timedelta(minutes=since_minutes) if since_minutes else None
+        queries = await top_slow_queries(limit, since)
+        
+        return {"queries": queries, "status": "success"}
+        
+    except Exception as e:
+        logger.error(f"Slow query report error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch slow queries"
+        )
+
+@router.get("/system/password-hashing")
+async def get_password_hashing_metrics(current_user: dict = Depends(require_admin_user)):
+    """Queue depth and timing of the password hashing pool"""
+    return {"metrics": get_password_hash_metrics(), "status": "success"}
+
+@router.get("/system/token-cache")
+async def get_token_cache_metrics(current_user: dict = Depends(require_admin_user)):
+    """Hit/miss counters of the verified-JWT cache"""
+    return {"metrics": get_token_cache_stats(), "status": "success"}
+
 # Seed admin user (run once)
 @router.post("/seed-admin")
 async def seed_admin():
@@ -211,12 +534,14 @@ async def seed_admin():
         admins_collection = get_collection(COLLECTIONS["admins"])
         
         # Check if admin already exists
-        existing_admin = await admins_collection.find_one({"email": "admin@igniteinspire.com"})
+        existing_admin = await admins_collection.find_one(
+            {"email": "admin@igniteinspire.com"}, PROJECTIONS["exists"]
+        )
         if existing_admin:
             return {"message": "Admin user already exists", "status": "exists"}
         
         # Create default admin
-        password_hash = get_password_hash("admin123")  # Change this password!
+        password_hash = await get_password_hash_async("admin123")  # Change this password!
         
         admin = AdminUser(
             name="System Administrator",
@@ -3,8 +3,10 @@ from models import (
     SchoolRegistrationRequest, LoginRequest, LoginResponse, 
     SchoolUser, AdminUser, UserRole
 )
-from auth import get_password_hash, verify_password, create_access_token, verify_token
+from auth import get_password_hash_async, verify_password_async, create_access_token, verify_token
 from database import get_collection, COLLECTIONS
+from projections import PROJECTIONS
+from stats import increment, GLOBAL_KEY, district_key
 from datetime import timedelta
 import logging
 
@@ -18,7 +20,9 @@ async def register_school(registration: SchoolRegistrationRequest):
         schools_collection = get_collection(COLLECTIONS["schools"])
         
         # Check if email already exists
-        existing_school = await schools_collection.find_one({"email": registration.email})
+        existing_school = await schools_collection.find_one(
+            {"email": registration.email}, PROJECTIONS["exists"]
+        )
         if existing_school:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -26,7 +30,7 @@ async def register_school(registration: SchoolRegistrationRequest):
             )
         
         # Hash password and create school user
-        password_hash = get_password_hash(registration.password)
+        password_hash = await get_password_hash_async(registration.password)
         
         school_data = SchoolUser(
             school_name=registration.school_name,
@@ -45,6 +49,11 @@ async def register_school(registration: SchoolRegistrationRequest):
         result = await schools_collection.insert_one(school_data.dict())
         
         if result.inserted_id:
+            await increment({
+                GLOBAL_KEY: {"schools": 1},
+                district_key(registration.district): {"schools": 1}
+            })
+            
             return {
                 "message": "School registered successfully",
                 "school_id": school_data.id,
@@ -56,6 +65,8 @@ async def register_school(registration: SchoolRegistrationRequest):
                 detail="Failed to register school"
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"School registration error: {str(e)}")
         raise HTTPException(
@@ -70,9 +81,9 @@ async def login_school(login: LoginRequest):
         schools_collection = get_collection(COLLECTIONS["schools"])
         
         # Find school by email
-        school = await schools_collection.find_one({"email": login.email})
+        school = await schools_collection.find_one({"email": login.email}, PROJECTIONS["auth.login"])
         
-        if not school or not verify_password(login.password, school["password_hash"]):
+        if not school or not await verify_password_async(login.password, school["password_hash"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -114,9 +125,9 @@ async def login_admin(login: LoginRequest):
         admins_collection = get_collection(COLLECTIONS["admins"])
         
         # Find admin by email
-        admin = await admins_collection.find_one({"email": login.email})
+        admin = await admins_collection.find_one({"email": login.email}, PROJECTIONS["auth.login"])
         
-        if not admin or not verify_password(login.password, admin["password_hash"]):
+        if not admin or not await verify_password_async(login.password, admin["password_hash"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -169,17 +180,13 @@ async def get_profile(current_user: dict = Depends(verify_token)):
                 detail="Invalid user type"
             )
         
-        user = await collection.find_one({"id": user_id})
+        user = await collection.find_one({"id": user_id}, PROJECTIONS["auth.profile"])
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        # Remove sensitive data
-        user.pop("password_hash", None)
-        user.pop("_id", None)
-        
         return {"user": user, "status": "success"}
         
     except HTTPException:
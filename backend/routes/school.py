@@ -1,12 +1,22 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.responses import ORJSONResponse
 from typing import List, Dict
 from models import (
     ParticipantRegistrationRequest, WinnerSubmissionRequest, 
     TeacherNominationRequest, SchoolDashboardStats,
-    DrawingParticipant, TeacherNomination, DrawingCategory, CompetitionLevel
+    DrawingParticipant, TeacherNomination, DrawingCategory
 )
 from auth import require_school_user
 from database import get_collection, COLLECTIONS
+from projections import PROJECTIONS
+from participants import upsert_participant_counts
+from progression import NEXT_LEVEL
+from response_cache import response_cache, NOMINATIONS_KEY
+from vote_aggregator import vote_aggregator
+from stats import (
+    increment, get_stats, get_school_district, record_registrations,
+    GLOBAL_KEY, school_key, district_key
+)
 import logging
 from datetime import datetime
 
@@ -19,19 +29,13 @@ async def get_school_dashboard(current_user: dict = Depends(require_school_user)
     try:
         school_id = current_user["user_id"]
         
-        # Get drawing participants
-        participants_collection = get_collection(COLLECTIONS["drawing_participants"])
-        participants = await participants_collection.find({"school_id": school_id}).to_list(100)
-        
-        # Get teacher nominations
-        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
-        nominations = await nominations_collection.find({"school_id": school_id}).to_list(100)
+        # Maintained counters: one primary-key lookup
+        stats = await get_stats(school_key(school_id))
         
-        # Calculate stats
-        total_participants = sum(p.get("participant_count", 0) for p in participants)
-        categories_registered = list(set(p.get("category") for p in participants))
-        winners_submitted = sum(1 for p in participants if p.get("winners"))
-        teacher_nominations_count = len(nominations)
+        total_participants = stats.get("participants", 0)
+        categories_registered = stats.get("categories", [])
+        winners_submitted = stats.get("winners_submitted", 0)
+        teacher_nominations_count = stats.get("nominations", 0)
         
         # Determine current competition level
         current_level = "school"  # Default, can be made dynamic based on dates
@@ -59,48 +63,18 @@ async def register_participants(
     """Register participant counts by category"""
     try:
         school_id = current_user["user_id"]
-        participants_collection = get_collection(COLLECTIONS["drawing_participants"])
         
-        registered_participants = []
+        # One bulk upsert keyed on (school_id, category, level)
+        results = await upsert_participant_counts([
+            (school_id, category.value, registration.level.value, count)
+            for category, count in registration.participants.items()
+            if count > 0  # Only register if count is greater than 0
+        ])
         
-        for category, count in registration.participants.items():
-            if count > 0:  # Only register if count is greater than 0
-                # Check if already registered for this category and level
-                existing = await participants_collection.find_one({
-                    "school_id": school_id,
-                    "category": category.value,
-                    "level": registration.level.value
-                })
-                
-                if existing:
-                    # Update existing registration
-                    await participants_collection.update_one(
-                        {"_id": existing["_id"]},
-                        {"$set": {
-                            "participant_count": count,
-                            "updated_at": datetime.utcnow()
-                        }}
-                    )
-                    registered_participants.append({
-                        "category": category.value,
-                        "count": count,
-                        "action": "updated"
-                    })
-                else:
-                    # Create new registration
-                    participant_data = DrawingParticipant(
-                        school_id=school_id,
-                        category=category,
-                        level=registration.level,
-                        participant_count=count
-                    )
-                    
-                    await participants_collection.insert_one(participant_data.dict())
-                    registered_participants.append({
-                        "category": category.value,
-                        "count": count,
-                        "action": "registered"
-                    })
+        registered_participants = [
+            {"category": result["category"], "count": result["count"], "action": result["action"]}
+            for result in results
+        ]
         
         return {
             "message": "Participants registered successfully",
@@ -130,7 +104,7 @@ async def submit_winners(
             "school_id": school_id,
             "category": submission.category.value,
             "level": submission.level.value
-        })
+        }, PROJECTIONS["school.winner_submission"])
         
         if not participant:
             raise HTTPException(
@@ -150,15 +124,14 @@ async def submit_winners(
             }}
         )
         
-        # Create entries for next level if winners advance
-        next_level_map = {
-            CompetitionLevel.SCHOOL: CompetitionLevel.TALUK,
-            CompetitionLevel.TALUK: CompetitionLevel.DISTRICT,
-            CompetitionLevel.DISTRICT: CompetitionLevel.STATE
-        }
+        had_winners = bool(participant.get("winners"))
+        if had_winners != bool(winners_data):
+            await increment({school_key(school_id): {"winners_submitted": 1 if winners_data else -1}})
         
-        if submission.level in next_level_map:
-            next_level = next_level_map[submission.level]
+        # Create entries for next level if winners advance; the admin
+        # progression run later places them in taluk / district brackets
+        if submission.level in NEXT_LEVEL:
+            next_level = NEXT_LEVEL[submission.level]
             advancing_winners = [w for w in submission.winners if w.advances_to_next]
             
             if advancing_winners:
@@ -167,7 +140,7 @@ async def submit_winners(
                     "school_id": school_id,
                     "category": submission.category.value,
                     "level": next_level.value
-                })
+                }, PROJECTIONS["exists"])
                 
                 if not next_level_entry:
                     # Create next level entry
@@ -181,6 +154,13 @@ async def submit_winners(
                     )
                     
                     await participants_collection.insert_one(next_participant.dict())
+                    await record_registrations([{
+                        "school_id": school_id,
+                        "level": next_level.value,
+                        "category": submission.category.value,
+                        "delta": len(advancing_winners),
+                        "created": True
+                    }])
         
         return {
             "message": "Winners submitted successfully",
@@ -228,6 +208,17 @@ async def nominate_teacher(
         result = await nominations_collection.insert_one(nomination_data.dict())
         
         if result.inserted_id:
+            response_cache.invalidate(NOMINATIONS_KEY)
+            
+            district = await get_school_district(school_id)
+            counters = {
+                GLOBAL_KEY: {"nominations": 1},
+                school_key(school_id): {"nominations": 1}
+            }
+            if district:
+                counters[district_key(district)] = {"nominations": 1}
+            await increment(counters)
+            
             return {
                 "message": "Teacher nominated successfully",
                 "nomination_id": nomination_data.id,
@@ -256,18 +247,14 @@ async def get_participants(current_user: dict = Depends(require_school_user)):
         participants_collection = get_collection(COLLECTIONS["drawing_participants"])
         
         participants = await participants_collection.find(
-            {"school_id": school_id}
+            {"school_id": school_id}, PROJECTIONS["school.participants"]
         ).to_list(100)
         
-        # Clean up MongoDB ObjectId
-        for participant in participants:
-            participant.pop("_id", None)
-        
-        return {
+        return ORJSONResponse({
             "participants": participants,
             "count": len(participants),
             "status": "success"
-        }
+        })
         
     except Exception as e:
         logger.error(f"Participants fetch error: {str(e)}")
@@ -284,18 +271,15 @@ async def get_teacher_nominations(current_user: dict = Depends(require_school_us
         nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
         
         nominations = await nominations_collection.find(
-            {"school_id": school_id}
+            {"school_id": school_id}, PROJECTIONS["school.teacher_nominations"]
         ).to_list(100)
+        nominations = await vote_aggregator.with_current_votes(nominations)
         
-        # Clean up MongoDB ObjectId
-        for nomination in nominations:
-            nomination.pop("_id", None)
-        
-        return {
+        return ORJSONResponse({
             "nominations": nominations,
             "count": len(nominations),
             "status": "success"
-        }
+        })
         
     except Exception as e:
         logger.error(f"Nominations fetch error: {str(e)}")
@@ -1,21 +1,48 @@
-from fastapi import APIRouter, HTTPException, status, Request
-from models import VoteRequest, TokenValidationRequest, VotingToken, Vote
+from fastapi import APIRouter, HTTPException, status, Request, Query, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from models import VoteRequest, TokenValidationRequest
+from auth import require_admin_user
 from database import get_collection, COLLECTIONS
+from vote_engine import cast_vote_atomic
+from vote_aggregator import vote_aggregator
+from rate_limit import vote_rate_limiter, VOTE_RATE_LIMIT_ENABLED
+from leaderboard import leaderboard, format_sse
+from enrichment import fetch_schools, school_info
+from projections import PROJECTIONS
+from response_cache import response_cache, results_key, NOMINATIONS_KEY
+from token_format import normalize_voting_token, is_well_formed_token
+from token_generation import generate_tokens, tokens_csv, default_batch_label, BATCH_LABEL_PATTERN
 from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import json
 import logging
 import uuid
 
 router = APIRouter(prefix="/api/voting", tags=["voting"])
 logger = logging.getLogger(__name__)
 
+ACHIEVEMENTS_EXCERPT_LENGTH = 200
+
+def _checked_token(raw_token: str) -> str:
+    """Normalize a token and reject forged or mistyped ones before any DB access"""
+    token = normalize_voting_token(raw_token)
+    if not is_well_formed_token(token):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invalid voting token"
+        )
+    return token
+
 @router.post("/validate-token")
 async def validate_voting_token(token_request: TokenValidationRequest):
     """Validate a voting token"""
     try:
+        token = _checked_token(token_request.token)
         tokens_collection = get_collection(COLLECTIONS["voting_tokens"])
         
         # Find token
-        token_doc = await tokens_collection.find_one({"token": token_request.token.upper()})
+        token_doc = await tokens_collection.find_one({"token": token}, PROJECTIONS["voting.token_validation"])
         
         if not token_doc:
             raise HTTPException(
@@ -37,11 +64,11 @@ async def validate_voting_token(token_request: TokenValidationRequest):
                 detail="This token has expired"
             )
         
-        return {
+        return ORJSONResponse({
             "message": "Token is valid",
             "token": token_request.token,
             "status": "valid"
-        }
+        })
         
     except HTTPException:
         raise
@@ -56,77 +83,31 @@ async def validate_voting_token(token_request: TokenValidationRequest):
 async def cast_vote(vote_request: VoteRequest, request: Request):
     """Cast a vote using token"""
     try:
-        tokens_collection = get_collection(COLLECTIONS["voting_tokens"])
-        votes_collection = get_collection(COLLECTIONS["votes"])
-        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
-        
-        # Validate token first
-        token_doc = await tokens_collection.find_one({"token": vote_request.token.upper()})
-        
-        if not token_doc:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Invalid voting token"
-            )
-        
-        if token_doc.get("is_used", False):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This token has already been used"
-            )
-        
-        if datetime.utcnow() > token_doc.get("expires_at"):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This token has expired"
-            )
-        
-        # Check if nomination exists
-        nomination = await nominations_collection.find_one({"id": vote_request.nomination_id})
-        if not nomination:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Nomination not found"
-            )
-        
         # Get client IP
         client_ip = request.client.host
-        user_agent = request.headers.get("user-agent", "")
         
-        # Create vote record
-        vote_data = Vote(
-            token_id=token_doc["id"],
-            nomination_id=vote_request.nomination_id,
-            ip_address=client_ip,
-            user_agent=user_agent
-        )
+        # Turn away bursts from one address or subnet before any token work;
+        # with VOTE_RATE_LIMIT_SHARED this adds 3 Mongo round trips per vote
+        if VOTE_RATE_LIMIT_ENABLED:
+            await vote_rate_limiter.hit(client_ip)
         
-        # Insert vote
-        await votes_collection.insert_one(vote_data.dict())
-        
-        # Mark token as used
-        await tokens_collection.update_one(
-            {"_id": token_doc["_id"]},
-            {"$set": {
-                "is_used": True,
-                "nomination_id": vote_request.nomination_id,
-                "voted_at": datetime.utcnow(),
-                "ip_address": client_ip
-            }}
-        )
+        token = _checked_token(vote_request.token)
+        user_agent = request.headers.get("user-agent", "")
         
-        # Update nomination vote count
-        await nominations_collection.update_one(
-            {"id": vote_request.nomination_id},
-            {"$inc": {"public_votes": 1}}
+        # Claim the token and record the vote atomically
+        vote_data = await cast_vote_atomic(
+            token,
+            vote_request.nomination_id,
+            client_ip,
+            user_agent
         )
         
-        return {
+        return ORJSONResponse({
             "message": "Vote cast successfully",
             "vote_id": vote_data.id,
             "nomination_id": vote_request.nomination_id,
             "status": "success"
-        }
+        })
         
     except HTTPException:
         raise
@@ -137,28 +118,37 @@ async def cast_vote(vote_request: VoteRequest, request: Request):
             detail="Failed to cast vote"
         )
 
+async def _build_voting_results(nomination_id: str) -> dict:
+    nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+    
+    nomination = await nominations_collection.find_one({"id": nomination_id}, PROJECTIONS["voting.results"])
+    
+    if not nomination:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nomination not found"
+        )
+    
+    votes = await vote_aggregator.current_votes([{**nomination, "id": nomination_id}])
+    
+    return {
+        "nomination_id": nomination_id,
+        "teacher_name": nomination.get("teacher_name"),
+        "category": nomination.get("category"),
+        "award_type": nomination.get("award_type"),
+        "public_votes": votes[nomination_id],
+        "status": nomination.get("status", "nominated")
+    }
+
 @router.get("/results/{nomination_id}")
-async def get_voting_results(nomination_id: str):
+async def get_voting_results(nomination_id: str, request: Request):
     """Get voting results for a specific nomination"""
     try:
-        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
-        
-        nomination = await nominations_collection.find_one({"id": nomination_id})
-        
-        if not nomination:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Nomination not found"
-            )
-        
-        return {
-            "nomination_id": nomination_id,
-            "teacher_name": nomination.get("teacher_name"),
-            "category": nomination.get("category"),
-            "award_type": nomination.get("award_type"),
-            "public_votes": nomination.get("public_votes", 0),
-            "status": nomination.get("status", "nominated")
-        }
+        return await response_cache.serve(
+            request,
+            results_key(nomination_id),
+            lambda: _build_voting_results(nomination_id)
+        )
         
     except HTTPException:
         raise
@@ -169,44 +159,53 @@ async def get_voting_results(nomination_id: str):
             detail="Failed to fetch voting results"
         )
 
+async def _build_nominations_for_voting() -> dict:
+    nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+    
+    # Get all active nominations, trimming achievements to an excerpt
+    # on the server instead of shipping the full text
+    nominations = await nominations_collection.aggregate([
+        {"$match": {"status": {"$in": ["nominated", "shortlisted"]}}},
+        {"$limit": 100},
+        {"$project": {
+            **PROJECTIONS["voting.nominations"],
+            "achievements": {"$substrCP": [{"$ifNull": ["$achievements", ""]}, 0, ACHIEVEMENTS_EXCERPT_LENGTH + 1]}
+        }}
+    ]).to_list(100)
+    
+    # Enrich with school information and current vote counts
+    schools = await fetch_schools(n.get("school_id") for n in nominations)
+    votes = await vote_aggregator.current_votes(nominations)
+    enriched_nominations = []
+    for nomination in nominations:
+        school = school_info(schools, nomination.get("school_id"))
+        
+        nomination_info = {
+            "nomination_id": nomination.get("id"),
+            "teacher_name": nomination.get("teacher_name"),
+            "category": nomination.get("category"),
+            "award_type": nomination.get("award_type"),
+            "school_name": school["school_name"],
+            "district": school["district"],
+            "experience_years": nomination.get("experience_years"),
+            "current_position": nomination.get("current_position"),
+            "achievements": nomination.get("achievements", "")[:ACHIEVEMENTS_EXCERPT_LENGTH] + "..." if len(nomination.get("achievements", "")) > ACHIEVEMENTS_EXCERPT_LENGTH else nomination.get("achievements", ""),
+            "public_votes": votes[nomination.get("id")],
+            "status": nomination.get("status", "nominated")
+        }
+        enriched_nominations.append(nomination_info)
+    
+    return {
+        "nominations": enriched_nominations,
+        "count": len(enriched_nominations),
+        "status": "success"
+    }
+
 @router.get("/nominations")
-async def get_nominations_for_voting():
+async def get_nominations_for_voting(request: Request):
     """Get all nominations available for public voting"""
     try:
-        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
-        schools_collection = get_collection(COLLECTIONS["schools"])
-        
-        # Get all active nominations
-        nominations = await nominations_collection.find(
-            {"status": {"$in": ["nominated", "shortlisted"]}}
-        ).to_list(100)
-        
-        # Enrich with school information
-        enriched_nominations = []
-        for nomination in nominations:
-            # Get school details
-            school = await schools_collection.find_one({"id": nomination.get("school_id")})
-            
-            nomination_info = {
-                "nomination_id": nomination.get("id"),
-                "teacher_name": nomination.get("teacher_name"),
-                "category": nomination.get("category"),
-                "award_type": nomination.get("award_type"),
-                "school_name": school.get("school_name") if school else "Unknown School",
-                "district": school.get("district") if school else "Unknown District",
-                "experience_years": nomination.get("experience_years"),
-                "current_position": nomination.get("current_position"),
-                "achievements": nomination.get("achievements", "")[:200] + "..." if len(nomination.get("achievements", "")) > 200 else nomination.get("achievements", ""),
-                "public_votes": nomination.get("public_votes", 0),
-                "status": nomination.get("status", "nominated")
-            }
-            enriched_nominations.append(nomination_info)
-        
-        return {
-            "nominations": enriched_nominations,
-            "count": len(enriched_nominations),
-            "status": "success"
-        }
+        return await response_cache.serve(request, NOMINATIONS_KEY, _build_nominations_for_voting)
         
     except Exception as e:
         logger.error(f"Nominations fetch error: {str(e)}")
@@ -215,30 +214,63 @@ async def get_nominations_for_voting():
             detail="Failed to fetch nominations"
         )
 
-# Admin endpoint to generate voting tokens (will be moved to admin routes later)
+@router.get("/stream")
+async def stream_leaderboard(request: Request):
+    """Push live vote counts per category as Server-Sent Events"""
+    queue = leaderboard.subscribe()
+    
+    async def event_stream():
+        try:
+            yield format_sse("snapshot", json.dumps(leaderboard.snapshot()))
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keep idle connections open through proxies
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse("update", payload)
+        finally:
+            leaderboard.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Admin endpoint to generate voting tokens (will be moved to admin routes later).
+# Larger batches go through the /admin/voting-tokens/generate background job.
+MAX_INLINE_TOKENS = 10_000
+
 @router.post("/generate-tokens")
-async def generate_voting_tokens(count: int = 100):
+async def generate_voting_tokens(
+    count: int = Query(100, ge=1, le=MAX_INLINE_TOKENS),
+    format: str = Query("json", pattern="^(json|csv)$"),
+    batch_label: Optional[str] = Query(None, pattern=BATCH_LABEL_PATTERN),
+    current_user: dict = Depends(require_admin_user)
+):
     """Generate voting tokens (Admin only - temporary endpoint)"""
     try:
-        tokens_collection = get_collection(COLLECTIONS["voting_tokens"])
-        
-        # Generate tokens
-        tokens = []
         expires_at = datetime.utcnow() + timedelta(days=90)  # 90 days validity
+        batch_label = batch_label or default_batch_label()
         
-        for _ in range(count):
-            token_data = VotingToken(expires_at=expires_at)
-            tokens.append(token_data.dict())
-        
-        # Insert tokens
-        result = await tokens_collection.insert_many(tokens)
+        if format == "csv":
+            return StreamingResponse(
+                tokens_csv(count, expires_at, batch_label),
+                media_type="text/csv",
+                headers={"Content-Disposition": f'attachment; filename="{batch_label}.csv"'}
+            )
         
-        # Return generated tokens
-        generated_tokens = [token["token"] for token in tokens]
+        # Generate and insert tokens chunk by chunk
+        generated_tokens = []
+        async for chunk in generate_tokens(count, expires_at, batch_label):
+            generated_tokens.extend(token["token"] for token in chunk)
         
         return {
             "message": f"Generated {count} voting tokens",
             "tokens": generated_tokens,
+            "batch_label": batch_label,
             "expires_at": expires_at.isoformat(),
             "status": "success"
         }
@@ -248,4 +280,4 @@ async def generate_voting_tokens(count: int = 100):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate tokens"
-        )
\ No newline at end of file
+        )
@@ -1,24 +1,44 @@
 from fastapi import FastAPI, APIRouter
+from fastapi.responses import ORJSONResponse, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 import uuid
 from datetime import datetime
 
 # Import our new modules
-from database import connect_to_mongo, close_mongo_connection
+from database import connect_to_mongo, close_mongo_connection, ping, db
+from vote_aggregator import vote_aggregator, recover_public_votes, RECOVER_ON_STARTUP
+from sharded_counters import vote_counter
+from vote_engine import claim_sweeper
+from leaderboard import leaderboard
+from jobs import job_runner
+from metrics import MetricsMiddleware, render_metrics
+from slow_queries import slow_query_listener, slow_query_recorder
+from stats import ensure_stats
 from routes import auth, school, voting, admin
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+HEALTH_PING_TIMEOUT_S = float(os.getenv("HEALTH_PING_TIMEOUT_S", "2"))
+
+# Startup vote counter recovery, run in the background while serving
+recovery_task: Optional[asyncio.Task] = None
+
 # Create the main app without a prefix
-app = FastAPI(title="Ignite & Inspire Karnataka", version="1.0.0")
+# orjson serializes responses (datetimes included) much faster than json
+app = FastAPI(
+    title="Ignite & Inspire Karnataka",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -28,6 +48,26 @@ api_router = APIRouter(prefix="/api")
 async def root():
     return {"message": "Ignite & Inspire Karnataka API", "status": "running"}
 
+@api_router.get("/health")
+async def health():
+    """Load balancer check: 200 only when started up and MongoDB answers a ping"""
+    body = {
+        "status": "ok",
+        "ready": db.ready,
+        "db_latency_ms": None,
+        "pool": db.pool_metrics.snapshot() if db.pool_metrics else {}
+    }
+    try:
+        body["db_latency_ms"] = round(await asyncio.wait_for(ping(), HEALTH_PING_TIMEOUT_S), 2)
+    except Exception as e:
+        # Connection details stay in the log, not the public response
+        logger.warning(f"Health check ping failed: {str(e)}")
+        body["status"] = "unavailable"
+        body["error"] = type(e).__name__
+    if not db.ready and body["status"] == "ok":
+        body["status"] = "starting"
+    return ORJSONResponse(body, status_code=200 if body["status"] == "ok" else 503)
+
 # Include all route modules
 app.include_router(auth.router)
 app.include_router(school.router) 
@@ -37,6 +77,14 @@ app.include_router(admin.router)
 # Include the original API router
 app.include_router(api_router)
 
+# Prometheus scrape endpoint, outside /api like a standard exporter
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    payload, content_type = render_metrics()
+    return Response(payload, media_type=content_type)
+
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -54,10 +102,36 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_db_client():
-    await connect_to_mongo()
+    global recovery_task
+    await connect_to_mongo(event_listeners=[slow_query_listener])
+    await slow_query_recorder.start()
+    await ensure_stats()
+    vote_aggregator.start()
+    if RECOVER_ON_STARTUP:
+        # Votes arriving meanwhile are held back by the rebuild guard
+        recovery_task = asyncio.create_task(recover_public_votes())
+    vote_counter.start()
+    claim_sweeper.start()
+    await leaderboard.start()
+    await job_runner.start()
+    db.ready = True
     logger.info("Application startup complete")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Fail health checks first so the load balancer stops routing here
+    db.ready = False
+    if recovery_task is not None:
+        recovery_task.cancel()
+        try:
+            await recovery_task
+        except asyncio.CancelledError:
+            pass
+    await job_runner.stop()
+    await leaderboard.stop()
+    await vote_aggregator.stop()
+    await vote_counter.stop()
+    await claim_sweeper.stop()
+    await slow_query_recorder.stop()
     await close_mongo_connection()
     logger.info("Application shutdown complete")
@@ -0,0 +1,291 @@
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from database import get_collection, COLLECTIONS
+from cache import TTLCache
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import asyncio
+import logging
+import math
+import os
+import random
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MAX_SHARDS = int(os.getenv("VOTE_COUNTER_MAX_SHARDS", "16"))
+# Observed votes per second one shard document is expected to absorb
+VOTES_PER_SHARD_PER_S = float(os.getenv("VOTE_COUNTER_VOTES_PER_SHARD_PER_S", "20"))
+# How long a cached shard sum may be served; also bounds how stale other
+# workers' reads can be after this process writes
+READ_CACHE_TTL_S = float(os.getenv("VOTE_COUNTER_READ_CACHE_TTL_S", "1"))
+FOLD_INTERVAL_S = int(os.getenv("VOTE_COUNTER_FOLD_INTERVAL_S", "60"))
+FOLD_BATCH_SIZE = 1000
+# A folding worker that dies is replaced once its lease runs out
+FOLD_LEASE_S = 2 * FOLD_INTERVAL_S
+FOLD_LEASE_ID = "vote_counter_fold"
+READ_CACHE_SIZE = 10000
+RATE_SMOOTHING = 0.3
+# Write rates not refreshed for this long are forgotten
+RATE_IDLE_S = 300
+
+def shard_id(nomination_id: str, shard: int) -> str:
+    return f"{nomination_id}:{shard}"
+
+class ShardedVoteCounter:
+    """Spreads vote increments for a nomination over K shard documents.
+
+    A nomination's vote count is its folded ``public_votes`` plus the sum
+    of its rows in ``vote_counter_shards``. K grows with the write rate this
+    process observes for the nomination, so a viral teacher's increments
+    land on up to MAX_SHARDS documents instead of serializing on one.
+    Readers always sum every shard, so K can change at any time. A
+    background fold moves shard counts into ``public_votes`` to keep the
+    shard collection small and the stored counter close to current; each
+    fold batch is journaled on the fold lease so a crash mid-batch is
+    replayed by whoever takes the lease next.
+    """
+
+    def __init__(self, max_shards: int = MAX_SHARDS, votes_per_shard: float = VOTES_PER_SHARD_PER_S):
+        self.max_shards = max_shards
+        self.votes_per_shard = votes_per_shard
+        # nomination_id -> (smoothed votes per second, last write time)
+        self._rates: Dict[str, tuple] = {}
+        self._sums = TTLCache(maxsize=READ_CACHE_SIZE, ttl=READ_CACHE_TTL_S)
+        self.worker_id = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+
+    def _observe(self, nomination_id: str, delta: int, now: float, min_interval: float) -> float:
+        rate, last = self._rates.get(nomination_id, (0.0, None))
+        if last is not None:
+            instant = delta / max(now - last, min_interval)
+            rate = RATE_SMOOTHING * instant + (1 - RATE_SMOOTHING) * rate
+        self._rates[nomination_id] = (rate, now)
+        return rate
+
+    def shards_for(self, nomination_id: str) -> int:
+        """Current shard count K for a nomination"""
+        rate = self._rates.get(nomination_id, (0.0, None))[0]
+        return max(1, min(self.max_shards, math.ceil(rate / self.votes_per_shard)))
+
+    async def add(self, deltas: Dict[str, int], interval: float):
+        """Apply a batch of per-nomination deltas collected over ``interval`` seconds"""
+        now = time.monotonic()
+        operations = []
+        for nomination_id, delta in deltas.items():
+            self._observe(nomination_id, delta, now, interval)
+            shard = random.randrange(self.shards_for(nomination_id))
+            operations.append(UpdateOne(
+                {"_id": shard_id(nomination_id, shard)},
+                {"$inc": {"count": delta}, "$setOnInsert": {"nomination_id": nomination_id, "shard": shard}},
+                upsert=True
+            ))
+
+        shards_collection = get_collection(COLLECTIONS["vote_counter_shards"])
+        await shards_collection.bulk_write(operations, ordered=False)
+        for nomination_id in deltas:
+            self._sums.pop(nomination_id)
+
+    async def shard_sums(self, nomination_ids: Iterable[str]) -> Dict[str, int]:
+        """Unfolded votes per nomination, from the read cache where possible"""
+        sums, missing = {}, []
+        for nomination_id in dict.fromkeys(nomination_ids):
+            cached = self._sums.get(nomination_id)
+            if cached is None:
+                missing.append(nomination_id)
+            else:
+                sums[nomination_id] = cached
+
+        if missing:
+            fetched = dict.fromkeys(missing, 0)
+            shards_collection = get_collection(COLLECTIONS["vote_counter_shards"])
+            async for row in shards_collection.aggregate([
+                {"$match": {"nomination_id": {"$in": missing}}},
+                {"$group": {"_id": "$nomination_id", "count": {"$sum": "$count"}}}
+            ]):
+                fetched[row["_id"]] = row["count"]
+            for nomination_id, count in fetched.items():
+                self._sums.set(nomination_id, count)
+            sums.update(fetched)
+        return sums
+
+    async def all_shard_sums(self) -> Dict[str, int]:
+        """Unfolded votes for every nomination that has any, bypassing the cache"""
+        shards_collection = get_collection(COLLECTIONS["vote_counter_shards"])
+        sums = {}
+        async for row in shards_collection.aggregate([
+            {"$group": {"_id": "$nomination_id", "count": {"$sum": "$count"}}}
+        ]):
+            sums[row["_id"]] = row["count"]
+        return sums
+
+    async def take_fold_lease(self, holder: str, seconds: float = FOLD_LEASE_S) -> bool:
+        """Claim or renew the fold lease; False while someone else holds it.
+
+        A fold journal left behind by a holder that died is replayed first.
+        """
+        now = datetime.utcnow()
+        locks_collection = get_collection(COLLECTIONS["locks"])
+        try:
+            lease = await locks_collection.find_one_and_update(
+                {"_id": FOLD_LEASE_ID, "$or": [{"holder": holder}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": holder, "expires_at": now + timedelta(seconds=seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            return False
+        if lease and lease.get("journal"):
+            logger.warning(f"Replaying interrupted vote fold {lease['journal']['batch']}")
+            await self._apply_journal(lease["journal"])
+        return True
+
+    async def release_fold_lease(self, holder: str):
+        locks_collection = get_collection(COLLECTIONS["locks"])
+        released = await locks_collection.delete_one(
+            {"_id": FOLD_LEASE_ID, "holder": holder, "journal": {"$exists": False}}
+        )
+        if not released.deleted_count:
+            # Keep an unfinished journal for the next holder, but let it in now
+            await locks_collection.update_one(
+                {"_id": FOLD_LEASE_ID, "holder": holder},
+                {"$set": {"expires_at": datetime.utcnow()}}
+            )
+
+    async def _apply_journal(self, journal: dict):
+        """Apply a journaled fold batch; safe to repeat, then clears the journal.
+
+        Shards remember the last batch that decremented them, and each
+        nomination's counter is only moved from its journaled old value.
+        """
+        shards_collection = get_collection(COLLECTIONS["vote_counter_shards"])
+        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+        locks_collection = get_collection(COLLECTIONS["locks"])
+        batch = journal["batch"]
+
+        await shards_collection.bulk_write([
+            UpdateOne(
+                {"_id": shard_id, "fold_batch": {"$ne": batch}},
+                {"$inc": {"count": -count}, "$set": {"fold_batch": batch}}
+            )
+            for shard_id, count in journal["shards"]
+        ], ordered=False)
+        if journal["votes"]:
+            await nominations_collection.bulk_write([
+                UpdateOne({"id": nomination_id, "public_votes": before}, {"$set": {"public_votes": after}})
+                for nomination_id, before, after in journal["votes"]
+            ], ordered=False)
+        await locks_collection.update_one(
+            {"_id": FOLD_LEASE_ID, "journal.batch": batch}, {"$unset": {"journal": ""}}
+        )
+        for nomination_id, _, _ in journal["votes"]:
+            self._sums.pop(nomination_id)
+
+    async def _fold_batch(self, shards: List[dict]) -> int:
+        nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+        locks_collection = get_collection(COLLECTIONS["locks"])
+
+        moved: Dict[str, int] = {}
+        for shard in shards:
+            moved[shard["nomination_id"]] = moved.get(shard["nomination_id"], 0) + shard["count"]
+        before = {}
+        async for nomination in nominations_collection.find(
+            {"id": {"$in": list(moved)}}, {"_id": 0, "id": 1, "public_votes": 1}
+        ):
+            before[nomination["id"]] = nomination.get("public_votes", 0)
+
+        journal = {
+            "batch": str(uuid.uuid4()),
+            "shards": [[shard["_id"], shard["count"]] for shard in shards],
+            # Votes for nominations that no longer exist are dropped
+            "votes": [
+                [nomination_id, before[nomination_id], before[nomination_id] + count]
+                for nomination_id, count in moved.items() if nomination_id in before
+            ]
+        }
+        journaled = await locks_collection.update_one(
+            {"_id": FOLD_LEASE_ID, "holder": self.worker_id}, {"$set": {"journal": journal}}
+        )
+        if not journaled.matched_count:
+            raise RuntimeError("Lost the vote fold lease")
+        await self._apply_journal(journal)
+        return sum(count for nomination_id, count in moved.items() if nomination_id in before)
+
+    async def fold(self) -> int:
+        """Move shard counts into each nomination's public_votes.
+
+        Every shard is decremented by exactly the amount added to its
+        nomination, so a nomination's total is unchanged whatever else
+        writes to the shard meanwhile. Readers may undercount for the one
+        round trip between a batch's two bulk writes. Each batch is
+        journaled on the lease first, and whoever takes the lease next
+        replays it if the holder dies mid-batch. Folds and rebuilds take
+        turns under the lease. Returns the votes moved.
+        """
+        if not await self.take_fold_lease(self.worker_id):
+            return 0
+
+        shards_collection = get_collection(COLLECTIONS["vote_counter_shards"])
+        moved, batch = 0, []
+        try:
+            cursor = shards_collection.find(
+                {"count": {"$ne": 0}}, {"nomination_id": 1, "count": 1}
+            ).batch_size(FOLD_BATCH_SIZE)
+            async for shard in cursor:
+                batch.append(shard)
+                if len(batch) >= FOLD_BATCH_SIZE:
+                    moved += await self._fold_batch(batch)
+                    batch = []
+                    if not await self.take_fold_lease(self.worker_id):
+                        return moved
+            if batch:
+                moved += await self._fold_batch(batch)
+            # Emptied shards are recreated by the next upsert if still needed
+            await shards_collection.delete_many({"count": 0})
+        finally:
+            await self.release_fold_lease(self.worker_id)
+
+        now = time.monotonic()
+        self._rates = {
+            nomination_id: entry for nomination_id, entry in self._rates.items()
+            if now - entry[1] < RATE_IDLE_S
+        }
+        return moved
+
+    async def recover(self):
+        """Replay a fold interrupted by a crash, if its lease has run out"""
+        if await self.take_fold_lease(self.worker_id):
+            await self.release_fold_lease(self.worker_id)
+
+    async def _run(self):
+        try:
+            await self.recover()
+        except Exception as e:
+            logger.error(f"Vote counter fold recovery error: {str(e)}")
+        # Jitter so workers started together don't race for the lease
+        await asyncio.sleep(random.uniform(0, FOLD_INTERVAL_S))
+        while True:
+            try:
+                moved = await self.fold()
+                if moved:
+                    logger.info(f"Folded {moved} sharded votes into public_votes")
+            except Exception as e:
+                logger.error(f"Vote counter fold error: {str(e)}")
+            await asyncio.sleep(FOLD_INTERVAL_S)
+
+    def start(self):
+        """Start the periodic fold loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+vote_counter = ShardedVoteCounter()
@@ -0,0 +1,208 @@
+from pymongo import monitoring, DESCENDING
+from pymongo.errors import CollectionInvalid
+from database import get_database, get_collection, plan_stages, COLLECTIONS
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import orjson
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+# Each distinct query shape is explained at most once per interval
+SLOW_QUERY_EXPLAIN_INTERVAL_S = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_S", "300"))
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", str(16 * 1024 * 1024)))
+DRAIN_INTERVAL_S = 1.0
+MAX_BUFFERED = 1000
+
+# Command name -> fields that make up its shape (and its explain)
+SHAPE_FIELDS = {
+    "find": ("filter", "sort"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+# Session / transport fields that explain() rejects or does not need
+EXPLAIN_SKIP_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+def query_shape(value):
+    """Replace literal values with "?" so queries differing only in values group together"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return ["?"] if value else []
+        return [query_shape(item) for item in value]
+    return "?"
+
+def _command_shape(command_name: str, command: dict) -> dict:
+    shape = {}
+    for field in SHAPE_FIELDS[command_name]:
+        if field not in command:
+            continue
+        if field in ("updates", "deletes"):
+            # Shape of the first statement's filter
+            statements = command[field]
+            shape["filter"] = query_shape(statements[0].get("q", {}) if statements else {})
+        elif field in ("sort", "key"):
+            shape[field] = command[field]
+        else:
+            shape[field] = query_shape(command[field])
+    return shape
+
+def _explain_command(command_name: str, command: dict) -> dict:
+    explain = {
+        key: value for key, value in command.items()
+        if not key.startswith("$") and key not in EXPLAIN_SKIP_FIELDS
+    }
+    # Explaining one write statement is enough to see its plan
+    for field in ("updates", "deletes"):
+        if field in explain:
+            explain[field] = explain[field][:1]
+    if command_name == "aggregate":
+        explain["cursor"] = {}
+    return explain
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Buffers commands slower than the threshold for the async recorder"""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS):
+        self.threshold_ms = threshold_ms
+        # Runs on driver threads; the deque is all it shares with the event loop
+        self.buffer = deque(maxlen=MAX_BUFFERED)
+        self._started: Dict[Tuple, Tuple[str, dict]] = {}
+
+    def started(self, event):
+        if event.command_name not in SHAPE_FIELDS:
+            return
+        if event.command.get(event.command_name) == COLLECTIONS["slow_queries"]:
+            return
+        self._started[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started and duration_ms >= self.threshold_ms:
+            database_name, command = started
+            self.buffer.append((datetime.utcnow(), database_name, event.command_name, command, duration_ms))
+
+    def failed(self, event):
+        self._started.pop((event.connection_id, event.request_id), None)
+
+class SlowQueryRecorder:
+    """Stores the shapes of buffered slow commands, never their values, with sampled explains"""
+
+    def __init__(self, listener: SlowQueryListener):
+        self.listener = listener
+        self._explained_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _explain(self, database_name: str, command_name: str, command: dict) -> Optional[dict]:
+        try:
+            result = await get_database().client[database_name].command({
+                "explain": _explain_command(command_name, command),
+                "verbosity": "queryPlanner"
+            })
+        except Exception as e:
+            return {"error": str(e)}
+        stages = plan_stages(result)
+        return {"stages": stages, "collscan": "COLLSCAN" in stages}
+
+    async def drain(self) -> int:
+        """Write out everything buffered so far"""
+        entries = []
+        while self.listener.buffer:
+            at, database_name, command_name, command, duration_ms = self.listener.buffer.popleft()
+            collection = command.get(command_name)
+            shape = orjson.dumps(_command_shape(command_name, command), option=orjson.OPT_SORT_KEYS).decode()
+            shape_key = f"{collection}.{command_name}:{shape}"
+
+            entry = {
+                "at": at,
+                "collection": collection,
+                "command": command_name,
+                "shape": shape,
+                "duration_ms": round(duration_ms, 3),
+                "explain": None
+            }
+            now = time.monotonic()
+            if now - self._explained_at.get(shape_key, float("-inf")) >= SLOW_QUERY_EXPLAIN_INTERVAL_S:
+                self._explained_at[shape_key] = now
+                entry["explain"] = await self._explain(database_name, command_name, command)
+            entries.append(entry)
+
+        if entries:
+            await get_collection(COLLECTIONS["slow_queries"]).insert_many(entries, ordered=False)
+        return len(entries)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(DRAIN_INTERVAL_S)
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.error(f"Slow query log error: {str(e)}")
+
+    async def start(self):
+        """Create the capped log collection if needed and start draining"""
+        try:
+            await get_database().create_collection(
+                COLLECTIONS["slow_queries"], capped=True, size=SLOW_QUERY_LOG_BYTES
+            )
+        except CollectionInvalid:
+            pass
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.drain()
+        except Exception as e:
+            logger.error(f"Slow query log error: {str(e)}")
+
+slow_query_listener = SlowQueryListener()
+slow_query_recorder = SlowQueryRecorder(slow_query_listener)
+
+async def top_slow_queries(limit: int = 20, since: Optional[datetime] = None) -> List[dict]:
+    """Query shapes ranked by total time spent in slow executions"""
+    match = {"at": {"$gte": since}} if since else {}
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"at": 1}},
+        {"$group": {
+            "_id": {"collection": "$collection", "command": "$command", "shape": "$shape"},
+            "count": {"$sum": 1},
+            "total_ms": {"$sum": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "avg_ms": {"$avg": "$duration_ms"},
+            "last_seen": {"$last": "$at"},
+            "explains": {"$push": "$explain"}
+        }},
+        {"$sort": {"total_ms": DESCENDING}},
+        {"$limit": limit}
+    ]
+    results = []
+    async for row in get_collection(COLLECTIONS["slow_queries"]).aggregate(pipeline):
+        explains = [explain for explain in row.pop("explains") if explain]
+        results.append({
+            **row.pop("_id"),
+            **row,
+            "total_ms": round(row["total_ms"], 3),
+            "avg_ms": round(row["avg_ms"], 3),
+            "latest_explain": explains[-1] if explains else None
+        })
+    return results
@@ -0,0 +1,252 @@
+from pymongo import UpdateOne, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from database import get_collection, COLLECTIONS
+from cache import TTLCache
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Counter document ids in the stats collection
+GLOBAL_KEY = "global"
+# Lease in the locks collection held while a missing stats collection is built
+REBUILD_LEASE_ID = "stats_rebuild"
+REBUILD_LEASE_S = 600
+
+def school_key(school_id: str) -> str:
+    return f"school:{school_id}"
+
+def district_key(district: str) -> str:
+    return f"district:{district}"
+
+# School -> district is effectively immutable, so cache it for write paths
+_district_cache = TTLCache(maxsize=50000, ttl=3600)
+
+async def get_school_districts(school_ids: Iterable[str]) -> Dict[str, str]:
+    """Districts for many schools, cached in process and fetched with one $in"""
+    districts = {}
+    missing = []
+    for school_id in set(school_ids):
+        district = _district_cache.get(school_id)
+        if district is None:
+            missing.append(school_id)
+        else:
+            districts[school_id] = district
+
+    if missing:
+        schools_collection = get_collection(COLLECTIONS["schools"])
+        cursor = schools_collection.find({"id": {"$in": missing}}, {"_id": 0, "id": 1, "district": 1})
+        async for school in cursor:
+            if school.get("district") is not None:
+                districts[school["id"]] = school["district"]
+                _district_cache.set(school["id"], school["district"])
+
+    return districts
+
+async def get_school_district(school_id: str) -> Optional[str]:
+    """District of a school, cached in process"""
+    return (await get_school_districts([school_id])).get(school_id)
+
+async def increment(counters: Dict[str, Dict[str, int]], categories: Optional[Dict[str, List[str]]] = None):
+    """Apply counter deltas (and category sets) to stats documents in one bulk write.
+
+    ``counters`` maps a stats document id to ``{field: delta}``; dotted
+    fields such as ``competitions_by_level.school`` are allowed.
+    """
+    categories = categories or {}
+    operations = []
+    for key in set(counters) | set(categories):
+        update = {}
+        deltas = {field: delta for field, delta in counters.get(key, {}).items() if delta}
+        if deltas:
+            update["$inc"] = deltas
+        if categories.get(key):
+            update["$addToSet"] = {"categories": {"$each": categories[key]}}
+        if update:
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+
+    if not operations:
+        return
+
+    stats_collection = get_collection(COLLECTIONS["stats"])
+    try:
+        await stats_collection.bulk_write(operations, ordered=False)
+    except Exception as e:
+        # Counters are derived data; rebuild_stats() repairs any drift
+        logger.error(f"Stats update error: {str(e)}")
+
+async def record_registrations(changes: List[dict]):
+    """Update counters for participant registrations in one bulk write.
+
+    Each change is ``{"school_id", "level", "category", "delta", "created"}``
+    where ``delta`` is the change in participant_count and ``created`` marks
+    a new entry; an optional ``removed`` marks a deleted one.
+    """
+    if not changes:
+        return
+
+    districts = await get_school_districts(change["school_id"] for change in changes)
+    counters: Dict[str, Dict[str, int]] = {}
+    categories: Dict[str, List[str]] = {}
+
+    def add(key: str, field: str, value: int):
+        fields = counters.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + value
+
+    for change in changes:
+        delta, level = change["delta"], change["level"]
+        add(GLOBAL_KEY, "participants", delta)
+        add(GLOBAL_KEY, f"participants_by_level.{level}", delta)
+        if change["created"]:
+            add(GLOBAL_KEY, f"competitions_by_level.{level}", 1)
+        if change.get("removed"):
+            add(GLOBAL_KEY, f"competitions_by_level.{level}", -1)
+        add(school_key(change["school_id"]), "participants", delta)
+        categories.setdefault(school_key(change["school_id"]), []).append(change["category"])
+        district = districts.get(change["school_id"])
+        if district:
+            add(district_key(district), "participants", delta)
+
+    await increment(counters, categories)
+
+async def get_stats(key: str) -> dict:
+    """Single primary-key read of a stats document"""
+    stats_collection = get_collection(COLLECTIONS["stats"])
+    return await stats_collection.find_one({"_id": key}) or {}
+
+async def rebuild_stats() -> int:
+    """Recompute every stats document from the raw collections.
+
+    Writes made while the rebuild runs may be missed; run it again or at a
+    quiet time if exact counts matter. Returns the number of documents written.
+    """
+    schools_collection = get_collection(COLLECTIONS["schools"])
+    participants_collection = get_collection(COLLECTIONS["drawing_participants"])
+    nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+    evaluators_collection = get_collection(COLLECTIONS["evaluators"])
+    votes_collection = get_collection(COLLECTIONS["votes"])
+    stats_collection = get_collection(COLLECTIONS["stats"])
+
+    docs: Dict[str, dict] = {}
+
+    def doc(key: str) -> dict:
+        return docs.setdefault(key, {"_id": key})
+
+    def add(key: str, field: str, value: int):
+        target = doc(key)
+        target[field] = target.get(field, 0) + value
+
+    doc(GLOBAL_KEY).update({
+        "schools": 0, "participants": 0, "nominations": 0, "evaluators": 0, "votes": 0,
+        "competitions_by_level": {}, "participants_by_level": {}
+    })
+
+    districts = {}
+    async for school in schools_collection.find({}, {"_id": 0, "id": 1, "district": 1, "is_active": 1}):
+        districts[school["id"]] = school.get("district")
+        if school.get("is_active", True):
+            add(GLOBAL_KEY, "schools", 1)
+            if school.get("district"):
+                add(district_key(school["district"]), "schools", 1)
+
+    participants_pipeline = [
+        {"$facet": {
+            "by_school": [
+                {"$group": {
+                    "_id": "$school_id",
+                    "participants": {"$sum": "$participant_count"},
+                    "categories": {"$addToSet": "$category"},
+                    "winners_submitted": {"$sum": {
+                        "$cond": [{"$gt": [{"$size": {"$ifNull": ["$winners", []]}}, 0]}, 1, 0]
+                    }}
+                }}
+            ],
+            "by_level": [
+                {"$group": {
+                    "_id": "$level",
+                    "count": {"$sum": 1},
+                    "participants": {"$sum": "$participant_count"}
+                }}
+            ]
+        }}
+    ]
+    facets = await participants_collection.aggregate(participants_pipeline).to_list(1)
+    facet = facets[0] if facets else {}
+
+    for row in facet.get("by_school", []):
+        key = school_key(row["_id"])
+        doc(key).update({
+            "participants": row["participants"],
+            "categories": row["categories"],
+            "winners_submitted": row["winners_submitted"]
+        })
+        add(GLOBAL_KEY, "participants", row["participants"])
+        if districts.get(row["_id"]):
+            add(district_key(districts[row["_id"]]), "participants", row["participants"])
+
+    for row in facet.get("by_level", []):
+        level = row["_id"] or "unknown"
+        doc(GLOBAL_KEY)["competitions_by_level"][level] = row["count"]
+        doc(GLOBAL_KEY)["participants_by_level"][level] = row["participants"]
+
+    async for row in nominations_collection.aggregate([
+        {"$group": {"_id": "$school_id", "count": {"$sum": 1}}}
+    ]):
+        add(school_key(row["_id"]), "nominations", row["count"])
+        add(GLOBAL_KEY, "nominations", row["count"])
+        if districts.get(row["_id"]):
+            add(district_key(districts[row["_id"]]), "nominations", row["count"])
+
+    doc(GLOBAL_KEY)["evaluators"] = await evaluators_collection.count_documents({"is_active": True})
+    doc(GLOBAL_KEY)["votes"] = await votes_collection.count_documents({})
+
+    # Tag this generation so documents that no longer exist can be removed
+    generation = str(uuid.uuid4())
+    operations = []
+    for key, values in docs.items():
+        values["generation"] = generation
+        operations.append(ReplaceOne({"_id": key}, values, upsert=True))
+        if len(operations) >= 1000:
+            await stats_collection.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await stats_collection.bulk_write(operations, ordered=False)
+
+    # Documents first created by a write path during the rebuild carry no
+    # generation and are kept
+    await stats_collection.delete_many({"generation": {"$exists": True, "$ne": generation}})
+
+    logger.info(f"Rebuilt {len(docs)} stats documents")
+    return len(docs)
+
+async def ensure_stats() -> bool:
+    """Build the stats collection if it is missing, on one worker at a time.
+
+    Workers that find the lease taken skip the build. Returns whether this
+    call rebuilt the stats.
+    """
+    if await get_stats(GLOBAL_KEY):
+        return False
+
+    now = datetime.utcnow()
+    locks_collection = get_collection(COLLECTIONS["locks"])
+    try:
+        await locks_collection.update_one(
+            {"_id": REBUILD_LEASE_ID, "expires_at": {"$lt": now}},
+            {"$set": {"expires_at": now + timedelta(seconds=REBUILD_LEASE_S)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        logger.info("Stats rebuild already running on another worker, skipping")
+        return False
+
+    try:
+        # Another worker may have finished between the check and the lease
+        if await get_stats(GLOBAL_KEY):
+            return False
+        await rebuild_stats()
+        return True
+    finally:
+        await locks_collection.delete_one({"_id": REBUILD_LEASE_ID})
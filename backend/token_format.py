@@ -0,0 +1,60 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+import secrets
+
+# Voting tokens are 12 Crockford base32 characters: 8 random characters
+# followed by a 4 character HMAC check, so forged or mistyped tokens can be
+# rejected without a database lookup.
+VOTING_TOKEN_SECRET = os.getenv("VOTING_TOKEN_SECRET", os.getenv("SECRET_KEY", "your-secret-key-here"))
+
+# Accept the original 8 hex character tokens (first 8 characters of a uuid4)
+LEGACY_TOKENS_ALLOWED = os.getenv("VOTING_TOKEN_LEGACY_MODE", "true").lower() == "true"
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+BODY_LENGTH = 8
+CHECK_LENGTH = 4
+TOKEN_LENGTH = BODY_LENGTH + CHECK_LENGTH
+
+_RFC_TO_CROCKFORD = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", ALPHABET)
+
+_LEGACY_PATTERN = re.compile(r"^[0-9A-F]{8}$")
+_SIGNED_PATTERN = re.compile(f"^[{ALPHABET}]{{{TOKEN_LENGTH}}}$")
+
+# Characters people commonly type in place of the canonical ones
+_TYPO_MAP = str.maketrans({"O": "0", "I": "1", "L": "1", "-": None, " ": None})
+
+# Keyed once; copying the initialized state is much cheaper than re-keying
+_HMAC_BASE = hmac.new(VOTING_TOKEN_SECRET.encode(), digestmod=hashlib.sha256)
+
+def _check_digits(body: str) -> str:
+    mac = _HMAC_BASE.copy()
+    mac.update(body.encode())
+    digest = mac.digest()
+    value = int.from_bytes(digest[:4], "big")
+    return "".join(ALPHABET[(value >> (5 * i)) & 31] for i in range(CHECK_LENGTH))
+
+def voting_token_from_bytes(raw: bytes) -> str:
+    """Self-validating token whose body encodes 5 given bytes"""
+    # 5 bytes are exactly 8 base32 characters
+    body = base64.b32encode(raw).decode().translate(_RFC_TO_CROCKFORD)
+    return body + _check_digits(body)
+
+def generate_voting_token() -> str:
+    """New self-validating voting token"""
+    return voting_token_from_bytes(secrets.token_bytes(5))
+
+def normalize_voting_token(token: str) -> str:
+    """Canonical form of a user-entered token (case, dashes, look-alikes)"""
+    token = token.strip().upper()
+    if _LEGACY_PATTERN.match(token):
+        return token
+    return token.translate(_TYPO_MAP)
+
+def is_well_formed_token(token: str) -> bool:
+    """Whether a normalized token could exist, checked without the database"""
+    if len(token) == TOKEN_LENGTH and _SIGNED_PATTERN.match(token):
+        return hmac.compare_digest(token[BODY_LENGTH:], _check_digits(token[:BODY_LENGTH]))
+    return LEGACY_TOKENS_ALLOWED and bool(_LEGACY_PATTERN.match(token))
@@ -0,0 +1,103 @@
+from pymongo.errors import BulkWriteError
+from database import get_collection, COLLECTIONS
+from token_format import generate_voting_token
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, List
+import asyncio
+import csv
+import io
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CHUNK_SIZE = int(os.getenv("TOKEN_GENERATION_CHUNK_SIZE", "5000"))
+TOKEN_INSERT_PARALLELISM = int(os.getenv("TOKEN_GENERATION_PARALLELISM", "4"))
+MAX_COLLISION_RETRIES = 5
+DUPLICATE_KEY_ERROR = 11000
+
+# Labels end up in file names and CSV rows
+BATCH_LABEL_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+
+def _new_token_doc(expires_at: datetime, batch_label: str, now: datetime) -> dict:
+    # Same shape as VotingToken.dict(), built directly to keep large runs cheap
+    return {
+        "id": str(uuid.uuid4()),
+        "created_at": now,
+        "updated_at": now,
+        "token": generate_voting_token(),
+        "is_used": False,
+        "nomination_id": None,
+        "voted_at": None,
+        "ip_address": None,
+        "expires_at": expires_at,
+        "batch_label": batch_label
+    }
+
+async def _insert_chunk(collection, docs: List[dict]) -> List[dict]:
+    """Insert a chunk unordered, regenerating tokens that hit the unique index"""
+    to_insert = docs
+    for _ in range(MAX_COLLISION_RETRIES + 1):
+        try:
+            await collection.insert_many(to_insert, ordered=False)
+            return docs
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            to_insert = [to_insert[error["index"]] for error in errors]
+            for doc in to_insert:
+                doc.pop("_id", None)
+                doc["id"] = str(uuid.uuid4())
+                doc["token"] = generate_voting_token()
+    
+    raise RuntimeError("Could not generate unique voting tokens")
+
+async def generate_tokens(count: int, expires_at: datetime, batch_label: str) -> AsyncIterator[List[dict]]:
+    """Create tokens in fixed-size chunks, yielding each chunk once inserted.
+
+    Up to TOKEN_INSERT_PARALLELISM chunk inserts are in flight at a time,
+    so memory stays bounded however many tokens are requested.
+    """
+    collection = get_collection(COLLECTIONS["voting_tokens"])
+    in_flight = deque()
+    
+    try:
+        for start in range(0, count, TOKEN_CHUNK_SIZE):
+            now = datetime.utcnow()
+            size = min(TOKEN_CHUNK_SIZE, count - start)
+            docs = [_new_token_doc(expires_at, batch_label, now) for _ in range(size)]
+            in_flight.append(asyncio.create_task(_insert_chunk(collection, docs)))
+            
+            if len(in_flight) >= TOKEN_INSERT_PARALLELISM:
+                yield await in_flight.popleft()
+        
+        while in_flight:
+            yield await in_flight.popleft()
+    finally:
+        # Consumer went away (e.g. download aborted): stop outstanding inserts
+        for task in in_flight:
+            task.cancel()
+
+async def tokens_csv(count: int, expires_at: datetime, batch_label: str) -> AsyncIterator[str]:
+    """Generate tokens and stream them as CSV rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["batch_label", "serial", "token", "expires_at"])
+    yield buffer.getvalue()
+    
+    serial = 0
+    async for chunk in generate_tokens(count, expires_at, batch_label):
+        buffer.seek(0)
+        buffer.truncate()
+        for doc in chunk:
+            serial += 1
+            writer.writerow([batch_label, serial, doc["token"], doc["expires_at"].isoformat()])
+        yield buffer.getvalue()
+    
+    logger.info(f"Generated {serial} voting tokens for batch {batch_label}")
+
+def default_batch_label() -> str:
+    return f"BATCH-{datetime.utcnow():%Y%m%d%H%M%S}"
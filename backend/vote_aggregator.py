@@ -0,0 +1,274 @@
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from database import get_collection, COLLECTIONS
+from stats import increment, GLOBAL_KEY
+from response_cache import response_cache, results_key, NOMINATIONS_KEY
+from sharded_counters import vote_counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_MS = int(os.getenv("VOTE_FLUSH_INTERVAL_MS", "500"))
+RECOVER_ON_STARTUP = os.getenv("VOTE_COUNTER_RECOVERY_ON_STARTUP", "false").lower() == "true"
+REBUILD_BATCH_SIZE = 1000
+# The rebuild holds the fold lease; it waits this long for a running fold
+REBUILD_LEASE_WAIT_S = 120
+REBUILD_LEASE_POLL_S = 0.5
+REBUILD_LEASE_S = 600
+# Workers pick up a new rebuild within one flush tick; votes cast this far
+# ahead of its announcement or later are left out of the recount
+REBUILD_LEAD_S = float(os.getenv("VOTE_REBUILD_LEAD_S", "3"))
+# Time for votes cast before the cutoff to be inserted and flushed
+REBUILD_GRACE_S = float(os.getenv("VOTE_REBUILD_GRACE_S", "5"))
+# A rebuild that dies stops holding votes back after this long
+REBUILD_GUARD_S = 900
+REBUILD_GUARD_ID = "vote_counter_rebuild"
+
+class RebuildInProgress(RuntimeError):
+    """Raised when another rebuild_public_votes is already running"""
+
+class RebuildGuard:
+    """A running rebuild_public_votes, announced to every worker.
+
+    The rebuild recounts votes cast before ``cutoff``; workers hold later
+    votes back from the vote counter until the guard is released, so no
+    vote is in both the recount and the shards.
+    """
+
+    def __init__(self):
+        self.cutoff: Optional[datetime] = None
+
+    async def refresh(self) -> Optional[datetime]:
+        """Re-read the guard; the cutoff while a rebuild is running, else None"""
+        locks_collection = get_collection(COLLECTIONS["locks"])
+        guard = await locks_collection.find_one({"_id": REBUILD_GUARD_ID})
+        if guard and guard["expires_at"] > datetime.utcnow():
+            self.cutoff = guard["cutoff"]
+        else:
+            self.cutoff = None
+        return self.cutoff
+
+    async def acquire(self) -> datetime:
+        now = datetime.utcnow()
+        # Mongo keeps milliseconds, so compare against what it will store
+        cutoff = now + timedelta(seconds=REBUILD_LEAD_S)
+        cutoff = cutoff.replace(microsecond=cutoff.microsecond // 1000 * 1000)
+        locks_collection = get_collection(COLLECTIONS["locks"])
+        try:
+            await locks_collection.update_one(
+                {"_id": REBUILD_GUARD_ID, "expires_at": {"$lt": now}},
+                {"$set": {"cutoff": cutoff, "expires_at": now + timedelta(seconds=REBUILD_GUARD_S)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            raise RebuildInProgress("A vote counter rebuild is already running")
+        self.cutoff = cutoff
+        return cutoff
+
+    async def release(self):
+        locks_collection = get_collection(COLLECTIONS["locks"])
+        await locks_collection.delete_one({"_id": REBUILD_GUARD_ID, "cutoff": self.cutoff})
+        self.cutoff = None
+
+class VoteCounterAggregator:
+    """Collects per-nomination vote deltas in memory and flushes them in bulk.
+
+    The ``votes`` collection stays the source of truth. Deltas are written
+    to the sharded vote counter; a nomination's count is its ``public_votes``
+    plus its shards, and can be rebuilt with :func:`rebuild_public_votes`.
+    While a rebuild runs, votes cast after its cutoff are held in memory
+    and only flushed once it finishes.
+    """
+
+    def __init__(self, flush_interval_ms: int = FLUSH_INTERVAL_MS):
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending: Dict[str, int] = {}
+        self._held: Dict[str, int] = {}
+        self.guard = RebuildGuard()
+        self._flush_lock = asyncio.Lock()
+        self._last_flush = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _merge(target: Dict[str, int], deltas: Dict[str, int]):
+        for nomination_id, delta in deltas.items():
+            target[nomination_id] = target.get(nomination_id, 0) + delta
+
+    def record(self, nomination_id: str, delta: int = 1, voted_at: Optional[datetime] = None):
+        """Add a vote delta for a nomination, cast at ``voted_at`` (default now)"""
+        cutoff = self.guard.cutoff
+        held = cutoff is not None and (voted_at or datetime.utcnow()) >= cutoff
+        self._merge(self._held if held else self._pending, {nomination_id: delta})
+
+    def pending(self, nomination_id: str) -> int:
+        """Votes recorded in this process but not yet flushed"""
+        return self._pending.get(nomination_id, 0) + self._held.get(nomination_id, 0)
+
+    async def sync_guard(self):
+        """Pick up rebuild guard changes; release held votes once none is running"""
+        if await self.guard.refresh() is None and self._held:
+            held, self._held = self._held, {}
+            self._merge(self._pending, held)
+
+    async def current_votes(self, nominations: List[dict]) -> Dict[str, int]:
+        """Vote counts for nominations read with ``id`` and ``public_votes``.
+
+        Adds the unfolded shard counts and this process's unflushed votes to
+        the stored counter.
+        """
+        shard_sums = await vote_counter.shard_sums(nomination["id"] for nomination in nominations)
+        return {
+            nomination["id"]: nomination.get("public_votes", 0) + shard_sums[nomination["id"]] + self.pending(nomination["id"])
+            for nomination in nominations
+        }
+
+    async def with_current_votes(self, nominations: List[dict]) -> List[dict]:
+        """Replace each nomination's stored public_votes with its current count"""
+        votes = await self.current_votes(nominations)
+        for nomination in nominations:
+            nomination["public_votes"] = votes[nomination["id"]]
+        return nominations
+
+    async def flush(self) -> int:
+        """Write all pending deltas to the sharded counter with a single bulk_write"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            now = time.monotonic()
+            interval, self._last_flush = now - self._last_flush, now
+
+            try:
+                await vote_counter.add(batch, max(interval, self.flush_interval))
+            except Exception:
+                # Merge the batch back so the next tick retries it
+                self._merge(self._pending, batch)
+                raise
+
+            response_cache.invalidate(NOMINATIONS_KEY, *(results_key(nomination_id) for nomination_id in batch))
+            await increment({GLOBAL_KEY: {"votes": sum(batch.values())}})
+            return len(batch)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.sync_guard()
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Vote counter flush error: {str(e)}")
+
+    def start(self):
+        """Start the periodic flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sync_guard()
+        if self._held:
+            logger.warning(
+                f"Stopping during a vote counter rebuild; {sum(self._held.values())} held votes "
+                f"need another rebuild_public_votes"
+            )
+        await self.flush()
+
+vote_aggregator = VoteCounterAggregator()
+
+async def rebuild_public_votes() -> int:
+    """Recompute every nomination's public_votes from the votes collection.
+
+    Used for crash recovery: deltas that were pending in a process that died
+    are recovered because the votes themselves were written durably. Safe
+    under live voting: a guard in the locks collection sets a cutoff a few
+    seconds ahead, every worker holds back votes cast after it, and once
+    votes from before it have been flushed the shards stop changing. Only
+    votes before the cutoff are recounted, and public_votes is set to that
+    count minus the shards; folds are held off by the fold lease meanwhile.
+    Raises RebuildInProgress if another rebuild is running. Returns the
+    number of nominations whose counter was corrected.
+    """
+    cutoff = await vote_aggregator.guard.acquire()
+    try:
+        wait = (cutoff - datetime.utcnow()).total_seconds() + REBUILD_GRACE_S
+        await asyncio.sleep(max(0, wait))
+
+        holder = f"rebuild:{uuid.uuid4()}"
+        deadline = time.monotonic() + REBUILD_LEASE_WAIT_S
+        while not await vote_counter.take_fold_lease(holder, REBUILD_LEASE_S):
+            if time.monotonic() >= deadline:
+                raise RuntimeError("Timed out waiting for a vote counter fold to finish")
+            await asyncio.sleep(REBUILD_LEASE_POLL_S)
+
+        try:
+            corrected = await _recount_public_votes(cutoff)
+        finally:
+            await vote_counter.release_fold_lease(holder)
+    finally:
+        await vote_aggregator.guard.release()
+        await vote_aggregator.sync_guard()
+
+    if corrected:
+        response_cache.clear()
+
+    logger.info(f"Rebuilt public_votes counters, {corrected} corrected")
+    return corrected
+
+async def recover_public_votes():
+    """Startup recovery: rebuild_public_votes unless another worker already is"""
+    try:
+        await rebuild_public_votes()
+    except RebuildInProgress:
+        # Another worker started at the same time is already on it
+        logger.info("Vote counter rebuild already running, skipping")
+    except Exception as e:
+        logger.error(f"Vote counter recovery error: {str(e)}")
+
+async def _recount_public_votes(cutoff: datetime) -> int:
+    # Votes before the cutoff still pending here would otherwise be missed
+    await vote_aggregator.flush()
+
+    votes_collection = get_collection(COLLECTIONS["votes"])
+    nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+
+    counts = {}
+    async for row in votes_collection.aggregate([
+        {"$match": {"voted_at": {"$lt": cutoff}}},
+        {"$group": {"_id": "$nomination_id", "count": {"$sum": 1}}}
+    ]):
+        counts[row["_id"]] = row["count"]
+    shard_sums = await vote_counter.all_shard_sums()
+
+    corrected = 0
+    operations = []
+    cursor = nominations_collection.find({}, {"_id": 0, "id": 1, "public_votes": 1})
+    async for nomination in cursor:
+        expected = counts.get(nomination["id"], 0) - shard_sums.get(nomination["id"], 0)
+        if nomination.get("public_votes", 0) != expected:
+            operations.append(UpdateOne(
+                {"id": nomination["id"]},
+                {"$set": {"public_votes": expected}}
+            ))
+        if len(operations) >= REBUILD_BATCH_SIZE:
+            await nominations_collection.bulk_write(operations, ordered=False)
+            corrected += len(operations)
+            operations = []
+
+    if operations:
+        await nominations_collection.bulk_write(operations, ordered=False)
+        corrected += len(operations)
+    return corrected
@@ -0,0 +1,228 @@
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument, UpdateOne
+from models import Vote
+from database import db, get_collection, COLLECTIONS
+from projections import PROJECTIONS
+from vote_aggregator import vote_aggregator
+from leaderboard import leaderboard
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Run the vote insert and counter increment inside a multi-document
+# transaction (requires a replica set / mongos deployment)
+USE_TRANSACTIONS = os.getenv("VOTE_USE_TRANSACTIONS", "false").lower() == "true"
+# Outside a transaction a claim is marked pending until its vote is seen;
+# claims whose vote never landed are released after this long
+CLAIM_STALE_S = int(os.getenv("VOTE_CLAIM_STALE_S", "300"))
+CLAIM_SWEEP_INTERVAL_S = int(os.getenv("VOTE_CLAIM_SWEEP_INTERVAL_S", "60"))
+CLAIM_SWEEP_BATCH_SIZE = 1000
+
+async def _diagnose_token(token: str):
+    """Explain why a token could not be claimed (slow path only)"""
+    tokens_collection = get_collection(COLLECTIONS["voting_tokens"])
+    token_doc = await tokens_collection.find_one(
+        {"token": token}, PROJECTIONS["voting.token_validation"]
+    )
+
+    if not token_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invalid voting token"
+        )
+
+    if token_doc.get("is_used", False):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This token has already been used"
+        )
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="This token has expired"
+    )
+
+async def claim_token(token: str, nomination_id: str, client_ip: str, session=None, pending: bool = False) -> dict:
+    """Atomically mark an unused, unexpired token as used and return it.
+
+    A ``pending`` claim stays marked until release_stale_claims sees its vote.
+    """
+    tokens_collection = get_collection(COLLECTIONS["voting_tokens"])
+    now = datetime.utcnow()
+    claim = {
+        "is_used": True,
+        "nomination_id": nomination_id,
+        "voted_at": now,
+        "ip_address": client_ip
+    }
+    if pending:
+        claim["vote_pending"] = True
+
+    token_doc = await tokens_collection.find_one_and_update(
+        {"token": token, "is_used": False, "expires_at": {"$gt": now}},
+        {"$set": claim},
+        projection={"_id": 1, "id": 1},
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+
+    if not token_doc:
+        await _diagnose_token(token)
+
+    return token_doc
+
+RELEASE = {
+    "$set": {"is_used": False, "nomination_id": None, "voted_at": None, "ip_address": None},
+    "$unset": {"vote_pending": ""}
+}
+
+async def release_token(token_id, session=None):
+    """Undo a token claim when the vote could not be recorded"""
+    tokens_collection = get_collection(COLLECTIONS["voting_tokens"])
+    await tokens_collection.update_one({"_id": token_id}, RELEASE, session=session)
+
+async def release_stale_claims() -> int:
+    """Settle pending claims older than CLAIM_STALE_S.
+
+    A claim whose vote exists just loses its marker; one whose process died
+    before the vote insert is released so the token can be used again.
+    Returns the number of tokens released.
+    """
+    tokens_collection = get_collection(COLLECTIONS["voting_tokens"])
+    votes_collection = get_collection(COLLECTIONS["votes"])
+    cutoff = datetime.utcnow() - timedelta(seconds=CLAIM_STALE_S)
+    released = 0
+
+    while True:
+        claims = await tokens_collection.find(
+            {"vote_pending": True, "voted_at": {"$lt": cutoff}}, {"_id": 1, "id": 1}
+        ).limit(CLAIM_SWEEP_BATCH_SIZE).to_list(CLAIM_SWEEP_BATCH_SIZE)
+        if not claims:
+            return released
+
+        voted = set()
+        async for vote in votes_collection.find(
+            {"token_id": {"$in": [claim["id"] for claim in claims]}}, {"_id": 0, "token_id": 1}
+        ):
+            voted.add(vote["token_id"])
+
+        operations = []
+        for claim in claims:
+            if claim["id"] in voted:
+                operations.append(UpdateOne({"_id": claim["_id"]}, {"$unset": {"vote_pending": ""}}))
+            else:
+                operations.append(UpdateOne({"_id": claim["_id"], "vote_pending": True}, RELEASE))
+        await tokens_collection.bulk_write(operations, ordered=False)
+
+        stale = len(claims) - len(voted)
+        if stale:
+            logger.warning(f"Released {stale} voting tokens claimed without a recorded vote")
+        released += stale
+
+class ClaimSweeper:
+    """Periodically runs release_stale_claims"""
+
+    def __init__(self, interval_s: float = CLAIM_SWEEP_INTERVAL_S):
+        self.interval_s = interval_s
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await release_stale_claims()
+            except Exception as e:
+                logger.error(f"Voting token claim sweep error: {str(e)}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+claim_sweeper = ClaimSweeper()
+
+def _nomination_not_found():
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Nomination not found"
+    )
+
+async def _find_nomination(nomination_id: str, session=None) -> Optional[dict]:
+    nominations_collection = get_collection(COLLECTIONS["teacher_nominations"])
+    return await nominations_collection.find_one(
+        {"id": nomination_id}, {"_id": 0, "id": 1, "category": 1}, session=session
+    )
+
+async def cast_vote_atomic(token: str, nomination_id: str, client_ip: str, user_agent: str = "") -> Vote:
+    """Claim a token and record its vote in as few round trips as possible.
+
+    The public_votes counter is not touched here; the vote is handed to the
+    write-behind aggregator, which folds it into a batched flush. Without a
+    transaction the claim is marked pending, so a crash before the vote
+    insert leaves a token that release_stale_claims gives back.
+    """
+    votes_collection = get_collection(COLLECTIONS["votes"])
+
+    if USE_TRANSACTIONS:
+        async with await db.client.start_session() as session:
+            async with session.start_transaction():
+                # Operations on one session must not run concurrently; an
+                # aborted transaction rolls the token claim back
+                nomination = await _find_nomination(nomination_id, session=session)
+                if not nomination:
+                    raise _nomination_not_found()
+                token_doc = await claim_token(token, nomination_id, client_ip, session=session)
+                vote_data = Vote(
+                    token_id=token_doc["id"],
+                    nomination_id=nomination_id,
+                    ip_address=client_ip,
+                    user_agent=user_agent
+                )
+                await votes_collection.insert_one(vote_data.dict(), session=session)
+        vote_aggregator.record(nomination_id, voted_at=vote_data.voted_at)
+        leaderboard.record_vote(nomination_id, nomination["category"])
+        return vote_data
+
+    nomination, token_doc = await asyncio.gather(
+        _find_nomination(nomination_id),
+        claim_token(token, nomination_id, client_ip, pending=True),
+        return_exceptions=True
+    )
+
+    if isinstance(token_doc, Exception):
+        raise token_doc
+
+    if isinstance(nomination, Exception) or not nomination:
+        await release_token(token_doc["_id"])
+        if isinstance(nomination, Exception):
+            raise nomination
+        raise _nomination_not_found()
+
+    vote_data = Vote(
+        token_id=token_doc["id"],
+        nomination_id=nomination_id,
+        ip_address=client_ip,
+        user_agent=user_agent
+    )
+
+    try:
+        await votes_collection.insert_one(vote_data.dict())
+    except Exception:
+        await release_token(token_doc["_id"])
+        raise
+
+    vote_aggregator.record(nomination_id, voted_at=vote_data.voted_at)
+    leaderboard.record_vote(nomination_id, nomination["category"])
+    return vote_data
@@ -17,6 +17,9 @@ const PublicVoting = () => {
   const [error, setError] = useState('');
   const [nominations] = useState(mockVotingNominations);
 
+  // Printed tokens are 12 characters (may be grouped with dashes); older ones are 8
+  const isTokenLengthValid = (token) => [8, 12].includes(token.replace(/[-\s]/g, '').length);
+
   const validateToken = async () => {
     setLoading(true);
     setError('');
@@ -26,7 +29,7 @@ const PublicVoting = () => {
       await new Promise(resolve => setTimeout(resolve, 1000));
       
       // Mock validation - in real app, this would call the API
-      if (votingToken.length === 8) {
+      if (isTokenLengthValid(votingToken)) {
         setTokenValidated(true);
       } else {
         setError('Invalid voting token. Please check and try again.');
@@ -120,7 +123,7 @@ const PublicVoting = () => {
                   Enter Your Voting Token
                 </CardTitle>
                 <p className="text-gray-600">
-                  Enter the 8-character voting token you received to participate in voting.
+                  Enter the voting token you received to participate in voting.
                 </p>
               </CardHeader>
               <CardContent className="space-y-4">
@@ -137,13 +140,13 @@ const PublicVoting = () => {
                       id="token"
                       value={votingToken}
                       onChange={(e) => setVotingToken(e.target.value.toUpperCase())}
-                      placeholder="Enter 8-character token"
-                      maxLength={8}
+                      placeholder="Enter your voting token"
+                      maxLength={14}
                       className="font-mono text-lg tracking-wider"
                     />
                     <Button 
                       onClick={validateToken}
-                      disabled={loading || votingToken.length !== 8}
+                      disabled={loading || !isTokenLengthValid(votingToken)}
                       className="bg-gradient-to-r from-blue-500 to-cyan-500 hover:from-blue-600 hover:to-cyan-600"
                     >
                       {loading ? (
@@ -161,7 +164,7 @@ const PublicVoting = () => {
                 <div className="bg-blue-50 border border-blue-200 rounded-lg p-4">
                   <h4 className="font-semibold text-blue-800 mb-2">How to Vote</h4>
                   <ul className="text-sm text-blue-700 space-y-1">
-                    <li>1. Enter your 8-character voting token</li>
+                    <li>1. Enter your voting token</li>
                     <li>2. Browse through the teacher nominations</li>
                     <li>3. Select the teacher you want to vote for</li>
                     <li>4. Cast your vote - each token allows one vote only</li>
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def db():
+    """A fresh in-memory Mongo behind database.db, with process-wide state reset"""
+    from mongomock_motor import AsyncMongoMockClient
+    import database
+    from response_cache import response_cache
+    from sharded_counters import vote_counter
+    from stats import _district_cache
+    from vote_aggregator import vote_aggregator
+
+    client = AsyncMongoMockClient()
+    database.db.client = client
+    database.db.database = client["test"]
+
+    response_cache.clear()
+    _district_cache.clear()
+    vote_counter._sums.clear()
+    vote_counter._rates = {}
+    vote_aggregator._pending = {}
+    vote_aggregator._held = {}
+    vote_aggregator.guard.cutoff = None
+
+    yield database.db.database
+
+@pytest.fixture
+async def client(db):
+    """HTTP client for the app; startup and shutdown hooks are not run"""
+    import httpx
+    from server import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        yield http
+
+@pytest.fixture
+def admin_headers():
+    from auth import create_access_token
+
+    token = create_access_token({"sub": "admin-1", "user_type": "admin"})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def hash_pool(monkeypatch):
+    """A fresh two-slot hashing pool with a queue of one"""
+    import auth
+
+    monkeypatch.setattr(auth, "PASSWORD_HASH_MAX_QUEUE", 1)
+    monkeypatch.setattr(auth, "_hash_slots", asyncio.Semaphore(2))
+    monkeypatch.setattr(auth, "_hash_metrics", {key: 0 for key in auth._hash_metrics})
+    return auth
+
+async def test_hashes_round_trip_on_the_pool(hash_pool, monkeypatch):
+    from passlib.context import CryptContext
+
+    monkeypatch.setattr(hash_pool, "pwd_context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=4))
+    hashed = await hash_pool.get_password_hash_async("correct horse")
+
+    assert await hash_pool.verify_password_async("correct horse", hashed)
+    assert not await hash_pool.verify_password_async("wrong horse", hashed)
+    assert hash_pool.get_password_hash_metrics()["completed"] == 3
+
+async def test_excess_hashing_is_queued_then_rejected(hash_pool):
+    release = threading.Event()
+    running = []
+
+    def slow_hash(password):
+        running.append(threading.current_thread().name)
+        release.wait(5)
+        return password[::-1]
+
+    busy = [asyncio.create_task(hash_pool._run_in_hash_pool(slow_hash, "pw")) for _ in range(3)]
+    for _ in range(100):
+        if len(running) == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    # Two run, one waits for a slot, and the next is turned away
+    metrics = hash_pool.get_password_hash_metrics()
+    assert (metrics["in_flight"], metrics["queued"]) == (2, 1)
+    with pytest.raises(HTTPException) as busy_error:
+        await hash_pool._run_in_hash_pool(slow_hash, "pw")
+    assert busy_error.value.status_code == 503
+
+    release.set()
+    assert await asyncio.gather(*busy) == ["wp"] * 3
+    metrics = hash_pool.get_password_hash_metrics()
+    assert (metrics["completed"], metrics["rejected"], metrics["in_flight"]) == (3, 1, 0)
+    assert all(name.startswith("password-hash") for name in running)
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    """An empty verified-token cache on a clock the test controls"""
+    from types import SimpleNamespace
+    import auth
+    import cache
+    from cache import TTLCache
+
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    monkeypatch.setattr(auth, "_token_cache", TTLCache(maxsize=100, ttl=auth.JWT_CACHE_TTL_S))
+    return clock
+
+def test_verified_tokens_are_served_from_the_cache(token_cache, monkeypatch):
+    import auth
+
+    token = auth.create_access_token({"sub": "school-1", "user_type": "school"})
+    assert auth.verify_access_token(token) == {"user_id": "school-1", "user_type": "school"}
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("cached tokens are not decoded again")
+
+    monkeypatch.setattr(auth.jwt, "decode", no_decode)
+    user = auth.verify_access_token(token)
+    user["user_type"] = "admin"
+
+    # Callers get copies, so the cached user cannot be changed through them
+    assert auth.verify_access_token(token)["user_type"] == "school"
+    assert auth.get_token_cache_stats()["hits"] == 2
+
+def test_cached_entries_never_outlive_the_token(token_cache):
+    from datetime import timedelta
+    import auth
+
+    short = auth.create_access_token({"sub": "school-1", "user_type": "school"}, timedelta(seconds=30))
+    long = auth.create_access_token({"sub": "school-2", "user_type": "school"})
+    auth.verify_access_token(short)
+    auth.verify_access_token(long)
+
+    token_cache.now += 31
+    auth.verify_access_token(long)
+    auth.verify_access_token(short)
+    assert (auth.get_token_cache_stats()["hits"], auth.get_token_cache_stats()["misses"]) == (1, 3)
+
+    # The long-lived token is re-verified once the cache TTL runs out
+    token_cache.now += auth.JWT_CACHE_TTL_S
+    auth.verify_access_token(long)
+    assert auth.get_token_cache_stats()["misses"] == 4
+
+def test_rejected_tokens_are_never_cached(token_cache):
+    from datetime import timedelta
+    import auth
+
+    token = auth.create_access_token({"sub": "school-1", "user_type": "school"})
+    auth.verify_access_token(token)
+    header, payload, signature = token.split(".")
+    tampered = ".".join([header, payload, ("A" if signature[0] != "A" else "B") + signature[1:]])
+    expired = auth.create_access_token({"sub": "school-1", "user_type": "school"}, timedelta(seconds=-1))
+    missing_type = auth.create_access_token({"sub": "school-1"})
+
+    for rejected in (tampered, expired, missing_type):
+        with pytest.raises(HTTPException) as error:
+            auth.verify_access_token(rejected)
+        assert error.value.status_code == 401
+
+    assert len(auth._token_cache) == 1
@@ -0,0 +1,59 @@
+import pytest
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    import cache
+
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+def test_entries_expire_after_their_ttl(clock):
+    from cache import TTLCache
+
+    entries = TTLCache(maxsize=10, ttl=5)
+    entries.set("default", 1)
+    entries.set("short", 2, ttl=1)
+
+    clock.now += 1
+    assert entries.get("short") is None
+    assert entries.get("default") == 1
+
+    clock.now += 4
+    assert entries.get("default", "gone") == "gone"
+    assert len(entries) == 0
+    assert entries.stats()["hits"] == 1
+    assert entries.stats()["misses"] == 2
+
+def test_least_recently_used_entry_is_evicted(clock):
+    from cache import TTLCache
+
+    entries = TTLCache(maxsize=2, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    # Reading "a" makes "b" the least recently used
+    assert entries.get("a") == 1
+    entries.set("c", 3)
+
+    assert entries.get("b") is None
+    assert entries.get("a") == 1
+    assert entries.get("c") == 3
+
+def test_pop_and_clear(clock):
+    from cache import TTLCache
+
+    entries = TTLCache(maxsize=2, ttl=60)
+    entries.set("a", 1)
+    assert entries.pop("a") == 1
+    assert entries.pop("a", "missing") == "missing"
+
+    entries.set("b", 2)
+    entries.clear()
+    assert len(entries) == 0
@@ -0,0 +1,64 @@
+import pytest
+from pymongo import ASCENDING, DESCENDING
+
+pytestmark = pytest.mark.anyio
+
+async def _managed(collection):
+    from database import MANAGED_INDEX_PREFIX
+
+    return {
+        name: info for name, info in (await collection.index_information()).items()
+        if name.startswith(MANAGED_INDEX_PREFIX)
+    }
+
+async def test_registered_indexes_are_created_once(db, monkeypatch):
+    import database
+    from database import COLLECTIONS, INDEXES, ensure_indexes
+
+    # mongomock does not report partialFilterExpression back
+    registry = {
+        key: [(keys, options) for keys, options in specs if "partialFilterExpression" not in options]
+        for key, specs in INDEXES.items()
+    }
+    monkeypatch.setattr(database, "INDEXES", registry)
+    await ensure_indexes()
+    assert set(await _managed(db[COLLECTIONS["votes"]])) == {"ii_nomination_id", "ii_token_id_unique"}
+
+    dropped = []
+
+    async def drop_index(self, name):
+        dropped.append(name)
+
+    monkeypatch.setattr(type(db[COLLECTIONS["votes"]]), "drop_index", drop_index)
+    await ensure_indexes()
+    assert dropped == []
+
+async def test_changed_indexes_are_recreated(db, monkeypatch):
+    import database
+    from database import COLLECTIONS, ensure_indexes
+
+    monkeypatch.setattr(database, "INDEXES", {
+        "votes": [([("nomination_id", ASCENDING)], {"name": "nomination_id"})],
+        "schools": [([("email", ASCENDING)], {"name": "email_unique", "unique": True})]
+    })
+    await ensure_indexes()
+
+    monkeypatch.setattr(database, "INDEXES", {
+        "votes": [([("nomination_id", DESCENDING)], {"name": "nomination_id"})],
+        "schools": [([("email", ASCENDING)], {"name": "email_unique"})]
+    })
+    await ensure_indexes()
+
+    votes_index = (await _managed(db[COLLECTIONS["votes"]]))["ii_nomination_id"]
+    assert list(votes_index["key"]) == [("nomination_id", DESCENDING)]
+    schools_index = (await _managed(db[COLLECTIONS["schools"]]))["ii_email_unique"]
+    assert not schools_index.get("unique", False)
+
+def test_index_matches_ignores_unset_boolean_options():
+    from database import index_matches
+
+    info = {"v": 2, "key": [("voted_at", 1)], "partialFilterExpression": {"vote_pending": True}}
+    assert index_matches(info, [("voted_at", ASCENDING)], {
+        "name": "ii_pending_claims", "partialFilterExpression": {"vote_pending": True}, "sparse": False
+    })
+    assert not index_matches(info, [("voted_at", ASCENDING)], {"name": "ii_pending_claims"})
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def _wait(runner, job_id):
+    for _ in range(200):
+        job = await runner.get(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+class MemoryBucket:
+    """Just enough of AsyncIOMotorGridFSBucket; mongomock-motor has no GridFS"""
+
+    def __init__(self):
+        self.files = {}
+
+    def open_upload_stream(self, filename, metadata=None):
+        bucket, chunks = self, []
+
+        class GridIn:
+            _id = f"file-{len(self.files)}"
+
+            async def write(self, data):
+                chunks.append(data)
+
+            async def abort(self):
+                chunks.clear()
+
+            async def close(self):
+                bucket.files[self._id] = b"".join(chunks)
+
+        return GridIn()
+
+    async def open_download_stream(self, file_id):
+        remaining = [self.files[file_id][i:i + 8] for i in range(0, len(self.files[file_id]), 8)]
+
+        class GridOut:
+            async def readchunk(self):
+                return remaining.pop(0) if remaining else b""
+
+        return GridOut()
+
+@pytest.fixture
+async def runner(db):
+    from jobs import JobRunner
+
+    runner = JobRunner(concurrency=1)
+    yield runner
+    await runner.stop()
+
+async def test_successful_jobs_record_their_result(runner):
+    @runner.register("sum")
+    async def add(job, values):
+        await job.progress(len(values), len(values), force=True)
+        return {"total": sum(values)}
+
+    await runner.start()
+    job = await _wait(runner, (await runner.submit("sum", {"values": [1, 2, 3]}))["id"])
+
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"total": 6}
+    assert (job["progress_done"], job["progress_total"]) == (3, 3)
+
+async def test_handler_errors_fail_the_job(runner):
+    @runner.register("broken")
+    async def broken(job):
+        raise ValueError("no such dataset")
+
+    await runner.start()
+    job = await _wait(runner, (await runner.submit("broken"))["id"])
+
+    assert job["status"] == "failed"
+    assert job["error"] == "no such dataset"
+
+async def test_results_that_cannot_be_stored_fail_the_job(runner):
+    @runner.register("unencodable")
+    async def unencodable(job):
+        return {"value": object()}
+
+    await runner.start()
+    job = await _wait(runner, (await runner.submit("unencodable"))["id"])
+
+    assert job["status"] == "failed"
+    assert job["error"]
+
+async def test_jobs_of_a_worker_that_went_away_are_failed(db, runner):
+    from database import COLLECTIONS
+    from models import Job
+
+    jobs = db[COLLECTIONS["jobs"]]
+    stale, live = Job(kind="export").dict(), Job(kind="export").dict()
+    stale.update(status="running", heartbeat_at=datetime.utcnow() - timedelta(hours=1))
+    live.update(status="running", heartbeat_at=datetime.utcnow())
+    await jobs.insert_many([stale, live])
+
+    assert await runner.recover() == 1
+    assert (await runner.get(stale["id"]))["status"] == "failed"
+    assert (await runner.get(live["id"]))["status"] == "running"
+
+async def test_artifacts_download_through_the_admin_api(client, admin_headers, monkeypatch, runner):
+    import jobs
+    import routes.admin
+
+    bucket = MemoryBucket()
+    monkeypatch.setattr(jobs, "_artifact_bucket", lambda: bucket)
+    monkeypatch.setattr(routes.admin, "job_runner", runner)
+
+    @runner.register("report")
+    async def report(job):
+        async def rows():
+            yield "school,participants\n"
+            yield b"school-1,12\n"
+        await job.save_artifact("report.csv", rows(), content_type="text/csv")
+
+    await runner.start()
+    job = await _wait(runner, (await runner.submit("report"))["id"])
+    assert job["status"] == "succeeded"
+
+    status = await client.get(f"/api/admin/jobs/{job['id']}", headers=admin_headers)
+    assert status.json()["job"]["artifact_url"] == f"/api/admin/jobs/{job['id']}/artifact"
+    assert "artifact_id" not in status.json()["job"]
+
+    download = await client.get(f"/api/admin/jobs/{job['id']}/artifact", headers=admin_headers)
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith("text/csv")
+    assert download.text == "school,participants\nschool-1,12\n"
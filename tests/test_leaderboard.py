@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def _nominations(db, *nominations):
+    from database import COLLECTIONS
+
+    await db[COLLECTIONS["teacher_nominations"]].insert_many([
+        {"id": nomination_id, "category": category, "status": status, "public_votes": votes}
+        for nomination_id, category, status, votes in nominations
+    ])
+
+def _drain(queue):
+    payloads = []
+    while not queue.empty():
+        payloads.append(json.loads(queue.get_nowait()))
+    return payloads
+
+async def test_local_votes_are_coalesced_into_one_broadcast(db):
+    from leaderboard import LeaderboardTally
+
+    await _nominations(db, ("a", "innovation-growth", "nominated", 4))
+    tally = LeaderboardTally()
+    await tally.seed()
+    tally._dirty = {}
+    queue = tally.subscribe()
+
+    for _ in range(3):
+        tally.record_vote("a", "innovation-growth")
+    tally.record_vote("b", "social-contribution")
+    tally._broadcast()
+    tally._broadcast()
+
+    assert _drain(queue) == [{"innovation-growth": {"a": 7}, "social-contribution": {"b": 1}}]
+    assert tally.snapshot() == {"innovation-growth": {"a": 7}, "social-contribution": {"b": 1}}
+
+async def test_reseed_drops_nominations_that_left_voting(db):
+    from database import COLLECTIONS
+    from leaderboard import LeaderboardTally
+
+    await _nominations(
+        db,
+        ("a", "innovation-growth", "nominated", 4),
+        ("b", "innovation-growth", "shortlisted", 2),
+        ("c", "social-contribution", "nominated", 1)
+    )
+    tally = LeaderboardTally()
+    await tally.seed()
+    tally._dirty = {}
+    queue = tally.subscribe()
+    nominations = db[COLLECTIONS["teacher_nominations"]]
+    await nominations.update_one({"id": "b"}, {"$set": {"status": "rejected"}})
+    await nominations.update_one({"id": "c"}, {"$set": {"category": "innovation-growth"}})
+
+    await tally.seed()
+    tally._broadcast()
+
+    assert _drain(queue) == [{
+        "innovation-growth": {"b": None, "c": 1},
+        "social-contribution": {"c": None}
+    }]
+    assert tally.snapshot() == {"innovation-growth": {"a": 4, "c": 1}}
+    # A later local vote lands in the nomination's new category
+    tally.record_vote("c", "social-contribution")
+    assert tally.snapshot()["innovation-growth"]["c"] == 2
+
+async def test_slow_subscribers_lose_their_oldest_updates(db, monkeypatch):
+    import leaderboard
+    from leaderboard import LeaderboardTally
+
+    monkeypatch.setattr(leaderboard, "SUBSCRIBER_QUEUE_SIZE", 2)
+    tally = LeaderboardTally()
+    slow = tally.subscribe()
+
+    for _ in range(3):
+        tally.record_vote("a", "innovation-growth")
+        tally._broadcast()
+
+    assert _drain(slow) == [{"innovation-growth": {"a": 2}}, {"innovation-growth": {"a": 3}}]
+    tally.unsubscribe(slow)
+    tally.record_vote("a", "innovation-growth")
+    tally._broadcast()
+    assert slow.empty()
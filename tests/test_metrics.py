@@ -0,0 +1,52 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+def _count(method, route, status):
+    from prometheus_client import REGISTRY
+
+    labels = {"method": method, "route": route, "status": status}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+
+async def test_requests_are_labelled_by_route_template(client, db):
+    from database import COLLECTIONS
+
+    await db[COLLECTIONS["teacher_nominations"]].insert_many([
+        {"id": f"nom-{i}", "teacher_name": "A. Teacher", "category": "academic-excellence",
+         "award_type": "state", "public_votes": 0, "status": "nominated"}
+        for i in range(3)
+    ])
+    template = "/api/voting/results/{nomination_id}"
+    before = _count("GET", template, "200")
+
+    for i in range(3):
+        assert (await client.get(f"/api/voting/results/nom-{i}")).status_code == 200
+
+    assert _count("GET", template, "200") == before + 3
+    assert _count("GET", "/api/voting/results/nom-0", "200") == 0
+
+async def test_unknown_paths_share_one_label(client, db):
+    from metrics import UNMATCHED_ROUTE
+
+    before = _count("GET", UNMATCHED_ROUTE, "404")
+    await client.get("/no/such/path")
+    await client.get("/another/missing/path")
+
+    assert _count("GET", UNMATCHED_ROUTE, "404") == before + 2
+
+def test_templates_are_cached_per_method_and_path():
+    from starlette.routing import Route
+    from metrics import MetricsMiddleware
+
+    async def endpoint(request):
+        pass
+
+    middleware = MetricsMiddleware(app=None, routes=[Route("/items/{item_id}", endpoint, methods=["GET"])])
+    scope = {"type": "http", "method": "GET", "path": "/items/7", "root_path": ""}
+
+    assert middleware._route_template(scope) == "/items/{item_id}"
+    # A method the route does not allow is still labelled with its template
+    assert middleware._route_template({**scope, "method": "POST"}) == "/items/{item_id}"
+    assert middleware._route_template({**scope, "path": "/other"}) == "unmatched"
+    assert middleware._templates.get(("GET", "/items/7")) == "/items/{item_id}"
+    assert len(middleware._templates) == 3
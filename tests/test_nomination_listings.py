@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+LONG_FORM_FIELDS = {"school_id", "achievements", "qualifications", "subjects_taught", "nomination_letter", "evaluator_scores"}
+
+@pytest.fixture
+async def nomination(db):
+    from database import COLLECTIONS
+
+    nomination = {
+        "id": "nom-1", "school_id": "school-1", "teacher_name": "A. Teacher", "category": "academic-excellence",
+        "award_type": "state", "experience_years": 12, "current_position": "Headmistress",
+        "qualifications": "M.Ed", "subjects_taught": ["Maths"], "achievements": "Built the school library",
+        "nomination_letter": "Strongly recommended", "evaluator_scores": {"e1": 8},
+        "public_votes": 3, "status": "nominated", "created_at": datetime(2026, 1, 1)
+    }
+    await db[COLLECTIONS["schools"]].insert_one({"id": "school-1", "school_name": "GHPS Hunsur"})
+    await db[COLLECTIONS["teacher_nominations"]].insert_one(dict(nomination))
+    return nomination
+
+async def test_school_listing_returns_the_full_record(client, nomination):
+    from auth import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'school-1', 'user_type': 'school'})}"}
+    response = await client.get("/api/school/teacher-nominations", headers=headers)
+
+    listed = response.json()["nominations"][0]
+    assert LONG_FORM_FIELDS <= set(listed)
+    assert listed["public_votes"] == 3
+
+async def test_admin_listing_returns_the_full_record(client, nomination, admin_headers):
+    response = await client.get("/api/admin/all-nominations", headers=admin_headers)
+
+    listed = response.json()["nominations"][0]
+    assert LONG_FORM_FIELDS <= set(listed)
+    assert listed["school_name"] == "GHPS Hunsur"
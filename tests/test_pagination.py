@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.anyio
+
+async def _collection(db):
+    collection = db["items"]
+    start = datetime(2024, 1, 1)
+    # Repeated timestamps so the id tie-breaker matters
+    await collection.insert_many(
+        [{"id": f"dated-{i:02d}", "created_at": start + timedelta(seconds=i % 4)} for i in range(11)]
+        + [
+            {"id": "undated-a"},
+            {"id": "undated-b", "created_at": "2024-01-01T00:00:00"},
+            {"id": "undated-c", "created_at": None}
+        ]
+    )
+    return collection
+
+async def test_cursor_round_trip_visits_every_document_once(db):
+    from pagination import fetch_page
+
+    collection = await _collection(db)
+    seen, cursor = [], None
+    while True:
+        page, cursor = await fetch_page(collection, {}, 3, cursor, {"_id": 0})
+        seen.extend(doc["id"] for doc in page)
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 14
+    dated = [doc_id for doc_id in seen if doc_id.startswith("dated")]
+    assert seen[:len(dated)] == dated
+    assert seen[len(dated):] == ["undated-a", "undated-b", "undated-c"]
+
+async def test_stream_matches_pages(db):
+    from pagination import fetch_page, stream_ndjson
+    import orjson
+
+    collection = await _collection(db)
+    page, cursor = await fetch_page(collection, {}, 5, None, {"_id": 0})
+
+    chunks = [chunk async for chunk in stream_ndjson(collection, {}, cursor, {"_id": 0})]
+    streamed = [orjson.loads(line)["id"] for line in b"".join(chunks).splitlines()]
+    assert [doc["id"] for doc in page] + streamed == (
+        [doc["id"] for doc in (await fetch_page(collection, {}, 100, None, {"_id": 0}))[0]]
+    )
+
+def test_cursor_encodes_position():
+    from pagination import decode_cursor, encode_cursor
+
+    created_at = datetime(2024, 5, 6, 7, 8, 9, 123000)
+    assert decode_cursor(encode_cursor({"id": "x", "created_at": created_at})) == (created_at, "x")
+    assert decode_cursor(encode_cursor({"id": "y"})) == (None, "y")
+    assert decode_cursor(encode_cursor({"id": "z", "created_at": "yesterday"})) == (None, "z")
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "WzFd"])
+def test_invalid_cursor_is_a_400(cursor):
+    from pagination import decode_cursor
+
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
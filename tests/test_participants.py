@@ -0,0 +1,123 @@
+import io
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def _school(db):
+    from database import COLLECTIONS
+
+    await db[COLLECTIONS["schools"]].insert_one({
+        "id": "school-1", "udise_code": "29000000001", "email": "head@school.example",
+        "district": "Mysuru", "taluk": "Hunsur"
+    })
+
+def _csv(*lines: str) -> bytes:
+    return ("\n".join(lines) + "\n").encode()
+
+async def test_import_reports_errors_by_row(db):
+    from database import COLLECTIONS
+    from participants import import_participant_rows, read_csv_rows
+
+    await _school(db)
+    upload = io.BytesIO(_csv(
+        "School_ID,UDISE_Code,Email,Category,Level,Participant_Count",
+        "school-1,,,pre-school,,4",
+        ",29000000001,,junior-artists,school,5",
+        ",,head@school.example,young-creators,school,6",
+        "missing,,,pre-school,school,1",
+        "school-1,,,watercolour,school,1",
+        "school-1,,,pre-school,school,-1",
+        ",,,pre-school,school,1"
+    ))
+
+    report = await import_participant_rows(read_csv_rows(upload))
+
+    assert report["processed"] == 7
+    assert report["registered"] == 3
+    assert report["error_count"] == 4
+    errors = {error["row"]: error["error"] for error in report["errors"]}
+    assert sorted(errors) == [5, 6, 7, 8]
+    assert errors[5] == "School not found"
+    assert "category" in errors[6]
+    assert "participant_count" in errors[7]
+    assert "school_id, udise_code or email" in errors[8]
+    assert await db[COLLECTIONS["drawing_participants"]].count_documents({}) == 3
+
+async def test_reimport_updates_instead_of_duplicating(db):
+    from database import COLLECTIONS
+    from participants import import_participant_rows
+
+    await _school(db)
+    rows = [{"school_id": "school-1", "category": "pre-school", "participant_count": "4"}]
+    await import_participant_rows(rows)
+    rows[0]["participant_count"] = "9"
+    report = await import_participant_rows(rows)
+
+    assert (report["registered"], report["updated"]) == (0, 1)
+    entry = await db[COLLECTIONS["drawing_participants"]].find_one({"school_id": "school-1"})
+    assert entry["participant_count"] == 9
+
+async def test_failed_writes_are_reported_per_row(db, monkeypatch):
+    from pymongo.errors import BulkWriteError
+    import participants
+
+    await _school(db)
+
+    class FailingCollection:
+        def find(self, *args, **kwargs):
+            return db["drawing_participants"].find(*args, **kwargs)
+
+        async def bulk_write(self, operations, ordered=True):
+            raise BulkWriteError({
+                "writeErrors": [{"index": 1, "errmsg": "document too large"}],
+                "upserted": [{"index": 0, "_id": "new"}]
+            })
+
+    get_collection = participants.get_collection
+    monkeypatch.setattr(
+        participants, "get_collection",
+        lambda name: FailingCollection() if name == "drawing_participants" else get_collection(name)
+    )
+    report = await participants.import_participant_rows([
+        {"school_id": "school-1", "category": "pre-school", "participant_count": "1"},
+        {"school_id": "school-1", "category": "junior-artists", "participant_count": "2"}
+    ])
+
+    assert report["registered"] == 1
+    assert report["errors"] == [{"row": 3, "error": "Could not be saved: document too large"}]
+
+async def test_undecodable_upload_names_the_row(client, db, admin_headers):
+    await _school(db)
+    body = _csv("school_id,category,participant_count", "school-1,pre-school,4") + b"school-1,junior-artists,\xff5\n"
+
+    response = await client.post(
+        "/api/admin/participants/import",
+        headers=admin_headers,
+        files={"file": ("participants.csv", body, "text/csv")}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Row 3 is not valid UTF-8")
+
+async def test_unsupported_upload_type_is_a_400(client, db, admin_headers):
+    response = await client.post(
+        "/api/admin/participants/import",
+        headers=admin_headers,
+        files={"file": ("participants.txt", b"school_id\n", "text/plain")}
+    )
+    assert response.status_code == 400
+
+async def test_rows_with_no_participants_are_skipped(db):
+    from database import COLLECTIONS
+    from participants import import_participant_rows
+
+    await _school(db)
+    report = await import_participant_rows([
+        {"school_id": "school-1", "category": "pre-school", "participant_count": "0"},
+        {"school_id": "school-1", "category": "junior-artists", "participant_count": "3"}
+    ])
+
+    assert (report["processed"], report["registered"], report["skipped"], report["error_count"]) == (2, 1, 1, 0)
+    entries = await db[COLLECTIONS["drawing_participants"]].find({}, {"_id": 0, "category": 1}).to_list(None)
+    assert entries == [{"category": "junior-artists"}]
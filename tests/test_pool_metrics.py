@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+ADDRESS = ("db-1", 27017)
+
+def _event(**fields):
+    return SimpleNamespace(address=ADDRESS, **fields)
+
+def test_snapshot_reports_usage_per_server():
+    from metrics import MongoPoolMetrics
+
+    pool = MongoPoolMetrics()
+    pool.pool_created(_event(options={"maxPoolSize": 20}))
+    for _ in range(4):
+        pool.connection_created(_event())
+        pool.connection_checked_out(_event())
+    pool.connection_checked_in(_event())
+    pool.connection_closed(_event())
+
+    assert pool.snapshot() == {
+        "db-1:27017": {"open": 3, "checked_out": 3, "max_pool_size": 20, "utilization": 0.15}
+    }
+    pool.pool_closed(_event())
+    assert pool.snapshot() == {}
+
+def test_counts_stay_exact_under_driver_threads():
+    from metrics import MongoPoolMetrics
+
+    pool = MongoPoolMetrics()
+    pool.pool_created(_event(options={}))
+    snapshots = []
+
+    def checkouts():
+        for _ in range(2000):
+            pool.connection_checked_out(_event())
+            pool.connection_checked_in(_event())
+
+    def reader():
+        for _ in range(200):
+            snapshots.append(pool.snapshot())
+
+    threads = [threading.Thread(target=checkouts) for _ in range(4)] + [threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.snapshot()["db-1:27017"]["checked_out"] == 0
+    assert all(0 <= snapshot["db-1:27017"]["checked_out"] <= 4 for snapshot in snapshots)
+
+async def test_warm_up_opens_min_pool_connections_concurrently(monkeypatch):
+    import database
+
+    monkeypatch.setattr(database, "MONGO_MIN_POOL_SIZE", 5)
+    state = SimpleNamespace(active=0, peak=0, calls=0)
+
+    async def ping():
+        state.calls += 1
+        state.active += 1
+        state.peak = max(state.peak, state.active)
+        await asyncio.sleep(0.01)
+        state.active -= 1
+        return 1.5
+
+    monkeypatch.setattr(database, "ping", ping)
+
+    assert await database.warm_up_pool() == 1.5
+    # Five concurrent pings to open the connections, then one over the warm pool
+    assert (state.calls, state.peak) == (6, 5)
@@ -0,0 +1,86 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+def _winners(*advances):
+    return [{"name": f"Winner {i}", "advances_to_next": flag} for i, flag in enumerate(advances)]
+
+async def _seed(db):
+    from database import COLLECTIONS
+
+    await db[COLLECTIONS["schools"]].insert_many([
+        {"id": "school-1", "district": "Mysuru", "taluk": "Hunsur"},
+        {"id": "school-2", "district": "Mysuru", "taluk": "Hunsur"},
+        {"id": "school-3", "district": "Mandya", "taluk": "Maddur"}
+    ])
+    await db[COLLECTIONS["drawing_participants"]].insert_many([
+        {"school_id": "school-1", "category": "pre-school", "level": "school", "winners": _winners(True, True, False)},
+        {"school_id": "school-2", "category": "pre-school", "level": "school", "winners": _winners(True)},
+        {"school_id": "school-3", "category": "pre-school", "level": "school", "winners": _winners(True)}
+    ])
+
+async def test_advancing_winners_are_grouped_into_brackets(db):
+    from database import COLLECTIONS
+    from models import CompetitionLevel
+    from progression import advance_level
+
+    await _seed(db)
+    summary = await advance_level(CompetitionLevel.SCHOOL)
+
+    assert (summary["schools"], summary["participants"], summary["registered"]) == (3, 4, 3)
+    assert [(bracket["bracket"], bracket["participants"]) for bracket in summary["brackets"]] == [
+        ("Mandya / Maddur", 1), ("Mysuru / Hunsur", 3)
+    ]
+    entry = await db[COLLECTIONS["drawing_participants"]].find_one({"school_id": "school-1", "level": "taluk"})
+    assert entry["participant_count"] == 2
+    assert entry["advanced_from"] == "school"
+
+async def test_rerun_replaces_entries_that_no_longer_advance(db):
+    from database import COLLECTIONS
+    from models import CompetitionLevel
+    from progression import advance_level
+    from stats import GLOBAL_KEY, get_stats
+
+    await _seed(db)
+    await advance_level(CompetitionLevel.SCHOOL)
+    participants = db[COLLECTIONS["drawing_participants"]]
+    await participants.update_one(
+        {"school_id": "school-2", "level": "school"}, {"$set": {"winners": _winners(False)}}
+    )
+
+    summary = await advance_level(CompetitionLevel.SCHOOL)
+
+    assert (summary["registered"], summary["updated"], summary["removed"]) == (0, 2, 1)
+    assert sorted(doc["school_id"] for doc in await participants.find({"level": "taluk"}).to_list(None)) == [
+        "school-1", "school-3"
+    ]
+    stats = await get_stats(GLOBAL_KEY)
+    assert stats["participants_by_level"]["taluk"] == 3
+    assert stats["competitions_by_level"]["taluk"] == 2
+
+async def test_state_is_the_last_level(db):
+    from models import CompetitionLevel
+    from progression import advance_level
+
+    with pytest.raises(ValueError):
+        await advance_level(CompetitionLevel.STATE)
+
+async def test_rerun_keeps_next_level_entries_that_have_results(db):
+    from database import COLLECTIONS
+    from models import CompetitionLevel
+    from progression import advance_level
+
+    await _seed(db)
+    await advance_level(CompetitionLevel.SCHOOL)
+    participants = db[COLLECTIONS["drawing_participants"]]
+    # school-2's taluk round has been held; school-3's was marked done
+    await participants.update_one(
+        {"school_id": "school-2", "level": "taluk"}, {"$set": {"winners": _winners(False)}}
+    )
+    await participants.update_one({"school_id": "school-3", "level": "taluk"}, {"$set": {"is_completed": True}})
+    await participants.update_many({"level": "school", "school_id": {"$ne": "school-1"}}, {"$set": {"winners": _winners(False)}})
+
+    summary = await advance_level(CompetitionLevel.SCHOOL)
+
+    assert summary["removed"] == 0
+    assert await participants.count_documents({"level": "taluk"}) == 3
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+def test_equal_scores_share_a_rank():
+    from ranking import competition_ranks
+
+    ranks = competition_ranks(np.array([70.0, 90.0, 80.0, 80.0, 50.0]))
+    assert ranks.tolist() == [4, 1, 2, 2, 5]
+
+def test_all_tied():
+    from ranking import competition_ranks
+
+    assert competition_ranks(np.array([10.0, 10.0, 10.0])).tolist() == [1, 1, 1]
+
+def test_identical_inputs_get_identical_scores():
+    from ranking import competition_ranks, compute_final_scores, score_matrix
+
+    scores = score_matrix([{"e1": 8, "e2": 6}, {"e1": 8, "e2": 6}, {"e1": 4, "e2": 3}])
+    final_scores = np.round(compute_final_scores(scores, np.array([10.0, 10.0, 2.0])), 4)
+
+    assert final_scores[0] == final_scores[1]
+    assert competition_ranks(final_scores).tolist() == [1, 1, 3]
+
+def test_strict_and_lenient_evaluators_count_equally():
+    from ranking import compute_final_scores, score_matrix
+
+    # e2 marks everyone 5 points higher; the order is what matters
+    scores = score_matrix([{"e1": 9}, {"e2": 14}, {"e1": 3}, {"e2": 8}])
+    final_scores = compute_final_scores(scores, np.zeros(4), vote_weight=0)
+
+    assert final_scores[0] == pytest.approx(final_scores[1])
+    assert final_scores[2] == pytest.approx(final_scores[3])
+
+@pytest.mark.anyio
+async def test_shortlist_includes_everyone_tied_at_the_cutoff(db):
+    from database import COLLECTIONS
+    from models import TeacherAwardCategory
+    from ranking import rank_category
+
+    category = TeacherAwardCategory.ACADEMIC_EXCELLENCE
+    await db[COLLECTIONS["teacher_nominations"]].insert_many([
+        {"id": nomination_id, "category": category.value, "status": "nominated",
+         "public_votes": votes, "evaluator_scores": {}}
+        for nomination_id, votes in [("a", 30), ("b", 20), ("c", 20), ("d", 5)]
+    ])
+
+    summary = await rank_category(category, shortlist_size=2)
+
+    assert summary["shortlisted"] == 3
+    nominations = {
+        doc["id"]: doc
+        for doc in await db[COLLECTIONS["teacher_nominations"]].find({}, {"_id": 0}).to_list(None)
+    }
+    assert {key: nominations[key]["rank"] for key in "abcd"} == {"a": 1, "b": 2, "c": 2, "d": 4}
+    assert nominations["c"]["status"] == "shortlisted"
+    assert nominations["d"]["status"] == "nominated"
@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.anyio
+
+WINDOW_S = 60
+
+def _allows(previous: int, current: int, limit: int, fraction: float, seconds: float) -> bool:
+    """Whether one more event fits ``seconds`` after the given state"""
+    from rate_limit import _estimate
+
+    position = fraction + seconds / WINDOW_S
+    if position >= 2:
+        return True
+    if position >= 1:
+        previous, current, position = current, 0, position - 1
+    return _estimate(previous, current, position) + 1 <= limit + 1e-9
+
+def test_limit_holds_within_a_window():
+    from rate_limit import SlidingWindowCounter
+
+    counter = SlidingWindowCounter(limit=3, window_s=WINDOW_S, max_keys=100)
+    for second in range(3):
+        assert counter.check("ip", second) is None
+        counter.add("ip", second)
+
+    assert counter.check("ip", 3) == WINDOW_S - 3 + WINDOW_S // 3
+    assert counter.check("other", 3) is None
+
+def test_previous_window_decays_as_it_slides_out():
+    from rate_limit import SlidingWindowCounter
+
+    counter = SlidingWindowCounter(limit=4, window_s=WINDOW_S, max_keys=100)
+    for _ in range(4):
+        counter.add("ip", 50)
+
+    # Early in the next window the old votes still weigh almost fully
+    retry_after = counter.check("ip", 61)
+    assert retry_after == 14
+    assert counter.check("ip", 61 + retry_after - 1) is not None
+    assert counter.check("ip", 61 + retry_after) is None
+    # Two windows later nothing is left
+    assert counter.check("ip", 180) is None
+
+@pytest.mark.parametrize("previous, current, limit, fraction", [
+    (10, 0, 5, 0.0),
+    (10, 4, 5, 0.5),
+    (3, 5, 5, 0.9),
+    (0, 5, 5, 0.25),
+    (0, 9, 5, 0.25),
+    (7, 7, 10, 0.1),
+    (1, 1, 1, 0.99),
+])
+def test_retry_after_is_the_first_second_the_next_vote_fits(previous, current, limit, fraction):
+    from rate_limit import _retry_after
+
+    retry_after = _retry_after(previous, current, limit, WINDOW_S, fraction)
+
+    assert _allows(previous, current, limit, fraction, retry_after)
+    if retry_after > 1:
+        assert not _allows(previous, current, limit, fraction, retry_after - 1)
+
+def test_least_recently_seen_keys_are_dropped():
+    from rate_limit import SlidingWindowCounter
+
+    counter = SlidingWindowCounter(limit=1, window_s=WINDOW_S, max_keys=2)
+    counter.add("a", 0)
+    counter.add("b", 0)
+    counter.add("c", 0)
+
+    assert len(counter) == 2
+    assert counter.check("a", 1) is None
+    assert counter.check("c", 1) is not None
+
+@pytest.mark.parametrize("address, subnet", [
+    ("203.0.113.77", "203.0.113.0/24"),
+    ("2001:db8:1:2:3:4:5:6", "2001:db8:1:2::/64"),
+    ("::ffff:203.0.113.77", "203.0.113.0/24"),
+    ("testclient", None),
+])
+def test_subnet_of(address, subnet):
+    from rate_limit import subnet_of
+
+    assert subnet_of(address) == subnet
+
+async def test_hit_rejects_with_429_and_retry_after(monkeypatch):
+    import rate_limit
+    from rate_limit import VoteRateLimiter
+
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: 600.0))
+    limiter = VoteRateLimiter(window_s=WINDOW_S, per_ip=2, per_subnet=3, max_keys=100, shared=False)
+
+    await limiter.hit("198.51.100.1")
+    await limiter.hit("198.51.100.1")
+    with pytest.raises(HTTPException) as per_ip:
+        await limiter.hit("198.51.100.1")
+    assert per_ip.value.status_code == 429
+    # Two votes this window: one has to decay out of the next window too
+    assert per_ip.value.headers["Retry-After"] == str(WINDOW_S + WINDOW_S // 2)
+
+    # A neighbour has its own IP budget but shares the subnet's
+    await limiter.hit("198.51.100.2")
+    with pytest.raises(HTTPException):
+        await limiter.hit("198.51.100.3")
+
+async def test_shared_counts_hold_across_limiters(db, monkeypatch):
+    import rate_limit
+    from rate_limit import VoteRateLimiter
+
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: 630.0))
+    workers = [
+        VoteRateLimiter(window_s=WINDOW_S, per_ip=3, per_subnet=100, max_keys=100, shared=True)
+        for _ in range(3)
+    ]
+    for worker in workers:
+        await worker.hit("192.0.2.10")
+
+    with pytest.raises(HTTPException) as rejected:
+        await workers[0].hit("192.0.2.10")
+    # The rejected attempt is counted too, so 4 must decay to 2 next window
+    assert rejected.value.headers["Retry-After"] == str(WINDOW_S)
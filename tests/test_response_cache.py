@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.anyio
+
+async def _nomination(db, nomination_id="nom-1", public_votes=0):
+    from database import COLLECTIONS
+
+    await db[COLLECTIONS["teacher_nominations"]].insert_one({
+        "id": nomination_id, "teacher_name": "A. Teacher", "category": "academic-excellence",
+        "award_type": "shikshan-ratna", "public_votes": public_votes, "status": "nominated"
+    })
+
+async def test_results_answer_if_none_match_with_304(client, db):
+    await _nomination(db, public_votes=4)
+
+    first = await client.get("/api/voting/results/nom-1")
+    assert first.status_code == 200
+    assert first.json()["public_votes"] == 4
+    etag = first.headers["etag"]
+
+    cached = await client.get("/api/voting/results/nom-1", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+ETAG = '"0123456789abcdef"'
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (ETAG, True),
+    (f'"stale", {ETAG}', True),
+    (f"W/{ETAG}", True),
+    ("*", True),
+    ("", False),
+    ('"0123456789abcdef0"', False),
+    ('"0123456789abcde"', False),
+    (f'"{ETAG}"', False),
+])
+def test_etag_matching(if_none_match, matches):
+    from response_cache import etag_matches
+
+    assert etag_matches(if_none_match, ETAG) is matches
+
+async def test_flushed_votes_invalidate_the_cached_results(client, db):
+    from vote_aggregator import vote_aggregator
+
+    await _nomination(db)
+    etag = (await client.get("/api/voting/results/nom-1")).headers["etag"]
+
+    vote_aggregator.record("nom-1")
+    await vote_aggregator.flush()
+
+    fresh = await client.get("/api/voting/results/nom-1", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert fresh.json()["public_votes"] == 1
+
+async def test_failed_builds_are_not_cached(client, db):
+    assert (await client.get("/api/voting/results/nom-1")).status_code == 404
+
+    await _nomination(db)
+    assert (await client.get("/api/voting/results/nom-1")).status_code == 200
+
+async def test_concurrent_misses_share_one_build():
+    from response_cache import ResponseCache
+
+    cache = ResponseCache()
+    builds = 0
+    release = asyncio.Event()
+
+    async def builder():
+        nonlocal builds
+        builds += 1
+        await release.wait()
+        return {"value": builds}
+
+    waiters = [asyncio.ensure_future(cache.get_or_build("key", builder)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    entries = await asyncio.gather(*waiters)
+
+    assert builds == 1
+    assert len(set(entries)) == 1
+
+async def test_failed_build_is_shared_and_forgotten():
+    from response_cache import ResponseCache
+
+    cache = ResponseCache()
+
+    async def missing():
+        await asyncio.sleep(0)
+        raise HTTPException(status_code=404)
+
+    results = await asyncio.gather(
+        *(cache.get_or_build("key", missing) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, HTTPException) for result in results)
+    assert cache._building == {}
+    assert len(cache._entries) == 0
+
+async def test_invalidate_and_clear():
+    from response_cache import ResponseCache
+
+    cache = ResponseCache()
+    calls = []
+
+    async def builder():
+        calls.append(1)
+        return {"calls": len(calls)}
+
+    first = await cache.get_or_build("key", builder)
+    assert await cache.get_or_build("key", builder) == first
+
+    cache.invalidate("key", "unrelated")
+    second = await cache.get_or_build("key", builder)
+    assert second != first
+
+    cache.clear()
+    await cache.get_or_build("key", builder)
+    assert len(calls) == 3
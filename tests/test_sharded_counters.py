@@ -0,0 +1,137 @@
+import asyncio
+import random
+from datetime import datetime
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def _totals(db, counter):
+    from database import COLLECTIONS
+
+    nominations = await db[COLLECTIONS["teacher_nominations"]].find({}, {"_id": 0}).to_list(None)
+    shards = await counter.all_shard_sums()
+    return {
+        nomination["id"]: nomination["public_votes"] + shards.get(nomination["id"], 0)
+        for nomination in nominations
+    }
+
+async def _nominations(db, count):
+    from database import COLLECTIONS
+
+    await db[COLLECTIONS["teacher_nominations"]].insert_many([
+        {"id": f"nom-{i}", "public_votes": 0} for i in range(count)
+    ])
+
+def test_shard_count_follows_the_write_rate():
+    from sharded_counters import ShardedVoteCounter
+
+    counter = ShardedVoteCounter(max_shards=8, votes_per_shard=10)
+    assert counter.shards_for("quiet") == 1
+
+    now = 0.0
+    for _ in range(20):
+        now += 1
+        counter._observe("viral", 100, now, 1)
+    assert counter.shards_for("viral") == 8
+
+async def test_hot_nominations_spread_over_several_shards(db):
+    from database import COLLECTIONS
+    from sharded_counters import ShardedVoteCounter
+
+    counter = ShardedVoteCounter(max_shards=4, votes_per_shard=1)
+    for _ in range(30):
+        await counter.add({"nom-0": 50}, 0.5)
+
+    assert await db[COLLECTIONS["vote_counter_shards"]].count_documents({"nomination_id": "nom-0"}) > 1
+    assert (await counter.shard_sums(["nom-0"]))["nom-0"] == 1500
+
+async def test_fold_conserves_every_total(db, monkeypatch):
+    import sharded_counters
+    from sharded_counters import ShardedVoteCounter
+
+    monkeypatch.setattr(sharded_counters, "FOLD_BATCH_SIZE", 3)
+    await _nominations(db, 5)
+    counter = ShardedVoteCounter(max_shards=4, votes_per_shard=1)
+    rng = random.Random(7)
+    expected = {f"nom-{i}": 0 for i in range(5)}
+    for _ in range(40):
+        deltas = {f"nom-{rng.randrange(5)}": rng.randint(1, 20) for _ in range(3)}
+        for nomination_id, delta in deltas.items():
+            expected[nomination_id] += delta
+        await counter.add(deltas, 0.5)
+
+    moved = await counter.fold()
+
+    assert moved == sum(expected.values())
+    assert await _totals(db, counter) == expected
+    assert await counter.all_shard_sums() == {}
+
+async def test_writes_during_a_fold_are_not_lost(db, monkeypatch):
+    import sharded_counters
+    from sharded_counters import ShardedVoteCounter
+
+    monkeypatch.setattr(sharded_counters, "FOLD_BATCH_SIZE", 2)
+    await _nominations(db, 4)
+    counter = ShardedVoteCounter(max_shards=2, votes_per_shard=1)
+    for i in range(4):
+        await counter.add({f"nom-{i}": 10}, 1)
+
+    async def writer():
+        for i in range(20):
+            await counter.add({f"nom-{i % 4}": 1}, 1)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(counter.fold(), writer())
+    await counter.fold()
+
+    assert await _totals(db, counter) == {f"nom-{i}": 15 for i in range(4)}
+
+async def test_only_the_lease_holder_folds(db):
+    from sharded_counters import ShardedVoteCounter
+
+    await _nominations(db, 1)
+    folding, waiting = ShardedVoteCounter(), ShardedVoteCounter()
+    await waiting.add({"nom-0": 3}, 1)
+
+    assert await folding.take_fold_lease(folding.worker_id)
+    assert await waiting.fold() == 0
+
+    await folding.release_fold_lease(folding.worker_id)
+    assert await waiting.fold() == 3
+    assert await _totals(db, waiting) == {"nom-0": 3}
+
+async def test_a_fold_interrupted_mid_batch_is_replayed(db, monkeypatch):
+    import sharded_counters
+    from database import COLLECTIONS, get_collection
+    from sharded_counters import FOLD_LEASE_ID, ShardedVoteCounter
+
+    await _nominations(db, 2)
+    crashing, recovering = ShardedVoteCounter(max_shards=2, votes_per_shard=1), ShardedVoteCounter()
+    await crashing.add({"nom-0": 7, "nom-1": 4}, 1)
+
+    def dying_get_collection(name):
+        collection = get_collection(name)
+        if name == COLLECTIONS["teacher_nominations"]:
+            async def crash(*args, **kwargs):
+                raise ConnectionError("worker died")
+            collection.bulk_write = crash
+        return collection
+
+    # Shards are decremented, then the process dies before public_votes moves
+    monkeypatch.setattr(sharded_counters, "get_collection", dying_get_collection)
+    with pytest.raises(ConnectionError):
+        await crashing.fold()
+    monkeypatch.setattr(sharded_counters, "get_collection", get_collection)
+
+    lease = await db[COLLECTIONS["locks"]].find_one({"_id": FOLD_LEASE_ID})
+    assert sorted(lease["journal"]["votes"]) == [["nom-0", 0, 7], ["nom-1", 0, 4]]
+
+    # The crashed holder's lease has to run out before anyone replays it
+    await db[COLLECTIONS["locks"]].update_one({"_id": FOLD_LEASE_ID}, {"$set": {"expires_at": datetime(2000, 1, 1)}})
+    await recovering.recover()
+    # Replaying again must not move the votes twice
+    await recovering._apply_journal(lease["journal"])
+
+    assert await _totals(db, recovering) == {"nom-0": 7, "nom-1": 4}
+    assert await db[COLLECTIONS["locks"]].count_documents({"_id": FOLD_LEASE_ID}) == 0
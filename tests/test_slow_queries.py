@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+def _run(listener, request_id, duration_ms, command_name="find", collection="teacher_nominations", **command):
+    command = {command_name: collection, **command}
+    listener.started(SimpleNamespace(
+        command_name=command_name, command=command, connection_id=("db", 27017),
+        request_id=request_id, database_name="test"
+    ))
+    listener.succeeded(SimpleNamespace(
+        command_name=command_name, connection_id=("db", 27017),
+        request_id=request_id, duration_micros=int(duration_ms * 1000)
+    ))
+
+def test_only_commands_over_the_threshold_are_buffered():
+    from slow_queries import SlowQueryListener
+
+    listener = SlowQueryListener(threshold_ms=100)
+    _run(listener, 1, 99.9, filter={"id": "nom-1"})
+    _run(listener, 2, 100, filter={"id": "nom-2"})
+    _run(listener, 3, 500, command_name="insert", documents=[{}])
+    _run(listener, 4, 500, collection="slow_queries", filter={})
+
+    assert [entry[3]["filter"] for entry in listener.buffer] == [{"id": "nom-2"}]
+    assert listener._started == {}
+
+async def test_each_shape_is_explained_once_per_interval(db, monkeypatch):
+    import slow_queries
+    from database import COLLECTIONS
+    from slow_queries import SlowQueryListener, SlowQueryRecorder
+
+    clock = [1000.0]
+    monkeypatch.setattr(slow_queries, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    listener = SlowQueryListener(threshold_ms=0)
+    recorder = SlowQueryRecorder(listener)
+    explained = []
+
+    async def explain(database_name, command_name, command):
+        explained.append(command["filter"])
+        return {"stages": ["COLLSCAN"], "collscan": True}
+
+    monkeypatch.setattr(recorder, "_explain", explain)
+
+    _run(listener, 1, 150, filter={"email": "a@example.com"})
+    _run(listener, 2, 150, filter={"email": "b@example.com"})
+    _run(listener, 3, 150, filter={"school_id": "school-1"})
+    assert await recorder.drain() == 3
+    clock[0] += slow_queries.SLOW_QUERY_EXPLAIN_INTERVAL_S
+    _run(listener, 4, 150, filter={"email": "c@example.com"})
+    await recorder.drain()
+
+    assert explained == [{"email": "a@example.com"}, {"school_id": "school-1"}, {"email": "c@example.com"}]
+    entries = await db[COLLECTIONS["slow_queries"]].find({}, {"_id": 0}).to_list(None)
+    assert [entry["explain"] is not None for entry in entries] == [True, False, True, True]
+    # Literal values never reach the log
+    assert {entry["shape"] for entry in entries} == {'{"filter":{"email":"?"}}', '{"filter":{"school_id":"?"}}'}
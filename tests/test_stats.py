@@ -0,0 +1,129 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+WINNER = {"name": "Winner", "grade": "2", "age": 7, "theme": "Monsoon", "position": 1, "advances_to_next": True}
+
+SCHOOLS = [
+    {"id": "school-1", "district": "Mysuru", "taluk": "Hunsur", "is_active": True},
+    {"id": "school-2", "district": "Mandya", "taluk": "Maddur", "is_active": True}
+]
+
+def _school_headers(school_id):
+    from auth import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': school_id, 'user_type': 'school'})}"}
+
+async def _snapshot(db):
+    from database import COLLECTIONS
+
+    docs = {}
+    async for doc in db[COLLECTIONS["stats"]].find({}):
+        key = doc.pop("_id")
+        doc.pop("generation", None)
+        if "categories" in doc:
+            doc["categories"] = sorted(doc["categories"])
+        # A counter no write path has touched yet reads as 0
+        docs[key] = {field: value for field, value in doc.items() if value != 0}
+    return docs
+
+async def _assert_matches_rebuild(db):
+    """The incrementally maintained counters equal a full recount"""
+    from stats import rebuild_stats
+
+    maintained = await _snapshot(db)
+    await rebuild_stats()
+    assert maintained == await _snapshot(db)
+
+@pytest.fixture
+async def seeded(db):
+    from database import COLLECTIONS
+    from stats import rebuild_stats
+
+    await db[COLLECTIONS["schools"]].insert_many([dict(school) for school in SCHOOLS])
+    await rebuild_stats()
+    return db
+
+async def test_registering_participants(client, seeded):
+    response = await client.post("/api/school/participants/register", headers=_school_headers("school-1"), json={
+        "level": "school", "participants": {"pre-school": 12, "junior-artists": 7}
+    })
+    assert response.status_code == 200
+
+    await _assert_matches_rebuild(seeded)
+
+async def test_nominating_a_teacher(client, seeded):
+    response = await client.post("/api/school/teacher-nominations", headers=_school_headers("school-2"), json={
+        "teacher_name": "A. Teacher", "category": "academic-excellence", "award_type": "state",
+        "email": "teacher@example.com", "phone": "9000000000", "experience_years": 12,
+        "current_position": "Headmistress", "qualifications": "M.Ed", "subjects_taught": ["Maths"],
+        "achievements": "Built the school library", "nomination_letter": "Strongly recommended"
+    })
+    assert response.status_code == 200
+
+    await _assert_matches_rebuild(seeded)
+
+async def test_changing_counts_and_winner_status(client, seeded):
+    headers = _school_headers("school-1")
+    await client.post("/api/school/participants/register", headers=headers, json={
+        "level": "school", "participants": {"pre-school": 12}
+    })
+    # A second registration replaces the count
+    await client.post("/api/school/participants/register", headers=headers, json={
+        "level": "school", "participants": {"pre-school": 5}
+    })
+    response = await client.post("/api/school/participants/winners", headers=headers, json={
+        "category": "pre-school", "level": "school",
+        "winners": [WINNER]
+    })
+    assert response.status_code == 200
+
+    await _assert_matches_rebuild(seeded)
+
+    await client.post("/api/school/participants/winners", headers=headers, json={
+        "category": "pre-school", "level": "school", "winners": []
+    })
+    await _assert_matches_rebuild(seeded)
+
+async def test_removing_stale_next_level_entries(seeded):
+    from database import COLLECTIONS
+    from models import CompetitionLevel
+    from progression import advance_level
+    from stats import rebuild_stats
+
+    participants = seeded[COLLECTIONS["drawing_participants"]]
+    await participants.insert_many([
+        {"school_id": school["id"], "category": "pre-school", "level": "school", "participant_count": 10,
+         "winners": [WINNER]}
+        for school in SCHOOLS
+    ])
+    await rebuild_stats()
+    await advance_level(CompetitionLevel.SCHOOL)
+    await participants.update_one(
+        {"school_id": "school-2", "level": "school"}, {"$set": {"winners": [dict(WINNER, advances_to_next=False)]}}
+    )
+
+    summary = await advance_level(CompetitionLevel.SCHOOL)
+
+    assert summary["removed"] == 1
+    await _assert_matches_rebuild(seeded)
+
+async def test_ensure_stats_builds_once_and_respects_the_lease(seeded):
+    from datetime import datetime, timedelta
+    from database import COLLECTIONS
+    from stats import GLOBAL_KEY, REBUILD_LEASE_ID, ensure_stats
+
+    # Already built by the fixture
+    assert not await ensure_stats()
+
+    stats = seeded[COLLECTIONS["stats"]]
+    locks = seeded[COLLECTIONS["locks"]]
+    await stats.delete_many({})
+    await locks.insert_one({"_id": REBUILD_LEASE_ID, "expires_at": datetime.utcnow() + timedelta(minutes=5)})
+    assert not await ensure_stats()
+    assert await stats.count_documents({"_id": GLOBAL_KEY}) == 0
+
+    await locks.update_one({"_id": REBUILD_LEASE_ID}, {"$set": {"expires_at": datetime(2000, 1, 1)}})
+    assert await ensure_stats()
+    assert (await stats.find_one({"_id": GLOBAL_KEY}))["schools"] == 2
+    assert await locks.count_documents({}) == 0
@@ -0,0 +1,57 @@
+import pytest
+
+def test_generated_tokens_carry_valid_check_digits():
+    from token_format import TOKEN_LENGTH, generate_voting_token, is_well_formed_token
+
+    for _ in range(200):
+        token = generate_voting_token()
+        assert len(token) == TOKEN_LENGTH
+        assert is_well_formed_token(token)
+
+def test_tokens_are_deterministic_for_their_body():
+    from token_format import voting_token_from_bytes
+
+    assert voting_token_from_bytes(b"\x00" * 5) == voting_token_from_bytes(b"\x00" * 5)
+    assert voting_token_from_bytes(b"\x00" * 5)[:8] == "00000000"
+
+def test_any_single_character_change_is_rejected():
+    from token_format import ALPHABET, generate_voting_token, is_well_formed_token
+
+    token = generate_voting_token()
+    accepted = [
+        position
+        for position in range(len(token))
+        for replacement in ALPHABET
+        if replacement != token[position]
+        and is_well_formed_token(token[:position] + replacement + token[position + 1:])
+    ]
+    # A changed body collides with its check digits about once in a million
+    assert len(accepted) <= 1
+    assert all(position < 8 for position in accepted)
+
+def test_check_digits_depend_on_the_secret(monkeypatch):
+    import hashlib
+    import hmac
+    import token_format
+
+    token = token_format.generate_voting_token()
+    monkeypatch.setattr(token_format, "_HMAC_BASE", hmac.new(b"another-secret", digestmod=hashlib.sha256))
+    assert not token_format.is_well_formed_token(token)
+
+def test_user_typos_are_normalized():
+    from token_format import generate_voting_token, is_well_formed_token, normalize_voting_token
+
+    token = generate_voting_token()
+    typed = f" {token[:4].lower()}-{token[4:]} ".replace("0", "O").replace("1", "l")
+    assert normalize_voting_token(typed) == token
+    assert is_well_formed_token(normalize_voting_token(typed))
+
+@pytest.mark.parametrize("allowed", [True, False])
+def test_legacy_tokens_follow_the_legacy_mode(monkeypatch, allowed):
+    import token_format
+
+    monkeypatch.setattr(token_format, "LEGACY_TOKENS_ALLOWED", allowed)
+    legacy = token_format.normalize_voting_token("a1b2c3d4")
+    assert legacy == "A1B2C3D4"
+    assert token_format.is_well_formed_token(legacy) is allowed
+    assert not token_format.is_well_formed_token("A1B2C3D")
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def _nominations(db, *ids):
+    from database import COLLECTIONS
+
+    await db[COLLECTIONS["teacher_nominations"]].insert_many([
+        {"id": nomination_id, "public_votes": 0} for nomination_id in ids
+    ])
+    return await db[COLLECTIONS["teacher_nominations"]].find({}, {"_id": 0}).to_list(None)
+
+async def test_flush_moves_pending_votes_to_the_counter(db):
+    from sharded_counters import vote_counter
+    from vote_aggregator import VoteCounterAggregator
+
+    aggregator = VoteCounterAggregator()
+    nominations = await _nominations(db, "a", "b")
+    for nomination_id in ("a", "a", "b"):
+        aggregator.record(nomination_id)
+
+    assert await aggregator.current_votes(nominations) == {"a": 2, "b": 1}
+    assert await aggregator.flush() == 2
+    assert aggregator.pending("a") == 0
+    assert await vote_counter.all_shard_sums() == {"a": 2, "b": 1}
+    assert await aggregator.current_votes(nominations) == {"a": 2, "b": 1}
+    assert await aggregator.flush() == 0
+
+async def test_failed_flush_keeps_the_batch_for_the_next_tick(db, monkeypatch):
+    from sharded_counters import vote_counter
+    from vote_aggregator import VoteCounterAggregator
+
+    aggregator = VoteCounterAggregator()
+    aggregator.record("a", 3)
+
+    async def unavailable(deltas, interval):
+        raise ConnectionError("mongo down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(vote_counter, "add", unavailable)
+        with pytest.raises(ConnectionError):
+            await aggregator.flush()
+
+    # Votes recorded while the flush was failing are kept as well
+    aggregator.record("a")
+    assert aggregator.pending("a") == 4
+    assert await aggregator.flush() == 1
+    assert await vote_counter.all_shard_sums() == {"a": 4}
+
+async def test_votes_after_a_rebuild_cutoff_are_held_until_it_finishes(db):
+    from sharded_counters import vote_counter
+    from vote_aggregator import VoteCounterAggregator
+
+    aggregator = VoteCounterAggregator()
+    cutoff = datetime.utcnow()
+    aggregator.guard.cutoff = cutoff
+    aggregator.record("a", voted_at=cutoff - timedelta(seconds=1))
+    aggregator.record("a", voted_at=cutoff)
+
+    assert aggregator.pending("a") == 2
+    await aggregator.flush()
+    assert await vote_counter.all_shard_sums() == {"a": 1}
+
+    # No guard document: the rebuild is over
+    await aggregator.sync_guard()
+    await aggregator.flush()
+    assert await vote_counter.all_shard_sums() == {"a": 2}
+
+async def test_rebuild_recounts_without_double_counting_shards(db, monkeypatch):
+    import vote_aggregator as module
+    from database import COLLECTIONS
+    from sharded_counters import vote_counter
+
+    monkeypatch.setattr(module, "REBUILD_LEAD_S", 0)
+    monkeypatch.setattr(module, "REBUILD_GRACE_S", 0)
+    nominations = await _nominations(db, "a", "b")
+    voted_at = datetime.utcnow() - timedelta(minutes=1)
+    await db[COLLECTIONS["votes"]].insert_many(
+        [{"nomination_id": "a", "voted_at": voted_at} for _ in range(5)]
+        + [{"nomination_id": "b", "voted_at": voted_at} for _ in range(2)]
+    )
+    await vote_counter.add({"a": 3}, 1)
+    # A counter that drifted, e.g. after a worker died with unflushed votes
+    await db[COLLECTIONS["teacher_nominations"]].update_one({"id": "b"}, {"$set": {"public_votes": 7}})
+
+    assert await module.rebuild_public_votes() == 2
+    nominations = await db[COLLECTIONS["teacher_nominations"]].find({}, {"_id": 0}).to_list(None)
+    assert await module.vote_aggregator.current_votes(nominations) == {"a": 5, "b": 2}
+    assert await vote_counter.all_shard_sums() == {"a": 3}
+    assert await db[COLLECTIONS["locks"]].count_documents({}) == 0
+
+async def test_only_one_rebuild_runs_at_a_time(db):
+    from vote_aggregator import RebuildGuard, RebuildInProgress
+
+    first, second = RebuildGuard(), RebuildGuard()
+    cutoff = await first.acquire()
+    with pytest.raises(RebuildInProgress):
+        await second.acquire()
+    assert await second.refresh() == cutoff
+
+    await first.release()
+    assert await second.refresh() is None
+
+async def test_startup_recovery_runs_beside_another_workers_rebuild(db):
+    from vote_aggregator import RebuildGuard, recover_public_votes
+
+    other = RebuildGuard()
+    await other.acquire()
+
+    # Logged and skipped rather than failing startup
+    await recover_public_votes()
+    await other.release()
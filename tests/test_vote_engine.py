@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.anyio
+
+async def _seed(db, token, expires_in=timedelta(days=1)):
+    from database import COLLECTIONS
+
+    await db[COLLECTIONS["voting_tokens"]].insert_one({
+        "id": "token-1", "token": token, "is_used": False,
+        "expires_at": datetime.utcnow() + expires_in
+    })
+    await db[COLLECTIONS["teacher_nominations"]].insert_one({
+        "id": "nom-1", "category": "academic-excellence", "public_votes": 0
+    })
+
+async def test_token_can_only_be_claimed_once(db):
+    from database import COLLECTIONS
+    from token_format import generate_voting_token
+    from vote_aggregator import vote_aggregator
+    from vote_engine import cast_vote_atomic
+
+    token = generate_voting_token()
+    await _seed(db, token)
+
+    results = await asyncio.gather(
+        *(cast_vote_atomic(token, "nom-1", "10.0.0.1") for _ in range(5)),
+        return_exceptions=True
+    )
+
+    votes = [result for result in results if not isinstance(result, Exception)]
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(votes) == 1
+    assert len(rejected) == 4
+    assert all(error.status_code == 400 for error in rejected)
+    assert await db[COLLECTIONS["votes"]].count_documents({}) == 1
+    assert vote_aggregator.pending("nom-1") == 1
+
+async def test_unknown_nomination_releases_the_token(db):
+    from database import COLLECTIONS
+    from token_format import generate_voting_token
+    from vote_engine import cast_vote_atomic
+
+    token = generate_voting_token()
+    await _seed(db, token)
+
+    with pytest.raises(HTTPException) as error:
+        await cast_vote_atomic(token, "missing", "10.0.0.1")
+    assert error.value.status_code == 404
+
+    token_doc = await db[COLLECTIONS["voting_tokens"]].find_one({"token": token})
+    assert token_doc["is_used"] is False
+    # The released token can still be used
+    await cast_vote_atomic(token, "nom-1", "10.0.0.1")
+
+async def test_expired_and_unknown_tokens_are_rejected(db):
+    from token_format import generate_voting_token
+    from vote_engine import cast_vote_atomic
+
+    token = generate_voting_token()
+    await _seed(db, token, expires_in=timedelta(days=-1))
+
+    with pytest.raises(HTTPException) as expired:
+        await cast_vote_atomic(token, "nom-1", "10.0.0.1")
+    assert expired.value.detail == "This token has expired"
+
+    with pytest.raises(HTTPException) as unknown:
+        await cast_vote_atomic(generate_voting_token(), "nom-1", "10.0.0.1")
+    assert unknown.value.status_code == 404
+
+async def test_claims_whose_vote_never_landed_are_released(db, monkeypatch):
+    import vote_engine
+    from database import COLLECTIONS
+    from token_format import generate_voting_token
+    from vote_engine import cast_vote_atomic, claim_token, release_stale_claims
+
+    tokens = db[COLLECTIONS["voting_tokens"]]
+    voted, burned = generate_voting_token(), generate_voting_token()
+    await _seed(db, voted)
+    await tokens.insert_one({
+        "id": "token-2", "token": burned, "is_used": False, "expires_at": datetime.utcnow() + timedelta(days=1)
+    })
+    await cast_vote_atomic(voted, "nom-1", "10.0.0.1")
+    # The process dies between the claim and the vote insert
+    await claim_token(burned, "nom-1", "10.0.0.2", pending=True)
+
+    assert await release_stale_claims() == 0
+    monkeypatch.setattr(vote_engine, "CLAIM_STALE_S", -1)
+    assert await release_stale_claims() == 1
+
+    released = await tokens.find_one({"token": burned})
+    assert not released["is_used"] and "vote_pending" not in released
+    kept = await tokens.find_one({"token": voted})
+    assert kept["is_used"] and "vote_pending" not in kept
+    await cast_vote_atomic(burned, "nom-1", "10.0.0.2")
@@ -0,0 +1,30 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def test_generating_tokens_requires_an_admin(client, db):
+    from auth import create_access_token
+
+    anonymous = await client.post("/api/voting/generate-tokens?count=5")
+    assert anonymous.status_code == 403
+
+    school = {"Authorization": f"Bearer {create_access_token({'sub': 'school-1', 'user_type': 'school'})}"}
+    assert (await client.post("/api/voting/generate-tokens?count=5", headers=school)).status_code == 403
+
+async def test_inline_batches_are_capped(client, db, admin_headers):
+    from routes.voting import MAX_INLINE_TOKENS
+
+    response = await client.post(f"/api/voting/generate-tokens?count={MAX_INLINE_TOKENS + 1}", headers=admin_headers)
+    assert response.status_code == 422
+
+async def test_generated_tokens_are_stored_and_well_formed(client, db, admin_headers):
+    from database import COLLECTIONS
+    from token_format import is_well_formed_token
+
+    response = await client.post("/api/voting/generate-tokens?count=25&batch_label=ward-7", headers=admin_headers)
+
+    assert response.status_code == 200
+    tokens = response.json()["tokens"]
+    assert len(set(tokens)) == 25
+    assert all(is_well_formed_token(token) for token in tokens)
+    assert await db[COLLECTIONS["voting_tokens"]].count_documents({"batch_label": "ward-7"}) == 25